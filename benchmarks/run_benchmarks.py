@@ -0,0 +1,268 @@
+"""Benchmark the plot products on synthetic ruptures of increasing size.
+
+For each requested subfault count a synthetic SRF and realisation are
+generated (see `visualisation.synthetic`), and every plot product is
+rendered from them in a fresh worker process, recording the wall time
+and the time spent in each rendering stage (load, compute, grid, render
+and save, see `visualisation.profiling`). Results are written as JSON
+so that scaling curves can be compared between releases.
+
+Example
+-------
+$ python benchmarks/run_benchmarks.py results.json \\
+    --subfault-count 10000 --subfault-count 100000 --subfault-count 1000000 \\
+    --fault-count 3 --plane-count 6 --repeats 3
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import UTC, datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Annotated, Any, Optional
+
+import typer
+
+from qcore import cli
+from visualisation import profiling, srf_cache, synthetic
+from visualisation.realisation import read_realisation
+from visualisation.sources import plot_srf_suite
+from visualisation.sources.plot_srf_suite import Product
+
+app = typer.Typer()
+
+DEFAULT_SUBFAULT_COUNTS = [10_000, 100_000, 1_000_000]
+RESULTS_FORMAT_VERSION = 1
+VERSIONED_PACKAGES = (
+    "visualisation",
+    "numpy",
+    "scipy",
+    "pandas",
+    "matplotlib",
+    "pygmt",
+    "source_modelling",
+)
+
+
+def environment() -> dict[str, Any]:
+    """Describe the machine and software the benchmarks run on.
+
+    Returns
+    -------
+    dict[str, Any]
+        The platform, CPU count, package versions and SRF cache setting.
+    """
+    versions = {}
+    for package in VERSIONED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+        srf_cache.CACHE_ENV_VAR: os.environ.get(srf_cache.CACHE_ENV_VAR),
+    }
+
+
+def _initialise_worker() -> None:
+    """Import the plotting libraries before the benchmark is timed."""
+    import matplotlib
+    import pygmt  # noqa: F401
+
+    matplotlib.use("Agg")
+    from matplotlib import pyplot  # noqa: F401
+
+
+def benchmark_product(
+    srf_ffp: Path,
+    realisation_ffp: Path,
+    product: Product,
+    output_dir: Path,
+    trace_memory: bool = False,
+) -> dict[str, Any]:
+    """Load an SRF and render one plot product from it, profiling both.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+    realisation_ffp : Path
+        Path to the realisation, read only for products that need it.
+    product : Product
+        The product to render.
+    output_dir : Path
+        The directory to write the plot into.
+    trace_memory : bool
+        If True, trace the peak memory of each stage.
+
+    Returns
+    -------
+    dict[str, Any]
+        The status, wall time, stage times and memory, and spans of the
+        run, and the error traceback if it failed.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    result: dict[str, Any] = {"status": "ok", "error": None}
+    try:
+        with profiling.profiling(trace_memory=trace_memory) as profile:
+            srf_data = plot_srf_suite.read_srf_for_products(srf_ffp, [product])
+            realisation = (
+                read_realisation(realisation_ffp)
+                if product in plot_srf_suite.REALISATION_PRODUCTS
+                else None
+            )
+            plot_srf_suite.render_suite(
+                srf_data,
+                srf_ffp.stem,
+                output_dir,
+                realisation=realisation,
+                products=[product],
+            )
+    except Exception:  # noqa: BLE001
+        # A failing product is recorded in the results, and the other
+        # products are still benchmarked.
+        result["status"] = "failed"
+        result["error"] = traceback.format_exc()
+    return result | profile.to_dict()
+
+
+@cli.from_docstring(app)
+def run_benchmarks(
+    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
+    subfault_count: Annotated[Optional[list[int]], typer.Option(min=1)] = None,
+    fault_count: Annotated[int, typer.Option(min=1)] = 1,
+    plane_count: Annotated[int, typer.Option(min=1)] = 1,
+    nt: Annotated[int, typer.Option(min=1)] = 50,
+    repeats: Annotated[int, typer.Option(min=1)] = 1,
+    product: Annotated[Optional[list[Product]], typer.Option()] = None,
+    work_dir: Annotated[Optional[Path], typer.Option(file_okay=False)] = None,
+    seed: Annotated[int, typer.Option()] = 0,
+    trace_memory: Annotated[bool, typer.Option()] = False,
+) -> None:
+    """Benchmark the plot products on synthetic ruptures.
+
+    Parameters
+    ----------
+    output_ffp : Path
+        Path to write the benchmark results (JSON) to.
+    subfault_count : Optional[list[int]]
+        Approximate number of subfaults of a rupture, may be repeated.
+        Defaults to 10k, 100k and 1M subfaults.
+    fault_count : int
+        Number of faults in each rupture.
+    plane_count : int
+        Number of planes in each rupture, shared between the faults.
+    nt : int
+        Maximum number of slip rate samples of each subfault.
+    repeats : int
+        Number of times to render each product for each rupture.
+    product : Optional[list[Product]]
+        Product to benchmark, may be repeated. Defaults to every product.
+    work_dir : Optional[Path]
+        Directory to write the synthetic ruptures and plots into, by
+        default a temporary directory that is removed afterwards.
+    seed : int
+        Seed of the synthetic ruptures.
+    trace_memory : bool
+        If set, also record the peak Python and numpy memory of each
+        stage. This slows down the stages that allocate many objects.
+    """
+    products = [
+        product_type for product_type in Product if product_type in (product or Product)
+    ]
+    results = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "timestamp": datetime.now(UTC).isoformat(),
+        "environment": environment(),
+        "parameters": {
+            "fault_count": fault_count,
+            "plane_count": plane_count,
+            "nt": nt,
+            "repeats": repeats,
+            "seed": seed,
+            "trace_memory": trace_memory,
+        },
+        "ruptures": [],
+    }
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        work_dir = work_dir or Path(temporary_dir)
+        for subfaults in subfault_count or DEFAULT_SUBFAULT_COUNTS:
+            start = time.perf_counter()
+            rupture = synthetic.synthetic_rupture(
+                fault_count=fault_count,
+                plane_count=plane_count,
+                subfault_count=subfaults,
+                nt=nt,
+                seed=seed,
+            )
+            rupture_dir = work_dir / f"subfaults_{subfaults}"
+            srf_ffp, realisation_ffp = rupture.write(rupture_dir)
+            rupture_results = {
+                "subfault_count": subfaults,
+                "point_count": len(rupture.srf_data.points),
+                "plane_shape": rupture.srf_data.header[["nstk", "ndip"]]
+                .iloc[0]
+                .tolist(),
+                "srf_size": srf_ffp.stat().st_size,
+                "generation_time": time.perf_counter() - start,
+                "runs": [],
+            }
+            results["ruptures"].append(rupture_results)
+            del rupture
+
+            for product_type in products:
+                for repeat in range(repeats):
+                    # Every run has a new process, so that no run
+                    # benefits from the caches or memory of another.
+                    with ProcessPoolExecutor(
+                        max_workers=1,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_initialise_worker,
+                        max_tasks_per_child=1,
+                    ) as executor:
+                        future = executor.submit(
+                            benchmark_product,
+                            srf_ffp,
+                            realisation_ffp,
+                            product_type,
+                            rupture_dir / f"repeat_{repeat}",
+                            trace_memory,
+                        )
+                        try:
+                            run = future.result()
+                        except BrokenProcessPool:
+                            # The worker died, usually by running out of memory.
+                            run = {
+                                "status": "crashed",
+                                "error": traceback.format_exc(),
+                                "wall_time": None,
+                                "stages": None,
+                                "memory": None,
+                                "spans": [],
+                            }
+                    rupture_results["runs"].append(
+                        {"product": product_type, "repeat": repeat} | run
+                    )
+                    print(
+                        f"{subfaults:>10} {product_type:<20}{run['status']:<8}"
+                        f"{run['wall_time'] or 0:>8.2f}s"
+                    )
+                    # Results are written after each run, so that an
+                    # interrupted benchmark keeps its finished runs.
+                    output_ffp.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    app()
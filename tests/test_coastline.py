@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from visualisation import coastline
+
+
+@pytest.fixture
+def coastline_ffp(tmp_path: Path) -> Path:
+    # A finely sampled circular island and a square one further east.
+    angles = np.linspace(0, 2 * np.pi, 2000, endpoint=False)
+    circle = shapely.Polygon(
+        np.column_stack([172 + np.cos(angles), -43 + np.sin(angles)])
+    )
+    square = shapely.box(176, -40, 177, -39)
+    output_ffp = tmp_path / "coastline.parquet"
+    coastline.build_coastline(
+        gpd.GeoDataFrame(geometry=[circle, square], crs="EPSG:4326"),
+        output_ffp,
+        tolerance=0.01,
+    )
+    return output_ffp
+
+
+def test_build_coastline_simplifies(coastline_ffp: Path):
+    polygons = coastline.read_coastline(coastline_ffp=coastline_ffp)
+    assert len(polygons) == 2
+    assert shapely.get_num_coordinates(polygons.geometry.iloc[0]) < 200
+    assert polygons.geometry.iloc[0].area == pytest.approx(np.pi, rel=1e-2)
+
+
+def test_read_coastline_clips_to_bounds(coastline_ffp: Path):
+    bounds = (171.5, -43.5, 172.0, -43.0)
+    polygons = coastline.read_coastline(bounds, coastline_ffp=coastline_ffp)
+    assert len(polygons) == 1
+    xmin, ymin, xmax, ymax = polygons.total_bounds
+    assert xmin >= bounds[0] and ymin >= bounds[1]
+    assert xmax <= bounds[2] and ymax <= bounds[3]
+    assert polygons.geometry.iloc[0].area == pytest.approx(0.25, rel=1e-3)
+
+
+def test_coastline_path(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv(coastline.COASTLINE_ENV_VAR, str(tmp_path / "nz.parquet"))
+    assert coastline.coastline_path() == tmp_path / "nz.parquet"
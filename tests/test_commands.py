@@ -0,0 +1,78 @@
+import importlib
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from visualisation import commands
+
+# Modules that take a noticeable time to import, and must only be
+# imported once a command starts doing work.
+HEAVY_MODULES = frozenset(
+    {
+        "geopandas",
+        "matplotlib",
+        "pandas",
+        "pooch",
+        "pygmt",
+        "pygmt_helper",
+        "scipy",
+        "shapely",
+        "source_modelling",
+        "workflow",
+        "xarray",
+    }
+)
+
+
+def test_usage_lists_every_command(capsys: pytest.CaptureFixture):
+    with pytest.raises(SystemExit) as exit_info:
+        commands.main(["--help"])
+    assert exit_info.value.code == 0
+    output = capsys.readouterr().out
+    for name in commands.COMMANDS:
+        assert name in output
+
+
+def test_unknown_command(capsys: pytest.CaptureFixture):
+    with pytest.raises(SystemExit) as exit_info:
+        commands.main(["plot-nothing"])
+    assert exit_info.value.code == 2
+    assert "no such command" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("name", commands.COMMANDS)
+def test_summary_matches_command(name: str):
+    command = commands.COMMANDS[name]
+    app = importlib.import_module(command.module).app
+    (registered,) = app.registered_commands
+    assert registered.callback.__doc__.strip().splitlines()[0] == command.summary
+
+
+@pytest.mark.parametrize("name", commands.COMMANDS)
+def test_help_does_not_import_heavy_modules(name: str):
+    # Each command runs in a fresh interpreter so that modules imported
+    # by other tests do not hide a heavy import.
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            textwrap.dedent(
+                f"""
+                import sys
+                from visualisation import commands
+                try:
+                    commands.main([{name!r}, "--help"])
+                except SystemExit:
+                    pass
+                print("imported:", *sorted({set(HEAVY_MODULES)!r} & set(sys.modules)))
+                """
+            ),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert f"visualisation {name}" in result.stdout
+    assert result.stdout.strip().splitlines()[-1] == "imported:"
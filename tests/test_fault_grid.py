@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from visualisation.fault_grid import FaultGrid
+from visualisation.fault_index import FaultPointIndex
+
+
+@pytest.fixture
+def header() -> pd.DataFrame:
+    # The second fault's planes have different numbers of subfaults down dip.
+    return pd.DataFrame(
+        {
+            "nstk": [4, 3, 2, 5],
+            "ndip": [2, 2, 3, 2],
+            "len": [4.0, 3.0, 2.0, 5.0],
+            "wid": [2.0, 2.0, 3.0, 2.0],
+        }
+    )
+
+
+@pytest.fixture
+def grid(header: pd.DataFrame) -> FaultGrid:
+    point_count = (header["nstk"] * header["ndip"]).sum()
+    points = pd.DataFrame(
+        {
+            "slip": np.arange(point_count, dtype=np.float32),
+            "tinit": np.arange(point_count) * 2,
+        }
+    )
+    fault_index = FaultPointIndex.from_plane_counts({"A": 2, "B": 2}, header)
+    return FaultGrid.from_srf(points, header, fault_index, ["slip", "tinit"])
+
+
+def test_fault_grid_matches_planes_side_by_side(grid: FaultGrid):
+    np.testing.assert_array_equal(
+        grid.fault("slip", 0),
+        np.hstack([np.arange(8).reshape(2, 4), np.arange(8, 14).reshape(2, 3)]),
+    )
+    second = grid.fault("slip", 1)
+    assert second.shape == (3, 7)
+    np.testing.assert_array_equal(second[:, :2], np.arange(14, 20).reshape(3, 2))
+    np.testing.assert_array_equal(second[:2, 2:], np.arange(20, 30).reshape(2, 5))
+    assert np.all(np.isnan(second[2, 2:]))
+
+
+def test_fault_grid_views_share_memory(grid: FaultGrid):
+    for field in ("slip", "tinit"):
+        for fault in range(grid.fault_count):
+            assert np.shares_memory(grid.fault(field, fault), grid.fields[field])
+        for plane in range(len(grid.plane_shapes)):
+            assert np.shares_memory(grid.plane(field, plane), grid.fields[field])
+    assert grid.fields["slip"].dtype == np.float32
+    assert grid.fields["tinit"].dtype == np.float64
+
+
+def test_fault_grid_planes(grid: FaultGrid):
+    np.testing.assert_array_equal(grid.plane("slip", 1), np.arange(8, 14).reshape(2, 3))
+    np.testing.assert_array_equal(
+        grid.plane("tinit", 3), 2 * np.arange(20, 30).reshape(2, 5)
+    )
+
+
+def test_fault_grid_values_and_geometry(grid: FaultGrid):
+    assert np.shares_memory(grid.fault_values("slip", 0), grid.fields["slip"])
+    np.testing.assert_array_equal(
+        np.sort(grid.fault_values("slip", 1)), np.arange(14, 30)
+    )
+    assert grid.maxima == {"slip": 29.0, "tinit": 58.0}
+    assert grid.fault_length(0) == 7.0
+    assert grid.fault_width(1) == 3.0
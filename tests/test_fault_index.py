@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from visualisation.fault_index import FaultPointIndex
+
+HEADER = pd.DataFrame({"nstk": [2, 3, 1], "ndip": [2, 2, 4]})
+
+
+@pytest.fixture
+def fault_index() -> FaultPointIndex:
+    return FaultPointIndex.from_plane_counts({"a": 2, "b": 1}, HEADER)
+
+
+def test_offsets(fault_index: FaultPointIndex):
+    assert fault_index.fault_names == ["a", "b"]
+    assert fault_index.plane_offsets.tolist() == [0, 2, 3]
+    assert fault_index.plane_point_offsets.tolist() == [0, 4, 10, 14]
+    assert fault_index.point_offsets.tolist() == [0, 10, 14]
+    assert fault_index.point_fault_ids.tolist() == [0] * 10 + [1] * 4
+
+
+def test_slices(fault_index: FaultPointIndex):
+    assert HEADER.iloc[fault_index.planes(1)].index.tolist() == [2]
+    assert np.arange(14)[fault_index.points(0)].tolist() == list(range(10))
+
+
+def test_fault_sum(fault_index: FaultPointIndex):
+    np.testing.assert_array_equal(fault_index.fault_sum(np.ones(14)), [10, 4])
+
+
+def test_plane_count_mismatch():
+    with pytest.raises(ValueError):
+        FaultPointIndex.from_plane_counts({"a": 2}, HEADER)
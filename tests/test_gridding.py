@@ -0,0 +1,136 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy as sp
+
+from visualisation import gridding
+
+
+@pytest.fixture
+def points() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    lon, lat = np.meshgrid(np.linspace(172.0, 172.5, 12), np.linspace(-43.2, -43.0, 7))
+    return pd.DataFrame(
+        {
+            "lon": lon.ravel() + rng.normal(scale=1e-3, size=lon.size),
+            "lat": lat.ravel() + rng.normal(scale=1e-3, size=lat.size),
+            "slip": rng.uniform(0, 100, size=lon.size),
+            "tinit": rng.uniform(0, 10, size=lon.size),
+        }
+    )
+
+
+@pytest.mark.parametrize("key", ["slip", "tinit"])
+def test_linear_geometry_matches_linear_interpolator(points: pd.DataFrame, key: str):
+    lon = np.linspace(171.95, 172.55, 40)
+    lat = np.linspace(-43.25, -42.95, 25)
+    coordinates = points[["lon", "lat"]].to_numpy()
+    grid = gridding.linear_geometry(coordinates, lon, lat).interpolate(
+        points[key].to_numpy()
+    )
+
+    interpolator = sp.interpolate.LinearNDInterpolator(coordinates, points[key])
+    expected = interpolator(*np.meshgrid(lon, lat))
+    assert grid.dims == ("lat", "lon")
+    np.testing.assert_array_equal(grid["lon"], lon)
+    np.testing.assert_array_equal(grid["lat"], lat)
+    np.testing.assert_array_equal(np.isnan(grid.values), np.isnan(expected))
+    np.testing.assert_allclose(grid.values, expected, equal_nan=True)
+
+
+def test_grid_nodes_in_degrees():
+    lon, lat = gridding.grid_nodes((172.0, 172.52, -43.2, -43.0), "0.1/3m")
+    np.testing.assert_allclose(lon, [172.0, 172.1, 172.2, 172.3, 172.4, 172.5])
+    np.testing.assert_allclose(lat, [-43.2, -43.15, -43.1, -43.05, -43.0])
+
+
+def test_grid_nodes_in_metres():
+    lon, lat = gridding.grid_nodes((172.0, 172.5, -43.2, -43.0), "500e")
+    # Longitude increments are taken at the middle latitude of the region.
+    metres_per_degree = gridding.METRES_PER_DEGREE
+    np.testing.assert_allclose(
+        np.diff(lon) * metres_per_degree * np.cos(np.radians(-43.1)), 500
+    )
+    np.testing.assert_allclose(np.diff(lat) * metres_per_degree, 500)
+    assert lon[0] == 172.0 and lat[0] == -43.2
+    assert abs(lon[-1] - 172.5) <= np.diff(lon)[0] / 2
+    assert abs(lat[-1] - -43.0) <= np.diff(lat)[0] / 2
+
+
+def test_grid_geometry_is_cached(points: pd.DataFrame, monkeypatch: pytest.MonkeyPatch):
+    calls = []
+
+    def grid_nodes(
+        region: gridding.Region, grid_spacing: str
+    ) -> tuple[np.ndarray, np.ndarray]:
+        calls.append((region, grid_spacing))
+        return np.linspace(region[0], region[1], 20), np.linspace(
+            region[2], region[3], 10
+        )
+
+    monkeypatch.setattr(gridding, "grid_nodes", grid_nodes)
+    monkeypatch.setattr(gridding, "_geometry_cache", OrderedDict())
+    region = gridding.segment_region(points)
+    grids = gridding.create_grids(points, ["slip", "tinit"], "5e/5e", region)
+    assert set(grids) == {"slip", "tinit"}
+    gridding.create_grids(points, ["slip"], "5e/5e", region)
+    assert len(calls) == 1
+    gridding.create_grids(points, ["slip"], "10e/10e", region)
+    assert len(calls) == 2
+
+
+@pytest.fixture
+def plane() -> pd.DataFrame:
+    nstk, ndip = 15, 6
+    strike_index, dip_index = np.meshgrid(np.arange(nstk), np.arange(ndip))
+    strike_index = strike_index.ravel()
+    dip_index = dip_index.ravel()
+    lon = 172.0 + 0.01 * strike_index + 0.003 * dip_index
+    lat = -43.0 + 0.004 * strike_index - 0.006 * dip_index
+    return pd.DataFrame(
+        {
+            "lon": lon,
+            "lat": lat,
+            "linear": 3 * lon - 2 * lat,
+            "slip": np.random.default_rng(1).uniform(0, 100, size=lon.size),
+        }
+    )
+
+
+def test_structured_geometry_matches_linear_geometry(plane: pd.DataFrame):
+    lon = np.linspace(171.99, 172.17, 50)
+    lat = np.linspace(-43.04, -42.94, 30)
+    coordinates = plane[["lon", "lat"]].to_numpy()
+    structured = gridding.structured_geometry(coordinates, (15, 6), lon, lat)
+    linear = gridding.linear_geometry(coordinates, lon, lat)
+
+    structured_grid = structured.interpolate(plane["linear"].to_numpy())
+    linear_grid = linear.interpolate(plane["linear"].to_numpy())
+    # Both interpolants are exact for a linear field over the same plane.
+    np.testing.assert_array_equal(
+        np.isnan(structured_grid.values), np.isnan(linear_grid.values)
+    )
+    np.testing.assert_allclose(
+        structured_grid.values, linear_grid.values, equal_nan=True
+    )
+
+
+def test_structured_geometry_at_subfaults(plane: pd.DataFrame):
+    coordinates = plane[["lon", "lat"]].to_numpy()
+    geometry = gridding.structured_geometry(
+        coordinates, (15, 6), np.array([172.023]), np.array([-42.998])
+    )
+    # The node lies on the subfault at strike index 2, dip index 1.
+    grid = geometry.interpolate(plane["slip"].to_numpy())
+    assert grid.values[0, 0] == pytest.approx(plane["slip"].iloc[15 + 2])
+
+
+def test_structured_geometry_degenerate_plane(plane: pd.DataFrame):
+    coordinates = plane[["lon", "lat"]].to_numpy()[:15]
+    # A single row of subfaults cannot be triangulated either.
+    with pytest.raises(sp.spatial.QhullError):
+        gridding.structured_geometry(
+            coordinates, (15, 1), np.array([172.0]), np.array([-43.0])
+        )
@@ -0,0 +1,89 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from visualisation import map_layers
+
+REGION = (172.0, 173.0, -44.0, -43.0)
+
+
+@pytest.mark.parametrize(
+    "region, resolution",
+    [
+        (REGION, "f"),
+        ((170.0, 174.0, -45.0, -42.0), "h"),
+        ((166.0, 179.0, -47.0, -34.0), "i"),
+        ((100.0, 180.0, -50.0, 0.0), "l"),
+        ((-180.0, 180.0, -90.0, 90.0), "c"),
+    ],
+)
+def test_coastline_resolution(region: map_layers.Region, resolution: str):
+    assert map_layers.coastline_resolution(region) == resolution
+
+
+def test_cache_directory(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv(map_layers.CACHE_ENV_VAR, str(tmp_path))
+    assert map_layers.cache_directory() == tmp_path
+    monkeypatch.setenv(map_layers.CACHE_ENV_VAR, "off")
+    assert map_layers.cache_directory() is None
+    assert map_layers.static_layers(REGION) is None
+
+
+def test_static_layers_written_once(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv(map_layers.CACHE_ENV_VAR, str(tmp_path))
+    writes = []
+
+    def write_layers(
+        region: map_layers.Region,
+        resolution: str,
+        max_level: int,
+        layers: map_layers.StaticLayers,
+    ) -> None:
+        writes.append((region, resolution, max_level))
+        layers.land_mask.touch()
+        layers.shorelines.touch()
+
+    monkeypatch.setattr(map_layers, "_write_layers", write_layers)
+    layers = map_layers.static_layers(REGION)
+    assert map_layers.static_layers(REGION) == layers
+    assert writes == [(REGION, "f", 4)]
+
+    assert map_layers.static_layers(REGION, max_level=2) != layers
+    assert map_layers.static_layers(REGION, resolution="i") != layers
+    assert len(writes) == 3
+
+
+def test_cache_region_contains_region():
+    region = (172.13, 172.91, -43.77, -43.41)
+    cached = map_layers.cache_region(region)
+    assert cached == (172.0, 173.0, -44.0, -43.25)
+    # Nearby realisations of the same rupture share the cached region.
+    assert map_layers.cache_region((172.05, 172.8, -43.8, -43.3)) == cached
+
+
+def test_static_layers_evicted(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv(map_layers.CACHE_ENV_VAR, str(tmp_path))
+    monkeypatch.setattr(map_layers, "CACHE_SIZE_LIMIT", 250)
+
+    def write_layers(
+        region: map_layers.Region,
+        resolution: str,
+        max_level: int,
+        layers: map_layers.StaticLayers,
+    ) -> None:
+        layers.land_mask.write_bytes(b"0" * 90)
+        layers.shorelines.write_bytes(b"0" * 10)
+
+    monkeypatch.setattr(map_layers, "_write_layers", write_layers)
+    first = map_layers.static_layers(REGION)
+    second = map_layers.static_layers(REGION, max_level=2)
+    os.utime(first.land_mask, (0, 0))
+    os.utime(second.land_mask, (1, 1))
+    # Using the first layers again makes the second the least recently used.
+    map_layers.static_layers(REGION)
+    third = map_layers.static_layers(REGION, max_level=3)
+
+    assert first.land_mask.exists() and third.land_mask.exists()
+    assert not second.land_mask.exists()
+    assert not second.shorelines.exists()
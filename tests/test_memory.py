@@ -0,0 +1,106 @@
+"""Memory ceilings of the plotting pipeline on synthetic ruptures.
+
+The ceilings are multiples of the size of the data a stage works on,
+with some headroom over the measured peaks, so that a change making a
+stage copy its input (e.g. slicing the slip matrix per fault) fails.
+"""
+
+import functools
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from source_modelling import srf
+from visualisation import profiling, srf_cache, synthetic
+from visualisation.fault_grid import FaultGrid
+from visualisation.fault_index import FaultPointIndex
+from visualisation.sources import plot_slip_rise_rake, plot_srf_suite
+from visualisation.sources.plot_srf_suite import Product
+
+SUBFAULT_COUNT = 50_000
+FAULT_PLANES = {"Fault 1": 2, "Fault 2": 2}
+
+
+def write_rupture(output_dir: Path, subfault_count: int) -> Path:
+    rupture = synthetic.synthetic_rupture(
+        fault_count=len(FAULT_PLANES),
+        plane_count=sum(FAULT_PLANES.values()),
+        subfault_count=subfault_count,
+        nt=20,
+    )
+    srf_ffp, _ = rupture.write(output_dir)
+    return srf_ffp
+
+
+@pytest.fixture(scope="module")
+def srf_ffp(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return write_rupture(tmp_path_factory.mktemp("rupture"), SUBFAULT_COUNT)
+
+
+def slip_size(srf_data: srf.SrfFile) -> int:
+    slip = srf_data.slipt1_array
+    return slip.data.nbytes + slip.indices.nbytes + slip.indptr.nbytes
+
+
+def profile_memory(function: Callable[[], None]) -> profiling.Profile:
+    # The first call pays for imports and caches, which are not part of
+    # the memory used by the stage.
+    function()
+    with profiling.profiling(trace_memory=True) as profile:
+        function()
+    return profile
+
+
+@pytest.mark.parametrize("product", [Product.moment_rate, Product.cumulative_moment])
+def test_moment_rate_memory(srf_ffp: Path, tmp_path: Path, product: Product):
+    srf_data = plot_srf_suite.read_srf_for_products(srf_ffp, [product])
+    profile = profile_memory(
+        lambda: plot_srf_suite.render_suite(
+            srf_data, "rupture", tmp_path, products=[product]
+        )
+    )
+    # The per-fault moment rates are computed without copying the slip
+    # matrix, so the whole render needs less than one more copy of it.
+    assert profile.stage_memory()["compute"]["traced_peak"] < slip_size(srf_data)
+    assert profile.traced_peak < slip_size(srf_data)
+
+
+def test_moment_rate_memory_scales_linearly(srf_ffp: Path, tmp_path: Path):
+    small_srf_ffp = write_rupture(tmp_path, SUBFAULT_COUNT // 2)
+    peaks = []
+    for ffp in (small_srf_ffp, srf_ffp):
+        srf_data = srf_cache.read_srf(
+            ffp, plot_srf_suite.PRODUCT_COLUMNS[Product.moment_rate]
+        )
+        profile = profile_memory(
+            functools.partial(
+                plot_srf_suite.render_suite,
+                srf_data,
+                "rupture",
+                tmp_path,
+                products=[Product.moment_rate],
+            )
+        )
+        peaks.append(profile.stage_memory()["compute"]["traced_peak"])
+    assert peaks[1] < 2.5 * peaks[0]
+
+
+def test_fault_grid_memory(srf_ffp: Path):
+    srf_data = srf_cache.read_srf(srf_ffp, plot_slip_rise_rake.SRF_COLUMNS, slip=False)
+    fault_index = FaultPointIndex.from_plane_counts(FAULT_PLANES, srf_data.header)
+
+    @profiling.span("grid")
+    def fault_grid() -> None:
+        FaultGrid.from_srf(
+            srf_data.points,
+            srf_data.header,
+            fault_index,
+            plot_slip_rise_rake.SRF_COLUMNS,
+        )
+
+    profile = profile_memory(fault_grid)
+    # The grids are built in place, so need no more than one copy of
+    # the slip, tinit, rise and rake columns.
+    fault_grid_size = 4 * srf_data.points["slip"].nbytes
+    assert profile.stage_memory()["grid"]["traced_peak"] < 1.05 * fault_grid_size
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy as sp
+
+from source_modelling import moment
+from visualisation import moment_rate
+from visualisation.fault_index import FaultPointIndex
+
+DT = 0.1
+HEADER = pd.DataFrame({"nstk": [2, 3, 1], "ndip": [2, 2, 4]})
+POINT_COUNT = 14
+
+
+@pytest.fixture
+def area() -> np.ndarray:
+    return np.random.default_rng(0).uniform(1e9, 1e10, POINT_COUNT)
+
+
+@pytest.fixture
+def slip() -> sp.sparse.csr_array:
+    return sp.sparse.csr_array(
+        sp.sparse.random(POINT_COUNT, 50, density=0.2, random_state=0)
+    )
+
+
+def test_moment_rates_match_per_fault_computation(
+    area: np.ndarray, slip: sp.sparse.csr_array
+):
+    fault_index = FaultPointIndex.from_plane_counts({"a": 2, "b": 1}, HEADER)
+    moment_rates = moment_rate.from_slip(area, slip, DT, fault_index)
+
+    expected_moment_rate = moment.moment_rate_over_time_from_slip(
+        area, slip, DT, slip.shape[1]
+    )
+    pd.testing.assert_frame_equal(
+        moment_rates.moment_rate_frame(), expected_moment_rate, check_exact=False
+    )
+    pd.testing.assert_frame_equal(
+        moment_rates.moment_frame(),
+        moment.moment_over_time_from_moment_rate(expected_moment_rate),
+        check_exact=False,
+    )
+    for fault in range(fault_index.fault_count):
+        points = fault_index.points(fault)
+        expected_fault_moment_rate = moment.moment_rate_over_time_from_slip(
+            area[points], slip[points], DT, slip.shape[1]
+        )
+        pd.testing.assert_frame_equal(
+            moment_rates.moment_rate_frame(fault),
+            expected_fault_moment_rate,
+            check_exact=False,
+        )
+        pd.testing.assert_frame_equal(
+            moment_rates.moment_frame(fault),
+            moment.moment_over_time_from_moment_rate(expected_fault_moment_rate),
+            check_exact=False,
+        )
+
+
+def test_release_window(area: np.ndarray, slip: sp.sparse.csr_array):
+    moment_rates = moment_rate.from_slip(area, slip, DT)
+    assert moment_rates.fault_names == []
+    window = moment_rates.release_window(0.05, 0.95)
+    released = moment_rates.moment[window] / moment_rates.total_moment
+    assert released.min() >= 0.05
+    assert released.max() <= 0.95
+    assert moment_rates.release_window(0, 1).all()
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from visualisation import synthetic
+from visualisation.sources import plot_rakes
+from visualisation.sources.plot_rakes import RakeSampling
+
+
+@pytest.fixture(scope="module")
+def rupture() -> synthetic.SyntheticRupture:
+    return synthetic.synthetic_rupture(
+        fault_count=2, plane_count=5, subfault_count=20_000, nt=4
+    )
+
+
+def plane_of(points: pd.DataFrame, header: pd.DataFrame) -> np.ndarray:
+    plane_sizes = (header["nstk"] * header["ndip"]).to_numpy()
+    return np.searchsorted(np.cumsum(plane_sizes), points.index, side="right")
+
+
+def test_plane_cells():
+    header = pd.DataFrame(
+        {"nstk": [40, 2], "ndip": [20, 3], "len": [20.0, 1.0], "wid": [10.0, 1.5]}
+    )
+    cells, cell_count = plot_rakes.plane_cells(header, 50)
+
+    assert len(cells) == 40 * 20 + 2 * 3
+    assert np.array_equal(np.unique(cells), np.arange(cell_count))
+    # The large plane is divided into 10 by 5 cells of 4 by 4 subfaults,
+    # and the small plane is too small for more than one cell.
+    assert cell_count == 51
+    assert np.all(np.bincount(cells)[:50] == 16)
+    assert np.all(cells[800:] == 50)
+    # Cells are contiguous blocks of subfaults.
+    plane_cells = cells[:800].reshape(20, 40)
+    assert np.all(plane_cells[:4, :4] == plane_cells[0, 0])
+
+
+@pytest.mark.parametrize("sampling", [RakeSampling.stratified, RakeSampling.mean])
+def test_stratified_samples_cover_every_plane(
+    rupture: synthetic.SyntheticRupture, sampling: RakeSampling
+):
+    points = rupture.srf_data.points
+    header = rupture.srf_data.header
+    vectors = plot_rakes.sample_rakes(points, header, 200, sampling, seed=1)
+
+    assert len(vectors) == pytest.approx(200, rel=0.2)
+    assert list(vectors.columns) == ["lon", "lat", "rake"]
+    if sampling == RakeSampling.stratified:
+        assert set(plane_of(vectors, header)) == set(range(len(header)))
+
+
+def test_stratified_sampling_is_seeded(rupture: synthetic.SyntheticRupture):
+    points = rupture.srf_data.points
+    header = rupture.srf_data.header
+    first = plot_rakes.sample_rakes(points, header, 100, seed=3)
+    second = plot_rakes.sample_rakes(points, header, 100, seed=3)
+    other = plot_rakes.sample_rakes(points, header, 100, seed=4)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert not first.index.equals(other.index)
+
+
+def test_random_sampling_matches_global_seed(rupture: synthetic.SyntheticRupture):
+    points = rupture.srf_data.points
+    np.random.seed(5)
+    expected = points[["lon", "lat", "rake"]].sample(50)
+
+    vectors = plot_rakes.sample_rakes(
+        points, rupture.srf_data.header, 50, RakeSampling.random, seed=5
+    )
+
+    pd.testing.assert_frame_equal(vectors, expected)
+
+
+def test_mean_rake_is_slip_weighted_and_circular():
+    header = pd.DataFrame({"nstk": [2], "ndip": [2], "len": [1.0], "wid": [1.0]})
+    points = pd.DataFrame(
+        {
+            "lon": [172.0, 172.1, 172.0, 172.1],
+            "lat": [-43.0, -43.0, -43.1, -43.1],
+            "rake": [179.0, -179.0, 170.0, 0.0],
+            "slip": [1.0, 1.0, 2.0, 0.0],
+        }
+    )
+
+    vectors = plot_rakes.sample_rakes(points, header, 1, RakeSampling.mean)
+
+    assert len(vectors) == 1
+    assert vectors["lon"].iloc[0] == pytest.approx(172.05)
+    assert vectors["lat"].iloc[0] == pytest.approx(-43.05)
+    assert np.cos(np.radians(vectors["rake"].iloc[0] - 175)) == pytest.approx(
+        1, abs=1e-4
+    )
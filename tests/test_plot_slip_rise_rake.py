@@ -0,0 +1,146 @@
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+import pytest
+import typer
+from matplotlib import pyplot as plt
+from PIL import Image
+
+from visualisation.sources import plot_slip_rise_rake
+from visualisation.sources.plot_slip_rise_rake import (
+    FaultPanel,
+    PanelBackend,
+    PanelLayout,
+    PlotType,
+)
+
+DPI = 60
+
+
+def fault_panels(plot_type: PlotType, fault_count: int) -> list[FaultPanel]:
+    panels = []
+    for fault in range(fault_count):
+        shape = (20 + 5 * fault, 30)
+        down_dip, along_strike = np.meshgrid(
+            np.linspace(-1, 1, shape[0]), np.linspace(-1, 1, shape[1]), indexing="ij"
+        )
+        distance = np.hypot(down_dip, along_strike - 0.2 * fault)
+        slip = 500 * np.exp(-(distance**2))
+        panels.append(
+            FaultPanel(
+                plot_type=plot_type,
+                fault=fault,
+                slip=slip,
+                tinit=5 * distance,
+                rise=3 * np.exp(-(distance**2)),
+                rake=90 + 30 * down_dip,
+                slip_values=slip.ravel(),
+                length=30.0,
+                width=2.0 * fault + 10.0,
+                slip_levels=np.linspace(0, 500, 20),
+                rise_levels=np.linspace(0, 3, 20),
+                time_levels=15,
+                rake_norm=0.1 / 500,
+                rake_stride=3,
+                raster=False,
+            )
+        )
+    return panels
+
+
+def render_panels(
+    panels: list[FaultPanel], layout: PanelLayout, output_ffp: Path, parallel: bool
+) -> np.ndarray:
+    with matplotlib.rc_context(layout.rc_params):
+        fig = plt.figure(figsize=layout.figsize)
+        gs = layout.gridspec(fig)
+        if parallel:
+            plot_slip_rise_rake.composite_fault_panels(
+                fig, gs, panels, layout, DPI, workers=2
+            )
+        else:
+            for panel in panels:
+                plot_slip_rise_rake.draw_fault_panel(
+                    fig.add_subplot(gs[layout.cell(panel.fault)]), panel
+                )
+            fig.tight_layout()
+        fig.savefig(output_ffp, dpi=DPI)
+        plt.close(fig)
+    with Image.open(output_ffp) as image:
+        return np.asarray(image.convert("RGB"), dtype=np.int16)
+
+
+# The small figure crowds the panels, so that their labels overlap.
+@pytest.mark.parametrize("figsize", [(12.0, 8.0), (6.0, 4.0)])
+@pytest.mark.parametrize("plot_type", list(PlotType))
+def test_parallel_panels_match_serial_panels(
+    tmp_path: Path, plot_type: PlotType, figsize: tuple[float, float]
+):
+    panels = fault_panels(plot_type, 5)
+    layout = PanelLayout(
+        figsize=figsize,
+        rows=2,
+        cols=3,
+        overview=False,
+        rc_params=plot_slip_rise_rake.PLOT_CONFIG,
+    )
+    serial = render_panels(panels, layout, tmp_path / "serial.png", parallel=False)
+    parallel = render_panels(panels, layout, tmp_path / "parallel.png", parallel=True)
+
+    assert serial.shape == parallel.shape
+    # Anti-aliased edges are blended onto the figure from a transparent
+    # background, so may differ by rounding.
+    assert np.abs(serial - parallel).max() <= 3
+
+
+@pytest.mark.parametrize("value, segment", [("1", 1), ("12", 12), ("all", "all")])
+def test_parse_segment(value: str, segment: int | str):
+    assert plot_slip_rise_rake.parse_segment(value) == segment
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "1.5", "All", ""])
+def test_parse_invalid_segment(value: str):
+    with pytest.raises(typer.BadParameter):
+        plot_slip_rise_rake.parse_segment(value)
+
+
+def test_segment_output_ffp():
+    assert plot_slip_rise_rake.segment_output_ffp(Path("plots/summary.png"), 3) == Path(
+        "plots/summary_segment_3.png"
+    )
+
+
+@pytest.mark.parametrize(
+    "backend, grid_size, raster",
+    [
+        (PanelBackend.auto, 1_000, False),
+        (PanelBackend.auto, 1_000_000, True),
+        (PanelBackend.contour, 1_000_000, False),
+        (PanelBackend.raster, 1_000, True),
+    ],
+)
+def test_use_raster(backend: PanelBackend, grid_size: int, raster: bool):
+    assert plot_slip_rise_rake.use_raster(backend, grid_size, 100_000) == raster
+
+
+def test_raster_colours_match_contours():
+    panel = fault_panels(PlotType.slip, 1)[0]
+    fig, (contour_ax, raster_ax) = plt.subplots(2)
+    contours = contour_ax.contourf(panel.slip, levels=panel.slip_levels, cmap="hot_r")
+    image = plot_slip_rise_rake.plot_raster(
+        raster_ax,
+        panel.slip,
+        panel.length,
+        panel.width,
+        panel.slip_levels,
+        "hot_r",
+    )
+    plt.close(fig)
+
+    # Each band between contour levels has the colour of the filled contour.
+    assert np.array_equal(
+        image.cmap(image.norm(contours.layers)),
+        contours.cmap(contours.norm(contours.layers)),
+    )
+    assert image.get_extent() == [0, panel.length, panel.width, 0]
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from visualisation.sources import plot_srf
+
+
+def reference_annotations(
+    points: pd.DataFrame, header: pd.DataFrame
+) -> list[tuple[float, float, int]]:
+    """Place annotations one second and one segment at a time."""
+    annotations = []
+    start = 0
+    for nstk, ndip in zip(header["nstk"], header["ndip"]):
+        segment_points = points.iloc[start : start + nstk * ndip]
+        start += nstk * ndip
+        tinit_max = int(np.round(segment_points["tinit"].max()))
+        tinit_min = int(np.round(segment_points["tinit"].min()))
+        for j in range(tinit_min, tinit_max):
+            min_delta = (segment_points["tinit"] - j).abs().min()
+            if min_delta < 0.1:
+                closest_point = segment_points[
+                    (segment_points["tinit"] - j).abs() == min_delta
+                ].iloc[0]
+                annotations.append((closest_point["lon"], closest_point["lat"], j))
+    return annotations
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("seed", range(5))
+def test_rupture_time_annotations(seed: int, dtype: type):
+    rng = np.random.default_rng(seed)
+    header = pd.DataFrame({"nstk": [20, 5, 30], "ndip": [10, 4, 8]})
+    point_count = (header["nstk"] * header["ndip"]).sum()
+    points = pd.DataFrame(
+        {
+            "lon": rng.uniform(172, 173, point_count),
+            "lat": rng.uniform(-44, -43, point_count),
+            # Round to create ties between points.
+            "tinit": np.round(rng.uniform(0, 30, point_count), 2).astype(dtype),
+        }
+    )
+    annotations = plot_srf.rupture_time_annotations(points, header)
+    assert list(annotations.itertuples(index=False, name=None)) == (
+        reference_annotations(points, header)
+    )
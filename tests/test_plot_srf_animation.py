@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from source_modelling import srf
+from visualisation import synthetic
+from visualisation.sources import plot_srf_animation
+
+FRAME_COUNT = 6
+
+
+@pytest.fixture(scope="module")
+def srf_data() -> srf.SrfFile:
+    return synthetic.synthetic_rupture(
+        fault_count=2, plane_count=3, subfault_count=2_000, nt=10
+    ).srf_data
+
+
+def test_cumulative_slip_matches_slip_time_function(srf_data: srf.SrfFile):
+    times = np.linspace(0, srf_data.nt * srf_data.dt, FRAME_COUNT)
+    slip_rate = srf_data.slip.toarray()
+    frames = list(plot_srf_animation.cumulative_slip(srf_data.slip, srf_data.dt, times))
+
+    for time, frame_slip in zip(times, frames):
+        windows = int(np.round(time / srf_data.dt))
+        np.testing.assert_allclose(
+            frame_slip, srf_data.dt * slip_rate[:, :windows].sum(axis=1), rtol=1e-5
+        )
+    np.testing.assert_allclose(frames[0], 0)
+    np.testing.assert_allclose(frames[-1], srf_data.points["slip"], rtol=1e-5)
+
+
+def test_map_geometry_draws_later_planes_on_top(srf_data: srf.SrfFile):
+    lon = np.linspace(srf_data.points["lon"].min(), srf_data.points["lon"].max(), 80)
+    lat = np.linspace(srf_data.points["lat"].max(), srf_data.points["lat"].min(), 60)
+    # Number the planes, so that each pixel shows the plane drawn there.
+    plane_sizes = srf_data.header["nstk"] * srf_data.header["ndip"]
+    planes = np.repeat(np.arange(len(plane_sizes)), plane_sizes).astype(np.float64)
+
+    geometry = plot_srf_animation.map_geometry(srf_data, lon, lat)
+    pixel_planes = geometry.interpolate(planes).values
+    assert len(np.unique(geometry.nodes)) == len(geometry.nodes)
+    np.testing.assert_allclose(pixel_planes[~np.isnan(pixel_planes)] % 1, 0)
+    assert set(np.unique(pixel_planes[~np.isnan(pixel_planes)])) == set(
+        range(len(plane_sizes))
+    )
+
+
+def read_frames(animation_ffp: Path) -> list[np.ndarray]:
+    frames = []
+    with Image.open(animation_ffp) as animation:
+        for frame in range(animation.n_frames):
+            animation.seek(frame)
+            frames.append(np.asarray(animation.convert("RGB")))
+    return frames
+
+
+def test_parallel_frames_match_serial_frames(srf_data: srf.SrfFile, tmp_path: Path):
+    for parallel in (False, True):
+        plot_srf_animation.render_slip_animation(
+            srf_data,
+            tmp_path / f"parallel_{parallel}.gif",
+            frame_count=FRAME_COUNT,
+            width=8,
+            dpi=60,
+            coastline=False,
+            parallel=parallel,
+            workers=2,
+        )
+    serial = read_frames(tmp_path / "parallel_False.gif")
+    parallel = read_frames(tmp_path / "parallel_True.gif")
+
+    assert len(serial) == FRAME_COUNT
+    for serial_frame, parallel_frame in zip(serial, parallel):
+        np.testing.assert_array_equal(serial_frame, parallel_frame)
+    # Slip accumulates, so the frames change.
+    assert not np.array_equal(serial[0], serial[-1])
+
+
+def test_encode_gif_uses_palette_frame(tmp_path: Path):
+    rng = np.random.default_rng(1)
+    colours = rng.integers(0, 256, size=(16, 3), dtype=np.uint8)
+    frames = [colours[rng.integers(0, 16, size=(20, 30))] for _ in range(FRAME_COUNT)]
+    palette_frame = np.tile(colours, (2, 1, 1))
+
+    plot_srf_animation.encode_gif(
+        iter(frames), tmp_path / "frames.gif", 10, palette_frame=palette_frame
+    )
+
+    encoded = read_frames(tmp_path / "frames.gif")
+    assert len(encoded) == FRAME_COUNT
+    for frame, encoded_frame in zip(frames, encoded):
+        np.testing.assert_array_equal(encoded_frame, frame)
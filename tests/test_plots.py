@@ -1,8 +1,14 @@
+import json
+import os
+import shutil
 from collections.abc import Callable
 from pathlib import Path
+from typing import Optional
 
 import diffimg
 import pytest
+import typer
+from PIL import Image
 
 from visualisation.sources import (
     plot_mw_contributions,
@@ -10,9 +16,11 @@ from visualisation.sources import (
     plot_rise,
     plot_slip_rise_rake,
     plot_srf,
+    plot_srf_batch,
     plot_srf_cumulative_moment,
     plot_srf_distribution,
     plot_srf_moment,
+    plot_srf_suite,
 )
 
 PLOT_IMAGE_DIRECTORY = Path("wiki/images")
@@ -42,9 +50,14 @@ def test_plot_functions(
     output_image_path = tmp_path / "output.png"
 
     # plot-rakes expects a seed parameter that controls the distribution of rake vectors.
-    # We set this seed to 1 to match the seed in the output image.
+    # We set this seed to 1, and sample from the whole rupture, to match the output image.
     if plot_function == plot_rakes.plot_rakes:
-        plot_function(SRF_FFP, output_image_path, seed=1)
+        plot_function(
+            SRF_FFP,
+            output_image_path,
+            seed=1,
+            sampling=plot_rakes.RakeSampling.random,
+        )
     else:
         plot_function(SRF_FFP, output_image_path)
 
@@ -55,6 +68,47 @@ def test_plot_functions(
     assert diff <= 0.05
 
 
+@pytest.mark.parametrize(
+    "plot_function, expected_image_name",
+    [
+        (plot_srf.plot_srf, "srf_plot_example.png"),
+        (plot_rise.plot_rise, "rise_example.png"),
+        (plot_rakes.plot_rakes, "rakes_example.png"),
+    ],
+)
+def test_plot_functions_draft(
+    tmp_path: Path, plot_function: Callable, expected_image_name: str
+):
+    """Check that draft plots render at a lower resolution than full plots."""
+    output_image_path = tmp_path / "output.png"
+    plot_function(SRF_FFP, output_image_path, draft=True)
+
+    with (
+        Image.open(PLOT_IMAGE_DIRECTORY / expected_image_name) as original,
+        Image.open(output_image_path) as generated,
+    ):
+        assert 2 * generated.width < original.width
+
+
+def test_plot_slip_rise_rake_draft(tmp_path: Path):
+    """Check that draft slip-rise-rake plots render without the overview map."""
+    output_image_path = tmp_path / "output.png"
+    plot_slip_rise_rake.plot_slip_rise_rake(
+        REALISATION_FFP,
+        MULTI_SUMMARY_SRF_FFP,
+        output_image_path,
+        width=30,
+        height=15,
+        draft=True,
+    )
+
+    with (
+        Image.open(PLOT_IMAGE_DIRECTORY / "summary_slip.png") as original,
+        Image.open(output_image_path) as generated,
+    ):
+        assert 2 * generated.width < original.width
+
+
 def test_plot_mw_contributions(tmp_path: Path):
 
     original = PLOT_IMAGE_DIRECTORY / "example_mw_contributions.png"
@@ -85,6 +139,24 @@ def test_plot_slip_rise_rake(tmp_path: Path, plot_type: plot_slip_rise_rake.Plot
     assert diff <= 0.05
 
 
+def test_plot_slip_rise_rake_parallel(tmp_path: Path):
+    """Check that slip-rise-rake panels rendered in parallel look the same."""
+    output_image_path = tmp_path / "output.png"
+    original = PLOT_IMAGE_DIRECTORY / "summary_slip.png"
+    plot_slip_rise_rake.plot_slip_rise_rake(
+        REALISATION_FFP,
+        MULTI_SUMMARY_SRF_FFP,
+        output_image_path,
+        width=30,
+        height=15,
+        parallel=True,
+        workers=2,
+    )
+
+    diff = diffimg.diff(original, output_image_path)
+    assert diff <= 0.05
+
+
 def test_plot_slip_rise_rake_segment(tmp_path: Path):
     """Check that the slip-rise-rake plots work."""
     output_image_path = tmp_path / "output.png"
@@ -100,3 +172,179 @@ def test_plot_slip_rise_rake_segment(tmp_path: Path):
 
     diff = diffimg.diff(original, output_image_path)
     assert diff <= 0.05
+
+
+@pytest.mark.parametrize(
+    "plot_type", [plot_slip_rise_rake.PlotType.slip, plot_slip_rise_rake.PlotType.rise]
+)
+def test_plot_slip_rise_rake_raster(
+    tmp_path: Path, plot_type: plot_slip_rise_rake.PlotType
+):
+    """Check that raster slip and rise panels look like filled contours."""
+    output_image_path = tmp_path / "output.png"
+    original = PLOT_IMAGE_DIRECTORY / f"summary_{plot_type}.png"
+    plot_slip_rise_rake.plot_slip_rise_rake(
+        REALISATION_FFP,
+        MULTI_SUMMARY_SRF_FFP,
+        output_image_path,
+        plot_type=plot_type,
+        width=30,
+        height=15,
+        backend=plot_slip_rise_rake.PanelBackend.raster,
+    )
+
+    diff = diffimg.diff(original, output_image_path)
+    assert diff <= 0.05
+
+
+def test_plot_slip_rise_rake_all_segments(tmp_path: Path):
+    """Check that every segment summary is written in one run."""
+    output_image_path = tmp_path / "output.png"
+    plot_slip_rise_rake.plot_slip_rise_rake(
+        REALISATION_FFP,
+        MULTI_SUMMARY_SRF_FFP,
+        output_image_path,
+        segment="all",
+        width=15,
+        height=30,
+    )
+
+    segment_images = sorted(tmp_path.glob("output_segment_*.png"))
+    assert len(segment_images) > 1
+    diff = diffimg.diff(
+        PLOT_IMAGE_DIRECTORY / "summary_segment_1.png",
+        tmp_path / "output_segment_1.png",
+    )
+    assert diff <= 0.05
+
+
+def test_plot_srf_suite(tmp_path: Path):
+    """Check that the suite renders every product from one SRF load."""
+    plot_srf_suite.plot_srf_suite(
+        MULTI_SUMMARY_SRF_FFP, tmp_path, realisation_ffp=REALISATION_FFP
+    )
+    for product in plot_srf_suite.Product:
+        assert plot_srf_suite.product_output_path(
+            tmp_path, MULTI_SUMMARY_SRF_FFP.stem, product
+        ).exists()
+
+
+def test_plot_srf_suite_without_realisation(tmp_path: Path):
+    """Check that products requiring a realisation are skipped without one."""
+    plot_srf_suite.plot_srf_suite(
+        SRF_FFP, tmp_path, product=list(plot_srf_suite.REALISATION_PRODUCTS)
+    )
+    assert not any(tmp_path.iterdir())
+
+
+def test_plot_srf_batch(tmp_path: Path):
+    """Check that a batch renders good realisations and reports bad ones."""
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    shutil.copy(MULTI_SUMMARY_SRF_FFP, input_dir / "nevis.srf")
+    shutil.copy(REALISATION_FFP, input_dir / "nevis.json")
+    (input_dir / "broken.srf").write_text("not an SRF")
+    output_dir = tmp_path / "output"
+
+    with pytest.raises(typer.Exit):
+        plot_srf_batch.plot_srf_batch(
+            [str(input_dir)],
+            output_dir=output_dir,
+            product=[
+                plot_srf_suite.Product.rakes,
+                plot_srf_suite.Product.mw_contributions,
+            ],
+            workers=2,
+        )
+
+    manifest = json.loads((output_dir / plot_srf_batch.MANIFEST_FILENAME).read_text())
+    assert manifest["preset"] == "full"
+    assert manifest["succeeded"] == 1
+    assert manifest["failed"] == 1
+    broken, nevis = manifest["realisations"]
+    assert broken["status"] == "failed"
+    assert broken["error"]
+    assert nevis["status"] == "ok"
+    assert set(nevis["outputs"]) == {"rakes", "mw_contributions"}
+    assert all(Path(output).exists() for output in nevis["outputs"].values())
+
+
+def test_plot_srf_batch_output_directories(tmp_path: Path):
+    """Check that SRFs sharing a name are plotted into separate directories."""
+    srf_ffps = [
+        tmp_path / "a" / "rupture.srf",
+        tmp_path / "b" / "c" / "rupture.srf",
+        tmp_path / "a" / "other.srf",
+    ]
+    assert plot_srf_batch.output_directories(srf_ffps) == [
+        Path("a/rupture"),
+        Path("b/c/rupture"),
+        Path("other"),
+    ]
+
+
+def _crash_worker(started: object) -> None:
+    os._exit(1)
+
+
+def _crash_on_bad_srf(
+    srf_ffp: Path, realisation_ffp: Optional[Path], output_dir: Path, *args: object
+) -> dict:
+    if srf_ffp.stem == "bad":
+        os._exit(1)
+    return plot_srf_batch.manifest_entry(srf_ffp, realisation_ffp, output_dir)
+
+
+def test_plot_srf_batch_worker_crash(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Check that a batch whose workers crash still writes its manifest."""
+    (tmp_path / "rupture.srf").write_text("not an SRF")
+    monkeypatch.setattr(plot_srf_batch, "_initialise_worker", _crash_worker)
+    output_dir = tmp_path / "output"
+
+    with pytest.raises(typer.Exit):
+        plot_srf_batch.plot_srf_batch([str(tmp_path)], output_dir=output_dir)
+
+    manifest = json.loads((output_dir / plot_srf_batch.MANIFEST_FILENAME).read_text())
+    assert manifest["failed"] == 1
+    assert "BrokenProcessPool" in manifest["realisations"][0]["error"]
+
+
+def test_plot_srf_batch_worker_crash_is_isolated(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Check that a worker crash only fails the realisation that caused it."""
+    names = ["a", "b", "bad", "c", "d", "e"]
+    for name in names:
+        (tmp_path / f"{name}.srf").write_text("not an SRF")
+    monkeypatch.setattr(plot_srf_batch, "render_realisation", _crash_on_bad_srf)
+    output_dir = tmp_path / "output"
+
+    with pytest.raises(typer.Exit):
+        plot_srf_batch.plot_srf_batch([str(tmp_path)], output_dir=output_dir, workers=2)
+
+    manifest = json.loads((output_dir / plot_srf_batch.MANIFEST_FILENAME).read_text())
+    assert manifest["succeeded"] == len(names) - 1
+    assert manifest["failed"] == 1
+    statuses = {
+        Path(entry["srf"]).stem: entry["status"] for entry in manifest["realisations"]
+    }
+    assert statuses == {name: "failed" if name == "bad" else "ok" for name in names}
+    bad = manifest["realisations"][names.index("bad")]
+    assert "BrokenProcessPool" in bad["error"]
+
+
+def test_render_realisation_profiling_error(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Check that a failure to start profiling is recorded in the entry."""
+
+    def broken_profiling(**kwargs: object) -> None:
+        raise ImportError("pygmt is broken")
+
+    monkeypatch.setattr(plot_srf_batch.profiling, "profiling", broken_profiling)
+    entry = plot_srf_batch.render_realisation(
+        tmp_path / "rupture.srf", None, tmp_path, [plot_srf_suite.Product.rakes]
+    )
+    assert entry["status"] == "failed"
+    assert "pygmt is broken" in entry["error"]
+    assert entry["profile"] is None
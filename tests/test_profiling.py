@@ -0,0 +1,172 @@
+import itertools
+import json
+import pstats
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+from typer.testing import CliRunner
+
+from visualisation import profiling, synthetic
+from visualisation.sources import plot_srf_distribution
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch):
+    # Every reading of the clock advances it by one second.
+    ticks = itertools.count()
+    monkeypatch.setattr(profiling.time, "perf_counter", lambda: float(next(ticks)))
+
+
+@profiling.span("grid")
+def grid() -> None:
+    pass
+
+
+def test_span_is_inert_outside_profiling():
+    with profiling.span("load"):
+        pass
+    grid()
+    with profiling.profiling() as profile:
+        pass
+    with profiling.span("load"):
+        pass
+    assert not profile.inclusive_times
+
+
+@pytest.mark.usefixtures("clock")
+def test_nested_spans_are_exclusive():
+    with profiling.profiling() as profile:
+        with profiling.span("render"):
+            with profiling.span("load"):
+                pass
+            grid()
+            grid()
+            with profiling.span("save"):
+                pass
+        with profiling.span("compute"):
+            pass
+
+    assert profile.counts == {
+        ("render",): 1,
+        ("render", "load"): 1,
+        ("render", "grid"): 2,
+        ("render", "save"): 1,
+        ("compute",): 1,
+    }
+    assert profile.inclusive_times[("render",)] == 9
+    assert profile.stage_times() == {
+        "load": 1,
+        "compute": 1,
+        "grid": 2,
+        "render": 5,
+        "save": 1,
+        profiling.UNTRACKED_STAGE: 3,
+    }
+    assert sum(profile.stage_times().values()) == profile.wall_time
+
+
+def test_span_records_failures():
+    with (
+        profiling.profiling() as profile,
+        pytest.raises(ValueError),
+        profiling.span("load"),
+    ):
+        raise ValueError
+    assert profile.counts == {("load",): 1}
+    assert profile._stack == []
+
+
+class FakeSession:
+    def call_module(self, module: str, args: str) -> str:
+        return f"{module} {args}"
+
+
+@pytest.fixture
+def fake_gmt(monkeypatch: pytest.MonkeyPatch) -> types.ModuleType:
+    clib = types.ModuleType("pygmt.clib")
+    clib.Session = FakeSession
+    monkeypatch.setitem(sys.modules, "pygmt.clib", clib)
+    return clib
+
+
+def test_gmt_module_calls_are_counted(fake_gmt: types.ModuleType):
+    call_module = FakeSession.call_module
+    with profiling.profiling(gmt_modules=True) as profile:
+        session = FakeSession()
+        assert session.call_module("coast", "-R0/1/0/1") == "coast -R0/1/0/1"
+        session.call_module("grdimage", "")
+        session.call_module("coast", "")
+    assert profile.gmt_modules == {"coast": 2, "grdimage": 1}
+    assert FakeSession.call_module is call_module
+
+
+def test_traced_memory_of_nested_spans():
+    with profiling.profiling(trace_memory=True) as profile:
+        with profiling.span("compute"):
+            parent = np.ones(1_000_000)
+            with profiling.span("grid"):
+                child = np.ones(500_000)
+                del child
+        del parent
+
+    memory = profile.to_dict()["memory"]
+    compute_peak = memory["stages"]["compute"]["traced_peak"]
+    grid_peak = memory["stages"]["grid"]["traced_peak"]
+    # The parent's peak includes the memory its children allocated.
+    assert grid_peak >= 500_000 * 8
+    assert compute_peak >= 1_500_000 * 8
+    assert memory["traced_peak"] >= compute_peak
+    assert memory["rss_high_water"] > 0
+
+
+def test_memory_is_not_traced_by_default():
+    with profiling.profiling() as profile, profiling.span("compute"):
+        np.ones(1000)
+
+    assert profile.to_dict()["memory"]["traced_peak"] is None
+    assert profile.stage_memory()["compute"]["traced_peak"] is None
+
+
+def test_profile_command_writes_report(tmp_path: Path, fake_gmt: types.ModuleType):
+    report_ffp = tmp_path / "profile.json"
+    cprofile_ffp = tmp_path / "profile.prof"
+    with (
+        pytest.raises(ValueError),
+        profiling.profile_command(report_ffp, cprofile_ffp),
+    ):
+        with profiling.span("load:srf"):
+            FakeSession().call_module("coast", "")
+        raise ValueError
+
+    report = json.loads(report_ffp.read_text())
+    assert report["gmt_modules"] == {"coast": 1}
+    assert report["stages"]["load"] > 0
+    assert [span["path"] for span in report["spans"]] == ["load:srf"]
+    assert report["cprofile"] == str(cprofile_ffp)
+    pstats.Stats(str(cprofile_ffp))
+
+
+def test_profile_command_is_inert_without_outputs():
+    with profiling.profile_command(None, None):
+        assert profiling._active_profile is None
+
+
+def test_plot_command_profile_option(tmp_path: Path):
+    srf_ffp = tmp_path / "rupture.srf"
+    synthetic.synthetic_rupture(subfault_count=100, nt=4).write(tmp_path, "rupture")
+    report_ffp = tmp_path / "profile.json"
+
+    result = CliRunner().invoke(
+        plot_srf_distribution.app,
+        [str(srf_ffp), str(tmp_path / "slip.png"), "--profile", str(report_ffp)],
+    )
+
+    assert result.exit_code == 0, result.output
+    report = json.loads(report_ffp.read_text())
+    stages = report["stages"]
+    assert set(profiling.STAGES) <= set(stages)
+    assert stages["load"] > 0 and stages["render"] > 0 and stages["save"] > 0
+    assert sum(stages.values()) == pytest.approx(report["wall_time"])
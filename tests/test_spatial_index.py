@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qcore import coordinates
+from visualisation.spatial_index import SubfaultIndex
+
+
+@pytest.fixture
+def points() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "lat": rng.uniform(-44, -43, 500),
+            "lon": rng.uniform(172, 173, 500),
+            "dep": rng.uniform(0, 20, 500),
+        }
+    )
+
+
+@pytest.fixture
+def queries() -> np.ndarray:
+    rng = np.random.default_rng(1)
+    return np.column_stack(
+        [
+            rng.uniform(-44, -43, 10),
+            rng.uniform(172, 173, 10),
+            rng.uniform(0, 20000, 10),
+        ]
+    )
+
+
+def brute_force_distances(points: pd.DataFrame, query: np.ndarray) -> np.ndarray:
+    return coordinates.distance_between_wgs_depth_coordinates(
+        points[["lat", "lon", "dep"]].to_numpy() * np.array([1, 1, 1000]), query
+    )
+
+
+def test_nearest(points: pd.DataFrame, queries: np.ndarray):
+    distances, indices = SubfaultIndex(points).nearest(queries)
+    for query, distance, index in zip(queries, distances, indices):
+        expected_distances = brute_force_distances(points, query)
+        assert index == expected_distances.argmin()
+        assert distance == pytest.approx(expected_distances.min())
+
+
+def test_within(points: pd.DataFrame, queries: np.ndarray):
+    radius = 10000
+    neighbours = SubfaultIndex(points).within(queries, radius)
+    for query, indices in zip(queries, neighbours):
+        expected_indices = np.flatnonzero(
+            brute_force_distances(points, query) <= radius
+        )
+        np.testing.assert_array_equal(indices, expected_indices)
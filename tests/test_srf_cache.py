@@ -0,0 +1,137 @@
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from visualisation import srf_cache
+
+SRF_TEXT = """1.0
+PLANE 1
+172.000000 -43.000000 2 2 2.0000 2.0000
+45.0000 60.0000 0.0000 0.0000 1.0000
+POINTS 4
+172.0 -43.0 0.5 45.0 60.0 1.0e10 0.0 0.1
+90.0 100.0 3 0.0 0 0.0 0
+1.0 2.0 3.0
+172.01 -43.0 0.5 45.0 60.0 1.0e10 0.1 0.1
+90.0 50.0 2 0.0 0 0.0 0
+4.0 5.0
+172.0 -43.01 1.5 45.0 60.0 1.0e10 0.2 0.1
+90.0 25.0 1 0.0 0 0.0 0
+6.0
+172.01 -43.01 1.5 45.0 60.0 1.0e10 0.3 0.1
+90.0 0.0 0 0.0 0 0.0 0
+"""
+
+
+@pytest.fixture
+def srf_ffp(tmp_path: Path) -> Path:
+    srf_ffp = tmp_path / "rupture.srf"
+    srf_ffp.write_text(SRF_TEXT)
+    return srf_ffp
+
+
+def test_cache_disabled_by_default(srf_ffp: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv(srf_cache.CACHE_ENV_VAR, raising=False)
+    srf_cache.read_srf(srf_ffp)
+    assert srf_cache.cache_directory(srf_ffp) is None
+    assert list(srf_ffp.parent.iterdir()) == [srf_ffp]
+
+
+def test_sidecar_round_trip(srf_ffp: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(srf_cache.CACHE_ENV_VAR, "sidecar")
+    cold = srf_cache.read_srf(srf_ffp)
+    cache_dir = srf_cache.cache_directory(srf_ffp)
+    assert (cache_dir / srf_cache.METADATA_FILENAME).exists()
+
+    warm = srf_cache.read_srf(srf_ffp)
+    slip = warm.points["slip"].to_numpy()
+    while not isinstance(slip, np.memmap) and slip.base is not None:
+        slip = slip.base
+    assert isinstance(slip, np.memmap)
+    assert warm.version == cold.version
+    assert warm.header.equals(cold.header)
+    assert warm.points.equals(cold.points)
+    assert (warm.slip != cold.slip).nnz == 0
+    assert warm.slip.shape == cold.slip.shape
+
+
+def test_cache_directory(
+    srf_ffp: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    cache_root = tmp_path / "cache"
+    monkeypatch.setenv(srf_cache.CACHE_ENV_VAR, str(cache_root))
+    srf_cache.read_srf(srf_ffp)
+    assert srf_cache.cache_directory(srf_ffp).parent == cache_root
+    assert len(list(cache_root.iterdir())) == 1
+
+
+def test_touched_file_reuses_cache(srf_ffp: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(srf_cache.CACHE_ENV_VAR, "sidecar")
+    srf_cache.read_srf(srf_ffp)
+    stat = srf_ffp.stat()
+    os.utime(srf_ffp, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    cache_dir = srf_cache.cache_directory(srf_ffp)
+    (generation_dir,) = cache_dir.glob(f"{srf_cache.GENERATION_PREFIX}*")
+    points_ffp = generation_dir / "points_slip.npy"
+    points_mtime = points_ffp.stat().st_mtime_ns
+    srf_cache.read_srf(srf_ffp)
+    assert points_ffp.stat().st_mtime_ns == points_mtime
+
+
+def test_modified_file_rebuilds_cache(srf_ffp: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(srf_cache.CACHE_ENV_VAR, "sidecar")
+    srf_cache.read_srf(srf_ffp)
+    srf_ffp.write_text(SRF_TEXT.replace("90.0 100.0", "90.0 200.0"))
+    srf_data = srf_cache.read_srf(srf_ffp)
+    assert srf_data.points["slip"].iloc[0] == pytest.approx(200.0)
+
+
+def test_rebuild_keeps_mapped_entry(srf_ffp: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(srf_cache.CACHE_ENV_VAR, "sidecar")
+    srf_cache.read_srf(srf_ffp)
+    old = srf_cache.read_srf(srf_ffp)
+    cache_dir = srf_cache.cache_directory(srf_ffp)
+    (old_generation_dir,) = cache_dir.glob(f"{srf_cache.GENERATION_PREFIX}*")
+
+    srf_ffp.write_text(SRF_TEXT.replace("90.0 100.0", "90.0 200.0"))
+    new = srf_cache.read_srf(srf_ffp)
+    assert new.points["slip"].iloc[0] == pytest.approx(200.0)
+    # The superseded generation is removed, but its mapped arrays remain readable.
+    assert not old_generation_dir.exists()
+    assert old.points["slip"].iloc[0] == pytest.approx(100.0)
+
+
+def test_superseded_generation_is_reparsed(
+    srf_ffp: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv(srf_cache.CACHE_ENV_VAR, "sidecar")
+    srf_cache.read_srf(srf_ffp)
+    cache_dir = srf_cache.cache_directory(srf_ffp)
+    for generation_dir in cache_dir.glob(f"{srf_cache.GENERATION_PREFIX}*"):
+        shutil.rmtree(generation_dir)
+    srf_data = srf_cache.read_srf(srf_ffp)
+    assert srf_data.points["slip"].iloc[0] == pytest.approx(100.0)
+
+
+@pytest.mark.parametrize("cache_setting", ["", "sidecar"])
+def test_column_projection(
+    srf_ffp: Path, monkeypatch: pytest.MonkeyPatch, cache_setting: str
+):
+    monkeypatch.setenv(srf_cache.CACHE_ENV_VAR, cache_setting)
+    # Read twice so that the second read comes from the cache (if enabled).
+    for _ in range(2):
+        srf_data = srf_cache.read_srf(srf_ffp, {"slip", "lon"}, slip=False)
+        assert list(srf_data.points.columns) == ["lon", "slip"]
+        assert srf_data.slipt1_array is None
+        assert len(srf_data.segments[0]) == 4
+
+
+def test_missing_column(srf_ffp: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(srf_cache.CACHE_ENV_VAR, "sidecar")
+    srf_cache.read_srf(srf_ffp)
+    with pytest.raises(KeyError):
+        srf_cache.read_srf(srf_ffp, {"vs"})
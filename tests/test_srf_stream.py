@@ -0,0 +1,121 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from source_modelling import moment, srf
+from visualisation import srf_stream
+from visualisation.fault_index import FaultPointIndex
+
+SRF_TEXT = """2.0
+PLANE 2
+172.000000 -43.000000 2 1 2.0000 2.0000
+45.0000 60.0000 0.0000 0.0000 1.0000
+172.000000 -43.000000 1 1 2.0000 2.0000
+45.0000 60.0000 0.0000 0.0000 1.0000
+POINTS 3
+172.0 -43.0 0.5 45.0 60.0 1.0e10 0.15 0.1 3000 2.7
+90.0 100.0 3 0.0 0 0.0 0
+1.0 2.0 3.0
+172.01 -43.0 0.5 45.0 60.0 1.0e10 0.1 0.1 3000 2.7
+90.0 50.0 2 0.0 0 0.0 0
+4.0 5.0
+172.0 -43.01 1.5 45.0 60.0 1.0e10 0.29999 0.1 3000 2.7
+90.0 25.0 1 0.0 0 0.0 0
+6.0"""
+
+
+@pytest.fixture
+def srf_ffp(tmp_path: Path) -> Path:
+    srf_ffp = tmp_path / "rupture.srf"
+    srf_ffp.write_text(SRF_TEXT)
+    return srf_ffp
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, srf_stream.DEFAULT_BLOCK_SIZE])
+def test_summary_matches_parsed_srf(srf_ffp: Path, block_size: int):
+    srf_data = srf.read_srf(srf_ffp)
+    summary = srf_stream.summarise_srf(
+        srf_ffp, ["slip", "rise", "tinit"], block_size=block_size
+    )
+
+    expected_moment_rate = moment.moment_rate_over_time_from_slip(
+        srf_data.points["area"], srf_data.slip, srf_data.dt, srf_data.nt
+    )
+    moment_rates = summary.moment_rates()
+    assert summary.nt == srf_data.nt
+    assert summary.header.equals(srf_data.header)
+    np.testing.assert_allclose(moment_rates.t, expected_moment_rate.index)
+    np.testing.assert_allclose(
+        moment_rates.moment_rate, expected_moment_rate["moment_rate"], rtol=1e-6
+    )
+    assert summary.total_moment == pytest.approx(
+        moment.MU * (srf_data.points["area"] * srf_data.points["slip"]).sum() / 1e6
+    )
+
+    for column, statistics in summary.statistics.items():
+        values = srf_data.points[column]
+        assert statistics.min == pytest.approx(values.min())
+        assert statistics.max == pytest.approx(values.max())
+        assert statistics.mean == pytest.approx(values.mean())
+        assert statistics.std == pytest.approx(np.std(values), rel=1e-5)
+
+
+def test_fault_moment_rates(srf_ffp: Path):
+    summary = srf_stream.summarise_srf(srf_ffp)
+    fault_index = FaultPointIndex.from_plane_counts({"a": 1, "b": 1}, summary.header)
+    moment_rates = summary.moment_rates(fault_index)
+    np.testing.assert_allclose(
+        moment_rates.fault_moment_rate.sum(axis=0), moment_rates.moment_rate
+    )
+    # The only point on the second plane starts slipping in the third window.
+    assert moment_rates.fault_moment_rate[1].nonzero()[0].tolist() == [2]
+
+
+def test_truncated_srf(srf_ffp: Path):
+    srf_ffp.write_text(SRF_TEXT.removesuffix("6.0"))
+    with pytest.raises(ValueError):
+        srf_stream.summarise_srf(srf_ffp)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, srf_stream.POINTS_BLOCK_SIZE])
+def test_points_match_parsed_srf(srf_ffp: Path, block_size: int):
+    srf_data = srf.read_srf(srf_ffp)
+    points = srf_stream.read_points(srf_ffp, block_size=block_size)
+    assert points.slipt1_array is None
+    assert points.header.equals(srf_data.header)
+    pd.testing.assert_frame_equal(points.points, srf_data.points)
+
+
+def test_points_column_projection(srf_ffp: Path):
+    points = srf_stream.read_points(srf_ffp, {"rise", "lon"}).points
+    assert list(points.columns) == ["lon", "rise"]
+    np.testing.assert_allclose(points["rise"], [0.3, 0.2, 0.1])
+    with pytest.raises(KeyError):
+        srf_stream.read_points(srf_ffp, {"slip1"})
+
+
+def test_points_skip_slip_time_functions(tmp_path: Path):
+    # The slip time function of the first point has as many values as a
+    # point header, split over two lines like one.
+    srf_ffp = tmp_path / "rupture.srf"
+    srf_ffp.write_text(
+        SRF_TEXT.replace(
+            "90.0 100.0 3 0.0 0 0.0 0\n1.0 2.0 3.0",
+            "90.0 100.0 17 0.0 0 0.0 0\n"
+            + " ".join(["1.0"] * 10)
+            + "\n"
+            + " ".join(["2.0"] * 7),
+        )
+    )
+    pd.testing.assert_frame_equal(
+        srf_stream.read_points(srf_ffp, block_size=64).points,
+        srf.read_srf(srf_ffp).points,
+    )
+
+
+def test_truncated_srf_points(srf_ffp: Path):
+    srf_ffp.write_text(SRF_TEXT.removesuffix("6.0"))
+    with pytest.raises(ValueError):
+        srf_stream.read_points(srf_ffp)
@@ -0,0 +1,92 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from source_modelling import moment, srf
+from visualisation import synthetic
+
+
+@pytest.fixture(scope="module")
+def rupture() -> synthetic.SyntheticRupture:
+    return synthetic.synthetic_rupture(
+        fault_count=2, plane_count=3, subfault_count=2000, nt=10, seed=1
+    )
+
+
+@pytest.mark.parametrize("version", ["1.0", "2.0"])
+def test_rupture_roundtrips_through_srf(tmp_path: Path, version: str):
+    rupture = synthetic.synthetic_rupture(
+        plane_count=2, subfault_count=500, nt=8, version=version
+    )
+    srf_ffp, realisation_ffp = rupture.write(tmp_path)
+    srf_data = srf.read_srf(srf_ffp)
+
+    assert srf_data.version == version
+    np.testing.assert_allclose(srf_data.header, rupture.srf_data.header, atol=1e-6)
+    for column in rupture.srf_data.points:
+        np.testing.assert_allclose(
+            srf_data.points[column], rupture.srf_data.points[column], rtol=1e-5
+        )
+    np.testing.assert_array_equal(
+        srf_data.slipt1_array.indices, rupture.srf_data.slipt1_array.indices
+    )
+    np.testing.assert_allclose(
+        srf_data.slipt1_array.data, rupture.srf_data.slipt1_array.data, rtol=1e-5
+    )
+    assert json.loads(realisation_ffp.read_text()) == rupture.realisation
+
+
+@pytest.mark.parametrize(
+    "subfault_count, plane_count", [(1_000, 1), (10_000, 4), (100_000, 3)]
+)
+def test_subfault_count(subfault_count: int, plane_count: int):
+    rupture = synthetic.synthetic_rupture(
+        plane_count=plane_count, subfault_count=subfault_count, nt=2
+    )
+    header = rupture.srf_data.header
+    assert len(header) == plane_count
+    assert (header["nstk"] * header["ndip"]).sum() == len(rupture.srf_data.points)
+    assert len(rupture.srf_data.points) == pytest.approx(subfault_count, rel=0.05)
+
+
+def test_slip_time_function_integrates_to_slip(rupture: synthetic.SyntheticRupture):
+    srf_data = rupture.srf_data
+    np.testing.assert_allclose(
+        srf_data.slipt1_array.sum(axis=1) * srf_data.points["dt"],
+        srf_data.points["slip"],
+        rtol=1e-5,
+    )
+    assert srf_data.nt <= int(srf_data.points["tinit"].max() / 0.05) + 11
+    # Slip starts in the sample containing the rupture time.
+    np.testing.assert_array_equal(
+        srf_data.slipt1_array.indices[srf_data.slipt1_array.indptr[:-1]],
+        np.floor(srf_data.points["tinit"] / srf_data.points["dt"]),
+    )
+
+
+def test_realisation_describes_rupture(rupture: synthetic.SyntheticRupture):
+    realisation = rupture.realisation
+    geometries = realisation["sources"]["source_geometries"]
+    assert [len(geometry["corners"]) for geometry in geometries.values()] == [8, 4]
+
+    propagation = realisation["rupture_propagation"]
+    assert propagation["rupture_causality_tree"] == {
+        "Fault 1": None,
+        "Fault 2": "Fault 1",
+    }
+    assert set(propagation["jump_points"]) == {"Fault 2"}
+
+    points = rupture.srf_data.points
+    total_moment = moment.MU * (points["area"] * points["slip"] / 1e6).sum()
+    fault_moments = [
+        moment.magnitude_to_moment(magnitude)
+        for magnitude in propagation["magnitudes"].values()
+    ]
+    assert sum(fault_moments) == pytest.approx(total_moment, rel=1e-4)
+
+
+def test_too_few_planes():
+    with pytest.raises(ValueError):
+        synthetic.synthetic_rupture(fault_count=3, plane_count=2)
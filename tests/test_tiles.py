@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from source_modelling import srf
+from visualisation import synthetic, tiles
+from visualisation.tiles import TileFormat, TileLayer
+
+ZOOMS = range(7, 11)
+
+
+@pytest.fixture
+def srf_data() -> srf.SrfFile:
+    return synthetic.synthetic_rupture(
+        fault_count=2, plane_count=3, subfault_count=3_000, nt=5
+    ).srf_data
+
+
+def tile_files(output_dir: Path, tile_format: str = "png") -> set[Path]:
+    return {
+        tile_ffp.relative_to(output_dir)
+        for tile_ffp in output_dir.rglob(f"*.{tile_format}")
+    }
+
+
+def test_tile_coordinates_round_trip():
+    x, y = tiles.tile_coordinates(np.array([0.0, 172.6]), np.array([0.0, -43.5]), 1)
+    assert (x[0], y[0]) == (1.0, 1.0)
+    np.testing.assert_allclose(tiles.tile_lon(x, 1), [0.0, 172.6])
+    np.testing.assert_allclose(tiles.tile_lat(y, 1), [0.0, -43.5])
+
+
+def test_footprint_tiles_skip_tiles_off_the_plane():
+    # A thin plane crossing the diagonal of a 3 by 3 block of tiles.
+    zoom = 10
+    x = np.array([500.2, 500.25, 502.25, 502.2])
+    y = np.array([300.5, 300.45, 302.45, 302.5])
+    corners = np.column_stack([tiles.tile_lon(x, zoom), tiles.tile_lat(y, zoom)])
+    assert sorted(tiles.footprint_tiles(corners, zoom)) == [
+        (500, 300),
+        (500, 301),
+        (501, 301),
+        (501, 302),
+        (502, 302),
+    ]
+
+
+def test_write_tile_pyramid(srf_data: srf.SrfFile, tmp_path: Path):
+    update = tiles.write_tile_pyramid(srf_data, tmp_path, ZOOMS)
+
+    planes = tiles.tile_planes(srf_data, TileLayer)
+    expected = set(tiles.plane_tiles([plane.corners for plane in planes], ZOOMS))
+    assert update.rendered == expected
+    assert tile_files(tmp_path) == {
+        tiles.tile_path(Path(), layer, tile, "png")
+        for layer in TileLayer
+        for tile in expected
+    }
+    manifest = tiles.read_manifest(tmp_path)
+    assert [plane["digest"] for plane in manifest["planes"]] == [
+        plane.digest for plane in planes
+    ]
+
+
+def test_unchanged_pyramid_is_not_rendered(srf_data: srf.SrfFile, tmp_path: Path):
+    tiles.write_tile_pyramid(srf_data, tmp_path, ZOOMS)
+    update = tiles.write_tile_pyramid(srf_data, tmp_path, ZOOMS)
+    assert update.rendered == update.removed == set()
+
+
+def test_changed_plane_is_rendered(srf_data: srf.SrfFile, tmp_path: Path):
+    tiles.write_tile_pyramid(srf_data, tmp_path, ZOOMS)
+
+    # Reversing the slip of the last plane keeps the colour limits.
+    plane_size = srf_data.header["nstk"].iloc[-1] * srf_data.header["ndip"].iloc[-1]
+    slip = srf_data.points["slip"].to_numpy().copy()
+    slip[-plane_size:] = slip[-plane_size:][::-1]
+    srf_data.points["slip"] = slip
+    update = tiles.write_tile_pyramid(srf_data, tmp_path, ZOOMS)
+
+    planes = tiles.tile_planes(srf_data, TileLayer)
+    last_plane_tiles = set(tiles.plane_tiles([planes[-1].corners], ZOOMS))
+    assert update.rendered == last_plane_tiles
+    assert update.rendered < set(
+        tiles.plane_tiles([plane.corners for plane in planes], ZOOMS)
+    )
+
+
+def test_changed_settings_replace_pyramid(srf_data: srf.SrfFile, tmp_path: Path):
+    tiles.write_tile_pyramid(srf_data, tmp_path, ZOOMS)
+    png_tiles = tile_files(tmp_path)
+    tiles.write_tile_pyramid(
+        srf_data, tmp_path, ZOOMS, layers=[TileLayer.slip], tile_format=TileFormat.webp
+    )
+    assert tile_files(tmp_path) == set()
+    assert tile_files(tmp_path, "webp") == {
+        tile_ffp.with_suffix(".webp")
+        for tile_ffp in png_tiles
+        if tile_ffp.parts[0] == "slip"
+    }
@@ -0,0 +1,6 @@
+"""Run a visualisation command with ``python -m visualisation``."""
+
+from visualisation.commands import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Pre-simplified New Zealand coastline for matplotlib map panels.
+
+The LINZ 1:150k coastline shapefile is downloaded and parsed in full
+every time a map panel is drawn, although a panel only needs a small
+window of it at a few hundred pixels across. `build_coastline` converts
+the shapefile once into a simplified GeoParquet file, and
+`read_coastline` reads only the polygons intersecting the plotted
+bounds (using the bounding box column of the file and the spatial
+index of the result) and clips them to those bounds.
+
+The coastline is read from the ``VISUALISATION_COASTLINE`` environment
+variable if set, so air-gapped machines can use a copy built elsewhere
+with ``build-nz-coastline``. Otherwise it is built in the user cache
+directory on first use, which requires network access once.
+"""
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Optional
+
+import typer
+
+from qcore import cli
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+app = typer.Typer()
+
+Bounds = tuple[float, float, float, float]
+
+COASTLINE_ENV_VAR = "VISUALISATION_COASTLINE"
+
+# Path on Dropbox: QuakeCoRE/Public/PlottingData/Topo/lds-nz-coastlines-and-islands-polygons-topo-150k-SHP.zip
+NZ_SHP_HIGHRES = "https://www.dropbox.com/scl/fi/oal7iuvvmsmheyod8csc7/lds-nz-coastlines-and-islands-polygons-topo-150k-SHP.zip?rlkey=abnebsm06z4l5hx0jd7m1406c&st=klxhet56&dl=1"
+NZ_SHP_HIGHRES_HASH = (
+    "sha256:4c9547aab7d868f11b0cac4b85eafa4111d104a944d0603c4d77a6af2983108c"
+)
+
+SIMPLIFY_TOLERANCE = 0.001
+"""The simplification tolerance (degrees, about 100m) of the coastline."""
+
+
+def coastline_path() -> Path:
+    """Find the path of the simplified coastline.
+
+    Returns
+    -------
+    Path
+        The value of ``VISUALISATION_COASTLINE`` if set, otherwise the
+        path of the coastline in the user cache directory.
+    """
+    import pooch
+
+    setting = os.environ.get(COASTLINE_ENV_VAR, "").strip()
+    if setting:
+        return Path(setting)
+    return Path(pooch.os_cache("visualisation")) / "nz_coastline.parquet"
+
+
+def download_shapefile() -> Path:
+    """Download (or find the cached copy of) the LINZ coastline shapefile.
+
+    Returns
+    -------
+    Path
+        The path to the coastline shapefile.
+    """
+    import pooch
+
+    return Path(
+        next(
+            file
+            for file in pooch.retrieve(
+                NZ_SHP_HIGHRES,
+                known_hash=NZ_SHP_HIGHRES_HASH,
+                processor=pooch.Unzip(),
+            )
+            if file.endswith("shp")
+        )
+    )
+
+
+def build_coastline(
+    coastline: "gpd.GeoDataFrame",
+    output_ffp: Path,
+    tolerance: float = SIMPLIFY_TOLERANCE,
+) -> None:
+    """Simplify a coastline and write it as GeoParquet.
+
+    Parameters
+    ----------
+    coastline : gpd.GeoDataFrame
+        The coastline polygons.
+    output_ffp : Path
+        The path to write the simplified coastline to.
+    tolerance : float
+        The simplification tolerance (degrees).
+    """
+    import geopandas as gpd
+
+    if coastline.crs is not None:
+        coastline = coastline.to_crs(epsg=4326)
+    simplified = gpd.GeoDataFrame(
+        geometry=coastline.geometry.simplify(tolerance, preserve_topology=True),
+        crs="EPSG:4326",
+    )
+    simplified = simplified[~simplified.geometry.is_empty]
+
+    output_ffp = Path(output_ffp)
+    output_ffp.parent.mkdir(parents=True, exist_ok=True)
+    staging_ffp = output_ffp.with_name(f".{output_ffp.name}.{os.getpid()}")
+    simplified.to_parquet(staging_ffp, write_covering_bbox=True)
+    os.replace(staging_ffp, output_ffp)
+
+
+def read_coastline(
+    bounds: Optional[Bounds] = None, coastline_ffp: Optional[Path] = None
+) -> "gpd.GeoDataFrame":
+    """Read the simplified coastline, clipped to a bounding box.
+
+    Parameters
+    ----------
+    bounds : Optional[Bounds]
+        The (min lon, min lat, max lon, max lat) bounds to clip to, by
+        default the whole coastline.
+    coastline_ffp : Optional[Path]
+        The simplified coastline, by default from `coastline_path`. If
+        the default coastline does not exist it is built.
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        The coastline polygons within the bounds.
+    """
+    import geopandas as gpd
+    import shapely
+
+    if coastline_ffp is None:
+        coastline_ffp = coastline_path()
+        if not coastline_ffp.exists():
+            build_coastline(gpd.read_file(download_shapefile()), coastline_ffp)
+
+    coastline = gpd.read_parquet(coastline_ffp, bbox=bounds)
+    if bounds is None:
+        return coastline
+    window = shapely.box(*bounds)
+    coastline = coastline.iloc[
+        coastline.sindex.query(window, predicate="intersects")
+    ].sort_index()
+    coastline = coastline.clip_by_rect(*bounds).to_frame(name="geometry")
+    return coastline[~coastline.geometry.is_empty]
+
+
+@cli.from_docstring(app)
+def build_nz_coastline(
+    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
+    shapefile_ffp: Annotated[
+        Optional[Path], typer.Option(exists=True, dir_okay=False)
+    ] = None,
+    tolerance: Annotated[float, typer.Option(min=0)] = SIMPLIFY_TOLERANCE,
+) -> None:
+    """Build the simplified NZ coastline used by map panels.
+
+    Parameters
+    ----------
+    output_ffp : Path
+        Path to write the coastline to. Point ``VISUALISATION_COASTLINE``
+        at this file to use it.
+    shapefile_ffp : Optional[Path]
+        The coastline shapefile to simplify, by default the LINZ 1:150k
+        coastline (which is downloaded).
+    tolerance : float
+        The simplification tolerance (degrees).
+    """
+    import geopandas as gpd
+
+    build_coastline(
+        gpd.read_file(shapefile_ffp or download_shapefile()), output_ffp, tolerance
+    )
+
+
+if __name__ == "__main__":
+    app()
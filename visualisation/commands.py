@@ -0,0 +1,120 @@
+"""Single entry point for every visualisation command.
+
+``visualisation COMMAND [ARGS]...`` runs the same command as the
+matching ``plot-*`` script. Commands are registered here by module
+path and summary, so listing them imports none of the command modules,
+and running one imports only its own module. The command modules in
+turn import their heavy dependencies (pygmt, matplotlib, geopandas,
+source_modelling, ...) inside the functions that use them, so
+``--help`` and argument errors return without loading them.
+"""
+
+import importlib
+import sys
+from typing import NamedTuple, Optional
+
+
+class Command(NamedTuple):
+    """A registered command."""
+
+    module: str
+    """The module defining the command's typer app."""
+    summary: str
+    """The one-line description of the command."""
+
+
+COMMANDS = {
+    "plot-srf": Command(
+        "visualisation.sources.plot_srf", "Plot multi-segment rupture with slip."
+    ),
+    "plot-srf-animation": Command(
+        "visualisation.sources.plot_srf_animation",
+        "Animate slip accumulating over a multi-segment rupture.",
+    ),
+    "plot-srf-rise": Command(
+        "visualisation.sources.plot_rise", "Plot multi-segment rupture with rise."
+    ),
+    "plot-srf-rakes": Command(
+        "visualisation.sources.plot_rakes",
+        "Plot a sample of rake values across a multi-segment rupture.",
+    ),
+    "plot-srf-moment": Command(
+        "visualisation.sources.plot_srf_moment",
+        "Plot released moment for an SRF over time.",
+    ),
+    "plot-srf-cumulative-moment": Command(
+        "visualisation.sources.plot_srf_cumulative_moment",
+        "Plot cumulative moment for an SRF over time.",
+    ),
+    "plot-mw-contributions": Command(
+        "visualisation.sources.plot_mw_contributions",
+        "Plot segment magnitudes against the Leonard scaling relation.",
+    ),
+    "plot-slip-rise-rake": Command(
+        "visualisation.sources.plot_slip_rise_rake",
+        "Plot slip-rise-rake for segments.",
+    ),
+    "plot-srf-distribution": Command(
+        "visualisation.sources.plot_srf_distribution",
+        "Plot the slip distribution from an SRF file as a histogram.",
+    ),
+    "plot-srf-suite": Command(
+        "visualisation.sources.plot_srf_suite",
+        "Render every plot product for an SRF from a single SRF load.",
+    ),
+    "plot-srf-batch": Command(
+        "visualisation.sources.plot_srf_batch",
+        "Render plot products for many SRFs in parallel.",
+    ),
+    "build-nz-coastline": Command(
+        "visualisation.coastline",
+        "Build the simplified NZ coastline used by map panels.",
+    ),
+}
+
+
+def usage() -> str:
+    """Describe the dispatcher and list the registered commands.
+
+    Returns
+    -------
+    str
+        The help text of the dispatcher.
+    """
+    width = max(len(name) for name in COMMANDS)
+    lines = [
+        "Usage: visualisation COMMAND [ARGS]...",
+        "",
+        "Run `visualisation COMMAND --help` for the options of a command.",
+        "",
+        "Commands:",
+    ]
+    lines.extend(
+        f"  {name.ljust(width)}  {command.summary}"
+        for name, command in COMMANDS.items()
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run a visualisation command.
+
+    Parameters
+    ----------
+    argv : Optional[list[str]]
+        The command name followed by its arguments, by default the
+        process arguments.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in {"-h", "--help"}:
+        print(usage())
+        sys.exit(0 if argv else 2)
+
+    name, *args = argv
+    command = COMMANDS.get(name)
+    if command is None:
+        print(f"Error: no such command '{name}'.\n\n{usage()}", file=sys.stderr)
+        sys.exit(2)
+
+    app = importlib.import_module(command.module).app
+    app(args=args, prog_name=f"visualisation {name}")
@@ -0,0 +1,222 @@
+"""SRF fields laid out as one (dip, strike) grid per fault.
+
+The planes of a fault continue one another along strike, so a field
+over a fault is naturally a 2-D grid with the planes side by side.
+`FaultGrid` stores each field in one contiguous array holding the
+grids of every fault in turn, built with one copy of each plane. The
+grid of a fault is then a reshaped slice of that array, and the grid of
+a plane a slice of its fault's grid, so neither is copied.
+
+Planes of a fault with fewer subfaults down dip than its deepest plane
+are padded with NaN at the bottom of the grid.
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Self
+
+import numpy as np
+import pandas as pd
+
+from visualisation.fault_index import FaultPointIndex
+
+
+@dataclass(frozen=True)
+class FaultGrid:
+    """The fields of an SRF on a (dip, strike) grid for each fault.
+
+    Faults and planes are numbered in SRF order, as in `FaultPointIndex`.
+    """
+
+    fault_index: FaultPointIndex
+    """The index of the faults, planes and points of the SRF."""
+    fields: dict[str, np.ndarray]
+    """The grids of every fault for each field, flattened and
+    concatenated in fault order."""
+    grid_offsets: np.ndarray
+    """The index of the first grid value of each fault, followed by the
+    total number of grid values (shape (faults + 1,))."""
+    fault_shapes: np.ndarray
+    """The number of rows (down dip) and columns (along strike) of the
+    grid of each fault (shape (faults, 2))."""
+    plane_shapes: np.ndarray
+    """The number of subfaults down dip and along strike of each plane
+    (shape (planes, 2))."""
+    plane_columns: np.ndarray
+    """The first column of each plane in the grid of its fault (shape
+    (planes,))."""
+    plane_lengths: np.ndarray
+    """The length of each plane (km, shape (planes,))."""
+    plane_widths: np.ndarray
+    """The width of each plane (km, shape (planes,))."""
+    maxima: dict[str, float]
+    """The maximum of each field over the whole SRF."""
+
+    @classmethod
+    def from_srf(
+        cls,
+        points: pd.DataFrame,
+        header: pd.DataFrame,
+        fault_index: FaultPointIndex,
+        fields: Iterable[str],
+    ) -> Self:
+        """Lay out SRF fields on the grid of each fault.
+
+        Parameters
+        ----------
+        points : pd.DataFrame
+            The SRF points.
+        header : pd.DataFrame
+            The SRF plane headers.
+        fault_index : FaultPointIndex
+            The index of the faults in the SRF.
+        fields : Iterable[str]
+            The point columns to lay out. Each keeps its dtype if it is
+            floating point, and is converted to float64 otherwise.
+
+        Returns
+        -------
+        FaultGrid
+            The fields on the grid of each fault.
+        """
+        plane_shapes = header[["ndip", "nstk"]].to_numpy(dtype=np.int64)
+        fault_shapes = np.zeros((fault_index.fault_count, 2), dtype=np.int64)
+        plane_columns = np.zeros(len(header), dtype=np.int64)
+        for fault in range(fault_index.fault_count):
+            shapes = plane_shapes[fault_index.planes(fault)]
+            if not len(shapes):
+                continue
+            plane_columns[fault_index.planes(fault)] = (
+                np.cumsum(shapes[:, 1]) - shapes[:, 1]
+            )
+            fault_shapes[fault] = shapes[:, 0].max(), shapes[:, 1].sum()
+        grid_offsets = np.concatenate([[0], np.cumsum(fault_shapes.prod(axis=1))])
+
+        grid_fields = {}
+        maxima = {}
+        for field in fields:
+            values = points[field].to_numpy()
+            if not np.issubdtype(values.dtype, np.floating):
+                values = values.astype(np.float64)
+            grid_fields[field] = np.full(grid_offsets[-1], np.nan, dtype=values.dtype)
+            maxima[field] = float(values.max()) if len(values) else np.nan
+
+        grid = cls(
+            fault_index=fault_index,
+            fields=grid_fields,
+            grid_offsets=grid_offsets,
+            fault_shapes=fault_shapes,
+            plane_shapes=plane_shapes,
+            plane_columns=plane_columns,
+            plane_lengths=header["len"].to_numpy(dtype=np.float64),
+            plane_widths=header["wid"].to_numpy(dtype=np.float64),
+            maxima=maxima,
+        )
+        offsets = fault_index.plane_point_offsets
+        for field in grid_fields:
+            values = points[field].to_numpy()
+            for plane, shape in enumerate(plane_shapes):
+                grid.plane(field, plane)[...] = values[
+                    offsets[plane] : offsets[plane + 1]
+                ].reshape(shape)
+        return grid
+
+    @property
+    def fault_count(self) -> int:  # numpydoc ignore=RT01
+        """int: The number of faults."""
+        return self.fault_index.fault_count
+
+    def fault(self, field: str, fault: int) -> np.ndarray:
+        """Find the grid of a field over a fault.
+
+        Parameters
+        ----------
+        field : str
+            The field.
+        fault : int
+            The fault number.
+
+        Returns
+        -------
+        np.ndarray
+            A view of the grid, with a row for each subfault down dip
+            and a column for each subfault along strike (top left
+            first).
+        """
+        return self.fields[field][
+            self.grid_offsets[fault] : self.grid_offsets[fault + 1]
+        ].reshape(self.fault_shapes[fault])
+
+    def plane(self, field: str, plane: int) -> np.ndarray:
+        """Find the grid of a field over a plane.
+
+        Parameters
+        ----------
+        field : str
+            The field.
+        plane : int
+            The plane number.
+
+        Returns
+        -------
+        np.ndarray
+            A view of the plane's part of the grid of its fault.
+        """
+        fault = int(
+            np.searchsorted(self.fault_index.plane_offsets, plane, side="right") - 1
+        )
+        ndip, nstk = self.plane_shapes[plane]
+        column = self.plane_columns[plane]
+        return self.fault(field, fault)[:ndip, column : column + nstk]
+
+    def fault_values(self, field: str, fault: int) -> np.ndarray:
+        """Find the values of a field on the subfaults of a fault.
+
+        Parameters
+        ----------
+        field : str
+            The field.
+        fault : int
+            The fault number.
+
+        Returns
+        -------
+        np.ndarray
+            The values of the field on the fault, excluding grid
+            padding. This is a view unless the fault is padded.
+        """
+        values = self.fault(field, fault).ravel()
+        point_offsets = self.fault_index.point_offsets
+        if values.size == point_offsets[fault + 1] - point_offsets[fault]:
+            return values
+        return values[~np.isnan(values)]
+
+    def fault_length(self, fault: int) -> float:
+        """Find the length of a fault.
+
+        Parameters
+        ----------
+        fault : int
+            The fault number.
+
+        Returns
+        -------
+        float
+            The total length of the fault's planes (km).
+        """
+        return float(self.plane_lengths[self.fault_index.planes(fault)].sum())
+
+    def fault_width(self, fault: int) -> float:
+        """Find the width of a fault.
+
+        Parameters
+        ----------
+        fault : int
+            The fault number.
+
+        Returns
+        -------
+        float
+            The width of the fault's widest plane (km).
+        """
+        return float(self.plane_widths[self.fault_index.planes(fault)].max())
@@ -0,0 +1,212 @@
+"""Index of the faults, planes and points of a multi-fault SRF.
+
+The SRF of a realisation lists the planes of each fault in rupture
+order, and the points of each plane in order. `FaultPointIndex`
+records, once, which planes and points belong to which fault so that
+per-fault breakdowns can slice or reduce point arrays directly rather
+than walking the rupture causality tree and the SRF header each time.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Self
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+import scipy as sp
+
+from source_modelling import rupture_propagation
+
+if TYPE_CHECKING:
+    from visualisation.realisation import Realisation
+    from workflow.realisations import RupturePropagationConfig, SourceConfig
+
+
+@dataclass(frozen=True)
+class FaultPointIndex:
+    """The planes and points of each fault in an SRF.
+
+    Faults are numbered by their position in `fault_names`, which is
+    the order their planes appear in the SRF.
+    """
+
+    fault_names: list[str]
+    """The name of each fault, in SRF order."""
+    plane_offsets: np.ndarray
+    """The index of the first plane of each fault, followed by the
+    total number of planes (shape (faults + 1,))."""
+    point_offsets: np.ndarray
+    """The index of the first point of each fault, followed by the
+    total number of points (shape (faults + 1,))."""
+    plane_point_offsets: np.ndarray
+    """The index of the first point of each plane, followed by the
+    total number of points (shape (planes + 1,))."""
+    point_fault_ids: np.ndarray
+    """The fault of each point (shape (points,))."""
+
+    @classmethod
+    def from_plane_counts(
+        cls, fault_plane_counts: dict[str, int], header: pd.DataFrame
+    ) -> Self:
+        """Build the index of an SRF from the number of planes in each fault.
+
+        Parameters
+        ----------
+        fault_plane_counts : dict[str, int]
+            The number of planes in each fault, in SRF order.
+        header : pd.DataFrame
+            The SRF plane headers.
+
+        Returns
+        -------
+        FaultPointIndex
+            The index of the faults in the SRF.
+
+        Raises
+        ------
+        ValueError
+            If the total number of planes does not match the SRF.
+        """
+        plane_count = sum(fault_plane_counts.values())
+        if plane_count != len(header):
+            raise ValueError(
+                f"Faults have {plane_count} planes, but SRF has {len(header)}."
+            )
+
+        plane_offsets = np.concatenate(
+            [[0], np.cumsum(list(fault_plane_counts.values()))]
+        )
+        plane_point_offsets = np.concatenate(
+            [[0], np.cumsum(header["nstk"] * header["ndip"])]
+        )
+        point_offsets = plane_point_offsets[plane_offsets]
+        return cls(
+            fault_names=list(fault_plane_counts),
+            plane_offsets=plane_offsets,
+            point_offsets=point_offsets,
+            plane_point_offsets=plane_point_offsets,
+            point_fault_ids=np.repeat(
+                np.arange(len(fault_plane_counts)), np.diff(point_offsets)
+            ),
+        )
+
+    @classmethod
+    def from_configs(
+        cls,
+        source_config: "SourceConfig",
+        rupture_propagation_config: "RupturePropagationConfig",
+        header: pd.DataFrame,
+    ) -> Self:
+        """Build the index of an SRF from the configuration it was generated from.
+
+        Parameters
+        ----------
+        source_config : SourceConfig
+            The source geometries of the realisation.
+        rupture_propagation_config : RupturePropagationConfig
+            The rupture propagation of the realisation, which determines
+            the order of the faults in the SRF.
+        header : pd.DataFrame
+            The SRF plane headers.
+
+        Returns
+        -------
+        FaultPointIndex
+            The index of the faults in the SRF.
+        """
+        return cls.from_plane_counts(
+            {
+                fault_name: len(source_config.source_geometries[fault_name].planes)
+                for fault_name in rupture_propagation.tree_nodes_in_order(
+                    rupture_propagation_config.rupture_causality_tree
+                )
+            },
+            header,
+        )
+
+    @classmethod
+    def from_realisation(cls, realisation: "Realisation", header: pd.DataFrame) -> Self:
+        """Build the index of an SRF from the realisation it was generated from.
+
+        Parameters
+        ----------
+        realisation : Realisation
+            The realisation the SRF was generated from.
+        header : pd.DataFrame
+            The SRF plane headers.
+
+        Returns
+        -------
+        FaultPointIndex
+            The index of the faults in the SRF.
+        """
+        return cls.from_configs(
+            realisation.source_config, realisation.rupture_propagation_config, header
+        )
+
+    @property
+    def fault_count(self) -> int:  # numpydoc ignore=RT01
+        """int: The number of faults."""
+        return len(self.fault_names)
+
+    def planes(self, fault: int) -> slice:
+        """Find the planes of a fault.
+
+        Parameters
+        ----------
+        fault : int
+            The fault number.
+
+        Returns
+        -------
+        slice
+            The slice of the SRF header containing the fault's planes.
+        """
+        return slice(self.plane_offsets[fault], self.plane_offsets[fault + 1])
+
+    def points(self, fault: int) -> slice:
+        """Find the points of a fault.
+
+        Parameters
+        ----------
+        fault : int
+            The fault number.
+
+        Returns
+        -------
+        slice
+            The slice of the SRF points containing the fault's points.
+        """
+        return slice(self.point_offsets[fault], self.point_offsets[fault + 1])
+
+    def fault_sum(self, values: npt.ArrayLike) -> np.ndarray:
+        """Sum per-point values over each fault.
+
+        Parameters
+        ----------
+        values : npt.ArrayLike
+            A value for each point.
+
+        Returns
+        -------
+        np.ndarray
+            The sum of the values on each fault (shape (faults,)).
+        """
+        return np.bincount(
+            self.point_fault_ids, weights=values, minlength=self.fault_count
+        )
+
+    def fault_indicator(self) -> sp.sparse.csr_array:
+        """Build the sparse matrix that sums per-point values over each fault.
+
+        Returns
+        -------
+        sp.sparse.csr_array
+            A matrix of shape (faults, points) with a one at (i, j) if
+            point j is on fault i.
+        """
+        point_count = len(self.point_fault_ids)
+        return sp.sparse.csr_array(
+            (np.ones(point_count), np.arange(point_count), self.point_offsets),
+            shape=(self.fault_count, point_count),
+        )
@@ -0,0 +1,458 @@
+"""Gridding of several SRF fields onto a shared regular grid.
+
+`pygmt_helper.plotting.create_grid` grids one field at a time, so
+plotting slip with rupture time contours builds the same grid nodes
+and Delaunay triangulation twice for each segment. Here the
+interpolation geometry of a point set (the grid nodes, the triangle
+containing each node and its barycentric weights) is computed once,
+and applying it to a field is a single gather and weighted sum. The
+subfaults of an SRF plane already form a regular grid, so planes skip
+the triangulation entirely and are rasterised directly from their
+strike and dip indices.
+
+Geometries are cached by the point coordinates, region and spacing
+they were built for, so every product rendered from the same SRF in
+one process reuses the geometry of each segment.
+"""
+
+import hashlib
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import scipy as sp
+import xarray as xr
+
+from visualisation import profiling
+
+Region = tuple[float, float, float, float]
+
+GEOMETRY_CACHE_SIZE = 64
+"""The number of grid geometries kept in memory."""
+METRES_PER_DEGREE = 2 * np.pi * 6_371_007.1810 / 360
+"""The length of a degree of the (authalic) sphere GMT converts
+distance increments with (m)."""
+DISTANCE_UNITS = {"e": 1.0, "f": 0.3048, "k": 1000.0, "M": 1609.344, "n": 1852.0}
+"""The length of each GMT distance increment unit (m)."""
+ANGLE_UNITS = {"": 1.0, "d": 1.0, "m": 1 / 60, "s": 1 / 3600}
+"""The size of each GMT angular increment unit (degrees)."""
+
+_geometry_cache: OrderedDict[tuple, "GridGeometry"] = OrderedDict()
+
+
+@dataclass(frozen=True)
+class GridGeometry:
+    """The interpolation of a point set onto a regular grid.
+
+    Each grid node inside the convex hull of the points is a weighted
+    sum of a few points (the vertices of the Delaunay triangle
+    containing it). Nodes outside the hull are NaN.
+    """
+
+    lon: np.ndarray
+    """The longitude of each grid column."""
+    lat: np.ndarray
+    """The latitude of each grid row."""
+    nodes: np.ndarray
+    """The flat index of each grid node that is interpolated."""
+    vertices: np.ndarray
+    """The points contributing to each interpolated node (shape (nodes, k))."""
+    weights: np.ndarray
+    """The weight of each contributing point (shape (nodes, k))."""
+
+    def interpolate(self, values: np.ndarray) -> xr.DataArray:
+        """Interpolate point values onto the grid.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            The value at each point.
+
+        Returns
+        -------
+        xr.DataArray
+            The gridded values, with dimensions (lat, lon).
+        """
+        grid = np.full(len(self.lat) * len(self.lon), np.nan)
+        grid[self.nodes] = np.einsum(
+            "ij,ij->i",
+            np.asarray(values, dtype=np.float64)[self.vertices],
+            self.weights,
+        )
+        return xr.DataArray(
+            grid.reshape(len(self.lat), len(self.lon)),
+            dims=("lat", "lon"),
+            coords={"lon": self.lon, "lat": self.lat},
+        )
+
+
+def segment_region(points: pd.DataFrame) -> Region:
+    """Find the bounding region of a set of points.
+
+    Parameters
+    ----------
+    points : pd.DataFrame
+        The points, with lon and lat columns.
+
+    Returns
+    -------
+    Region
+        The region (min lon, max lon, min lat, max lat).
+    """
+    return (
+        points["lon"].min(),
+        points["lon"].max(),
+        points["lat"].min(),
+        points["lat"].max(),
+    )
+
+
+def _increment(increment: str) -> tuple[float, bool]:
+    """Parse one GMT grid increment.
+
+    Parameters
+    ----------
+    increment : str
+        The increment, a number with an optional unit (e.g. ``"5e"``).
+
+    Returns
+    -------
+    size : float
+        The size of the increment, in degrees or metres.
+    is_distance : bool
+        True if the size is a distance (in metres).
+
+    Raises
+    ------
+    ValueError
+        If the increment is not a number with a supported unit.
+    """
+    unit = increment[-1:] if increment[-1:].isalpha() else ""
+    try:
+        size = float(increment.removesuffix(unit))
+    except ValueError:
+        raise ValueError(f"Invalid grid increment: {increment!r}") from None
+    if unit in DISTANCE_UNITS:
+        return size * DISTANCE_UNITS[unit], True
+    if unit in ANGLE_UNITS:
+        return size * ANGLE_UNITS[unit], False
+    raise ValueError(f"Unsupported grid increment unit: {increment!r}")
+
+
+def grid_nodes(region: Region, grid_spacing: str) -> tuple[np.ndarray, np.ndarray]:
+    """Find the nodes of a regular grid covering a region.
+
+    The nodes are those GMT (and so `pygmt_helper.plotting.create_grid`)
+    would use: distance increments are converted to degrees on a sphere,
+    with longitude increments taken at the middle latitude of the
+    region, and the east and north edges of the region are moved to the
+    nearest whole number of increments from the west and south edges.
+
+    Parameters
+    ----------
+    region : Region
+        The region (min lon, max lon, min lat, max lat) to grid.
+    grid_spacing : str
+        The grid spacing, in GMT conventions (e.g. ``"5e/5e"``).
+
+    Returns
+    -------
+    lon : np.ndarray
+        The longitude of each grid column.
+    lat : np.ndarray
+        The latitude of each grid row.
+    """
+    west, east, south, north = region
+    x_increment, y_increment = (grid_spacing.split("/") * 2)[:2]
+    lon_increment, x_is_distance = _increment(x_increment)
+    lat_increment, y_is_distance = _increment(y_increment)
+    if x_is_distance:
+        lon_increment /= METRES_PER_DEGREE * np.cos(np.radians((south + north) / 2))
+    if y_is_distance:
+        lat_increment /= METRES_PER_DEGREE
+
+    lon_count = int(np.rint((east - west) / lon_increment)) + 1
+    lat_count = int(np.rint((north - south) / lat_increment)) + 1
+    return (
+        west + np.arange(lon_count) * lon_increment,
+        south + np.arange(lat_count) * lat_increment,
+    )
+
+
+def linear_geometry(
+    coordinates: np.ndarray, lon: np.ndarray, lat: np.ndarray
+) -> GridGeometry:
+    """Build the linear (Delaunay) interpolation of points onto grid nodes.
+
+    The interpolation is the same as that of
+    `scipy.interpolate.LinearNDInterpolator`.
+
+    Parameters
+    ----------
+    coordinates : np.ndarray
+        The (lon, lat) coordinates of the points (shape (points, 2)).
+    lon : np.ndarray
+        The longitude of each grid column.
+    lat : np.ndarray
+        The latitude of each grid row.
+
+    Returns
+    -------
+    GridGeometry
+        The interpolation geometry.
+    """
+    triangulation = sp.spatial.Delaunay(coordinates)
+    node_lon, node_lat = np.meshgrid(lon, lat)
+    node_coordinates = np.column_stack([node_lon.ravel(), node_lat.ravel()])
+    simplices = triangulation.find_simplex(node_coordinates)
+    nodes = np.flatnonzero(simplices >= 0)
+    simplices = simplices[nodes]
+
+    transform = triangulation.transform[simplices]
+    barycentric = np.einsum(
+        "ijk,ik->ij", transform[:, :2], node_coordinates[nodes] - transform[:, 2]
+    )
+    return GridGeometry(
+        lon=lon,
+        lat=lat,
+        nodes=nodes,
+        vertices=triangulation.simplices[simplices],
+        weights=np.column_stack([barycentric, 1 - barycentric.sum(axis=1)]),
+    )
+
+
+def plane_index_transform(
+    coordinates: np.ndarray, plane_shape: tuple[int, int]
+) -> Optional[np.ndarray]:
+    """Fit the affine map from (lon, lat) to the subfault indices of a plane.
+
+    The subfaults of an SRF plane lie on a regular strike by dip grid,
+    which over the extent of a plane is an affine image of the subfault
+    indices in (lon, lat). The inverse of that map is fitted to every
+    subfault.
+
+    Parameters
+    ----------
+    coordinates : np.ndarray
+        The (lon, lat) coordinates of the subfaults (shape (points, 2)),
+        in SRF order (strike varying fastest).
+    plane_shape : tuple[int, int]
+        The number of subfaults along strike and dip of the plane.
+
+    Returns
+    -------
+    Optional[np.ndarray]
+        The map (shape (3, 2)) taking (lon, lat, 1) to fractional
+        (strike, dip) subfault indices, or None if the plane has a single
+        row or column of subfaults, or is vertical, and so has no area
+        in (lon, lat).
+    """
+    nstk, ndip = plane_shape
+    if nstk < 2 or ndip < 2:
+        return None
+
+    strike_index, dip_index = np.meshgrid(np.arange(nstk), np.arange(ndip))
+    design = np.column_stack([coordinates, np.ones(len(coordinates))])
+    affine, _, rank, _ = np.linalg.lstsq(
+        design,
+        np.column_stack([strike_index.ravel(), dip_index.ravel()]),
+        rcond=None,
+    )
+    if rank < design.shape[1]:
+        return None
+    return affine
+
+
+def plane_geometry(
+    affine: np.ndarray,
+    plane_shape: tuple[int, int],
+    lon: np.ndarray,
+    lat: np.ndarray,
+) -> GridGeometry:
+    """Build the bilinear interpolation of a plane's subfaults onto grid nodes.
+
+    Each grid node is mapped to fractional subfault indices by `affine`
+    and takes the bilinear weights of the four subfaults around it.
+    Nodes outside the plane are NaN.
+
+    Parameters
+    ----------
+    affine : np.ndarray
+        The map from (lon, lat, 1) to subfault indices of the plane (see
+        `plane_index_transform`).
+    plane_shape : tuple[int, int]
+        The number of subfaults along strike and dip of the plane.
+    lon : np.ndarray
+        The longitude of each grid column.
+    lat : np.ndarray
+        The latitude of each grid row.
+
+    Returns
+    -------
+    GridGeometry
+        The interpolation geometry.
+    """
+    nstk, ndip = plane_shape
+    node_lon, node_lat = np.meshgrid(lon, lat)
+    fractional_index = (
+        np.column_stack([node_lon.ravel(), node_lat.ravel(), np.ones(node_lon.size)])
+        @ affine
+    )
+    # Nodes on the plane boundary are subject to rounding in the fit.
+    tolerance = 1e-6
+    nodes = np.flatnonzero(
+        np.all(fractional_index >= -tolerance, axis=1)
+        & (fractional_index[:, 0] <= nstk - 1 + tolerance)
+        & (fractional_index[:, 1] <= ndip - 1 + tolerance)
+    )
+    u, v = fractional_index[nodes].T
+    i = np.clip(np.floor(u).astype(np.int64), 0, nstk - 2)
+    j = np.clip(np.floor(v).astype(np.int64), 0, ndip - 2)
+    u = np.clip(u - i, 0, 1)
+    v = np.clip(v - j, 0, 1)
+    corner = j * nstk + i
+    return GridGeometry(
+        lon=lon,
+        lat=lat,
+        nodes=nodes,
+        vertices=np.column_stack(
+            [corner, corner + 1, corner + nstk, corner + nstk + 1]
+        ),
+        weights=np.column_stack([(1 - u) * (1 - v), u * (1 - v), (1 - u) * v, u * v]),
+    )
+
+
+def structured_geometry(
+    coordinates: np.ndarray,
+    plane_shape: tuple[int, int],
+    lon: np.ndarray,
+    lat: np.ndarray,
+) -> GridGeometry:
+    """Build the bilinear interpolation of a plane's subfault grid onto grid nodes.
+
+    The subfaults of an SRF plane lie on a regular strike by dip grid,
+    which over the extent of a plane is an affine image of the subfault
+    indices in (lon, lat). Each grid node is mapped back to fractional
+    subfault indices by the inverse of that affine map, fitted to every
+    subfault (see `plane_index_transform`), and takes the bilinear
+    weights of the four subfaults around it (see `plane_geometry`).
+    Nodes outside the plane are NaN. No triangulation is required, so
+    this is much faster than `linear_geometry` on large planes.
+
+    Parameters
+    ----------
+    coordinates : np.ndarray
+        The (lon, lat) coordinates of the subfaults (shape (points, 2)),
+        in SRF order (strike varying fastest).
+    plane_shape : tuple[int, int]
+        The number of subfaults along strike and dip of the plane.
+    lon : np.ndarray
+        The longitude of each grid column.
+    lat : np.ndarray
+        The latitude of each grid row.
+
+    Returns
+    -------
+    GridGeometry
+        The interpolation geometry. If the plane has a single row or
+        column of subfaults, or is vertical, the plane has no area in
+        (lon, lat) and the geometry of `linear_geometry` is returned.
+    """
+    affine = plane_index_transform(coordinates, plane_shape)
+    if affine is None:
+        return linear_geometry(coordinates, lon, lat)
+    return plane_geometry(affine, plane_shape, lon, lat)
+
+
+def grid_geometry(
+    points: pd.DataFrame,
+    region: Region,
+    grid_spacing: str,
+    plane_shape: Optional[tuple[int, int]] = None,
+) -> GridGeometry:
+    """Find the interpolation geometry of a point set, reusing cached geometry.
+
+    Parameters
+    ----------
+    points : pd.DataFrame
+        The points, with lon and lat columns.
+    region : Region
+        The region (min lon, max lon, min lat, max lat) to grid.
+    grid_spacing : str
+        The grid spacing, in GMT conventions (e.g. ``"5e/5e"``).
+    plane_shape : Optional[tuple[int, int]]
+        The number of subfaults along strike and dip, if the points are
+        the subfaults of one SRF plane. The plane is then rasterised
+        directly with `structured_geometry`, otherwise the points are
+        triangulated with `linear_geometry`.
+
+    Returns
+    -------
+    GridGeometry
+        The interpolation geometry.
+    """
+    coordinates = np.column_stack(
+        [
+            points["lon"].to_numpy(dtype=np.float64),
+            points["lat"].to_numpy(dtype=np.float64),
+        ]
+    )
+    key = (
+        hashlib.blake2b(coordinates.tobytes(), digest_size=16).digest(),
+        tuple(float(bound) for bound in region),
+        grid_spacing,
+        plane_shape,
+    )
+    if key in _geometry_cache:
+        _geometry_cache.move_to_end(key)
+        return _geometry_cache[key]
+
+    lon, lat = grid_nodes(region, grid_spacing)
+    if plane_shape is not None:
+        geometry = structured_geometry(coordinates, plane_shape, lon, lat)
+    else:
+        geometry = linear_geometry(coordinates, lon, lat)
+    _geometry_cache[key] = geometry
+    if len(_geometry_cache) > GEOMETRY_CACHE_SIZE:
+        _geometry_cache.popitem(last=False)
+    return geometry
+
+
+@profiling.span("grid")
+def create_grids(
+    points: pd.DataFrame,
+    keys: Iterable[str],
+    grid_spacing: str,
+    region: Region,
+    plane_shape: Optional[tuple[int, int]] = None,
+) -> dict[str, xr.DataArray]:
+    """Grid several fields of a point set onto the same regular grid.
+
+    Without `plane_shape`, each grid matches
+    `pygmt_helper.plotting.create_grid` with linear interpolation and
+    ``set_water_to_nan=False``.
+
+    Parameters
+    ----------
+    points : pd.DataFrame
+        The points, with lon, lat and field columns.
+    keys : Iterable[str]
+        The fields to grid.
+    grid_spacing : str
+        The grid spacing, in GMT conventions (e.g. ``"5e/5e"``).
+    region : Region
+        The region (min lon, max lon, min lat, max lat) to grid.
+    plane_shape : Optional[tuple[int, int]]
+        The number of subfaults along strike and dip, if the points are
+        the subfaults of one SRF plane (see `grid_geometry`).
+
+    Returns
+    -------
+    dict[str, xr.DataArray]
+        The grid of each field, with dimensions (lat, lon).
+    """
+    geometry = grid_geometry(points, region, grid_spacing, plane_shape)
+    return {key: geometry.interpolate(points[key].to_numpy()) for key in keys}
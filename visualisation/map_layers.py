@@ -0,0 +1,375 @@
+"""Persistent cache of the static coastline layers of GMT maps.
+
+`fig.coast` reads and clips the GSHHG coastline database on every call,
+which at full resolution is the largest fixed cost of a slip map, and
+is identical for every map of the same region. `plot_coast` instead
+draws the land and water fill from a land mask grid and the shorelines
+from pre-clipped coastline segments, both extracted from GSHHG once
+per (region, resolution) and stored on disk.
+
+Layers are extracted for the region of the map snapped outwards to a
+coarse grid (see `cache_region`) and clipped to the map when drawn, so
+maps of nearby, similarly sized regions (e.g. the realisations of one
+rupture) share their layers. The cache is limited to
+`CACHE_SIZE_LIMIT` bytes, beyond which the least recently used layers
+are removed.
+
+The cache lives in the user cache directory by default. The
+``VISUALISATION_MAP_CACHE`` environment variable may be set to another
+directory, or to ``0`` (``off``) to always draw coastlines with
+`fig.coast`.
+"""
+
+import hashlib
+import math
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import pooch
+import pygmt
+
+Region = tuple[float, float, float, float]
+
+CACHE_ENV_VAR = "VISUALISATION_MAP_CACHE"
+CACHE_FORMAT_VERSION = 2
+CACHE_SIZE_LIMIT = 1024**3
+"""The most bytes of layers kept in the cache."""
+
+MASK_CELLS = 2000
+"""The number of land mask cells along the longest side of a cached
+region."""
+SNAP_CELLS = 4
+"""The fewest cells of the snapping grid along the longest side of a
+region (see `cache_region`)."""
+
+RESOLUTION_EXTENTS = (
+    (2.0, "f"),
+    (5.0, "h"),
+    (20.0, "i"),
+    (90.0, "l"),
+)
+"""The coastline resolution used for regions up to each extent (degrees)."""
+
+_DISABLED_SETTINGS = {"0", "false", "off"}
+
+
+@dataclass(frozen=True)
+class StaticLayers:
+    """The cached static layers of a region."""
+
+    land_mask: Path
+    """A netCDF grid that is 1 on land and 0 on water."""
+    shorelines: Path
+    """The shoreline segments, as a GMT multi-segment text file."""
+
+
+def coastline_resolution(region: Region) -> str:
+    """Choose the coastline resolution for a region.
+
+    Parameters
+    ----------
+    region : Region
+        The region (min lon, max lon, min lat, max lat) of the map.
+
+    Returns
+    -------
+    str
+        The GSHHG resolution (``"f"``, ``"h"``, ``"i"``, ``"l"`` or
+        ``"c"``) fine enough for a map of the region.
+    """
+    extent = max(region[1] - region[0], region[3] - region[2])
+    for max_extent, resolution in RESOLUTION_EXTENTS:
+        if extent <= max_extent:
+            return resolution
+    return "c"
+
+
+def cache_directory() -> Optional[Path]:
+    """Find the static layer cache directory.
+
+    Returns
+    -------
+    Optional[Path]
+        The directory holding cached layers, or None if caching is
+        disabled.
+    """
+    setting = os.environ.get(CACHE_ENV_VAR, "").strip()
+    if setting.lower() in _DISABLED_SETTINGS:
+        return None
+    if setting:
+        return Path(setting)
+    return Path(pooch.os_cache("visualisation")) / "map_layers"
+
+
+def cache_region(region: Region) -> Region:
+    """Snap a map region outwards to the region its layers are cached for.
+
+    The region is snapped to a grid whose cell size is the power of two
+    (in degrees) giving at least `SNAP_CELLS` cells along the longest
+    side of the region, so the cached region is at most twice the size
+    of the map.
+
+    Parameters
+    ----------
+    region : Region
+        The region (min lon, max lon, min lat, max lat) of the map.
+
+    Returns
+    -------
+    Region
+        The cached region containing it.
+    """
+    extent = max(region[1] - region[0], region[3] - region[2], 1e-6)
+    step = 2.0 ** math.ceil(math.log2(extent / SNAP_CELLS))
+    return (
+        math.floor(region[0] / step) * step,
+        math.ceil(region[1] / step) * step,
+        max(math.floor(region[2] / step) * step, -90.0),
+        min(math.ceil(region[3] / step) * step, 90.0),
+    )
+
+
+def _region_argument(region: Region) -> str:
+    """Format a region as a GMT ``-R`` argument.
+
+    Parameters
+    ----------
+    region : Region
+        The region (min lon, max lon, min lat, max lat).
+
+    Returns
+    -------
+    str
+        The region argument.
+    """
+    return "-R" + "/".join(f"{float(bound)!r}" for bound in region)
+
+
+def _write_layers(
+    region: Region, resolution: str, max_level: int, layers: StaticLayers
+) -> None:
+    """Extract the static layers of a region from GSHHG.
+
+    Each layer is written to a temporary file and moved into place so
+    that concurrent renders never observe a partial layer.
+
+    Parameters
+    ----------
+    region : Region
+        The region (min lon, max lon, min lat, max lat).
+    resolution : str
+        The GSHHG resolution.
+    max_level : int
+        The highest shoreline level (1 coastline, 2 lake shore, 3 island
+        in lake, 4 pond in island) to extract.
+    layers : StaticLayers
+        The layer paths to write.
+    """
+    layers.land_mask.parent.mkdir(parents=True, exist_ok=True)
+    spacing = max(region[1] - region[0], region[3] - region[2]) / MASK_CELLS
+
+    land_mask_fd, land_mask = tempfile.mkstemp(
+        suffix=".nc", dir=layers.land_mask.parent
+    )
+    os.close(land_mask_fd)
+    shorelines_fd, shorelines = tempfile.mkstemp(
+        suffix=".txt", dir=layers.shorelines.parent
+    )
+    os.close(shorelines_fd)
+    try:
+        # Lakes are water and islands in lakes are land, as `fig.coast`
+        # fills them.
+        pygmt.grdlandmask(
+            region=list(region),
+            spacing=spacing,
+            maskvalues=[0, 1, 0, 1, 0],
+            resolution=resolution,
+            outgrid=land_mask,
+        )
+        with pygmt.clib.Session() as session:
+            session.call_module(
+                "coast",
+                f"{_region_argument(region)} -D{resolution} -A0/1/{max_level} "
+                f"-W -M ->{shorelines}",
+            )
+        os.replace(land_mask, layers.land_mask)
+        os.replace(shorelines, layers.shorelines)
+    finally:
+        for path in (land_mask, shorelines):
+            Path(path).unlink(missing_ok=True)
+
+
+def _evict(cache_dir: Path, keep: StaticLayers) -> None:
+    """Remove the least recently used layers beyond the cache size limit.
+
+    Parameters
+    ----------
+    cache_dir : Path
+        The cache directory.
+    keep : StaticLayers
+        The layers in use, which are never removed.
+    """
+    entries = []
+    for land_mask in cache_dir.glob("*_land.nc"):
+        shorelines = land_mask.with_name(
+            land_mask.name.removesuffix("_land.nc") + "_shorelines.txt"
+        )
+        try:
+            stat = land_mask.stat()
+            size = stat.st_size + shorelines.stat().st_size
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, size, land_mask, shorelines))
+
+    cache_size = sum(size for _, size, _, _ in entries)
+    for _, size, land_mask, shorelines in sorted(entries):
+        if cache_size <= CACHE_SIZE_LIMIT:
+            break
+        if land_mask == keep.land_mask:
+            continue
+        land_mask.unlink(missing_ok=True)
+        shorelines.unlink(missing_ok=True)
+        cache_size -= size
+
+
+def static_layers(
+    region: Region, resolution: Optional[str] = None, max_level: int = 4
+) -> Optional[StaticLayers]:
+    """Find the static layers of a region, extracting them on first use.
+
+    The layers cover the region snapped outwards with `cache_region`.
+
+    Parameters
+    ----------
+    region : Region
+        The region (min lon, max lon, min lat, max lat).
+    resolution : Optional[str]
+        The GSHHG resolution, by default chosen from the region extent
+        with `coastline_resolution`.
+    max_level : int
+        The highest shoreline level to include.
+
+    Returns
+    -------
+    Optional[StaticLayers]
+        The cached layers of the region, or None if caching is disabled
+        or the cache directory is unwritable.
+    """
+    cache_dir = cache_directory()
+    if cache_dir is None:
+        return None
+
+    resolution = resolution or coastline_resolution(region)
+    region = cache_region(region)
+    key = hashlib.sha256(
+        repr(
+            (
+                CACHE_FORMAT_VERSION,
+                region,
+                resolution,
+                max_level,
+                MASK_CELLS,
+            )
+        ).encode()
+    ).hexdigest()[:16]
+    layers = StaticLayers(
+        land_mask=cache_dir / f"{key}_land.nc",
+        shorelines=cache_dir / f"{key}_shorelines.txt",
+    )
+    try:
+        if layers.land_mask.exists() and layers.shorelines.exists():
+            # The modification time of the land mask records its last use.
+            os.utime(layers.land_mask)
+        else:
+            _write_layers(region, resolution, max_level, layers)
+            _evict(cache_dir, layers)
+    except OSError:
+        return None
+    return layers
+
+
+def _palette(land: str, water: str) -> Path:
+    """Find a colour palette mapping the land mask to land and water colours.
+
+    Parameters
+    ----------
+    land : str
+        The land colour.
+    water : str
+        The water colour.
+
+    Returns
+    -------
+    Path
+        The path to the palette, in the cache directory.
+    """
+    palette_ffp = (
+        cache_directory()
+        / f"palette_{hashlib.sha256(f'{land}|{water}'.encode()).hexdigest()[:16]}.cpt"
+    )
+    if not palette_ffp.exists():
+        with tempfile.NamedTemporaryFile(
+            "w", dir=palette_ffp.parent, suffix=".cpt", delete=False
+        ) as palette_file:
+            palette_file.write(f"0\t{water}\t1\t{water}\n1\t{land}\t2\t{land}\n")
+        os.replace(palette_file.name, palette_ffp)
+    return palette_ffp
+
+
+def plot_coast(
+    fig: pygmt.Figure,
+    region: Region,
+    land: str,
+    water: str,
+    pen: str = "0.25p,black",
+    resolution: Optional[str] = None,
+    max_level: int = 4,
+) -> None:
+    """Plot filled land, water and shorelines into a figure.
+
+    This is equivalent to ``fig.coast(shorelines=pen, land=land,
+    water=water, resolution=resolution)`` drawing shoreline levels 1 to
+    `max_level`, but after the first map of a region the coastline
+    database is not read. If the cache is disabled, `fig.coast` is used.
+
+    Parameters
+    ----------
+    fig : pygmt.Figure
+        The figure to plot into. The basemap (and so the projection)
+        must already be set.
+    region : Region
+        The region (min lon, max lon, min lat, max lat) of the map.
+    land : str
+        The land colour.
+    water : str
+        The water colour.
+    pen : str
+        The shoreline pen.
+    resolution : Optional[str]
+        The GSHHG resolution, by default chosen from the region extent
+        with `coastline_resolution`.
+    max_level : int
+        The highest shoreline level to draw (1 coastline, 2 lake shore,
+        3 island in lake, 4 pond in island).
+    """
+    resolution = resolution or coastline_resolution(region)
+    try:
+        layers = static_layers(region, resolution, max_level)
+        palette = _palette(land, water) if layers else None
+    except OSError:
+        layers = None
+
+    if layers is None:
+        fig.coast(
+            shorelines=[f"{level}/{pen}" for level in range(1, max_level + 1)],
+            resolution=resolution,
+            land=land,
+            water=water,
+        )
+        return
+
+    fig.grdimage(grid=str(layers.land_mask), cmap=str(palette), interpolation="n")
+    fig.plot(data=str(layers.shorelines), pen=pen)
@@ -0,0 +1,103 @@
+"""Rendering presets shared by the map and panel commands.
+
+Most plots are quick looks at one of many realisations rather than
+figures for publication. The `DRAFT` preset trades detail for speed:
+a low output DPI, coarse coastlines and grids, fewer contour levels and
+rake vectors, no anti-aliasing and no inset or overview maps. Commands
+take a ``--draft`` flag selecting it, and options given explicitly
+(such as ``--dpi``) still override the preset.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class RenderPreset:
+    """The rendering settings of a preset."""
+
+    name: str
+    """The name of the preset."""
+    dpi: float
+    """The default output DPI."""
+    anti_alias: bool
+    """If True, anti-alias the rendered image."""
+    coastline_resolution: Optional[str]
+    """The GSHHG coastline resolution of map coastlines, or None to
+    choose it from the map extent (see `map_layers.coastline_resolution`)."""
+    grid_spacing: str
+    """The spacing of gridded SRF fields, in GMT conventions."""
+    decimation: int
+    """The factor by which contour levels and rake vectors are thinned out."""
+    contour_interval: float
+    """The interval between rupture time contours (s)."""
+    insets: bool
+    """If True, draw inset and overview maps."""
+
+    def level_count(self, count: int) -> int:
+        """Thin out a number of contour levels.
+
+        Parameters
+        ----------
+        count : int
+            The number of contour levels of a full quality plot.
+
+        Returns
+        -------
+        int
+            The number of contour levels to draw with this preset.
+        """
+        return max(count // self.decimation, 2)
+
+    def vector_count(self, count: int) -> int:
+        """Thin out a number of rake vectors.
+
+        Parameters
+        ----------
+        count : int
+            The number of rake vectors of a full quality plot.
+
+        Returns
+        -------
+        int
+            The number of rake vectors to draw with this preset.
+        """
+        return max(count // self.decimation, 1)
+
+
+FULL = RenderPreset(
+    name="full",
+    dpi=300,
+    anti_alias=True,
+    coastline_resolution=None,
+    grid_spacing="5e/5e",
+    decimation=1,
+    contour_interval=1,
+    insets=True,
+)
+DRAFT = RenderPreset(
+    name="draft",
+    dpi=100,
+    anti_alias=False,
+    coastline_resolution="l",
+    grid_spacing="20e/20e",
+    decimation=2,
+    contour_interval=2,
+    insets=False,
+)
+
+
+def render_preset(draft: bool) -> RenderPreset:
+    """Choose the rendering preset of a command.
+
+    Parameters
+    ----------
+    draft : bool
+        If True, render a quick-look plot.
+
+    Returns
+    -------
+    RenderPreset
+        `DRAFT` if `draft` is set, otherwise `FULL`.
+    """
+    return DRAFT if draft else FULL
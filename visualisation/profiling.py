@@ -0,0 +1,471 @@
+"""Stage timings of plot rendering.
+
+Plotting code marks its expensive sections with `span`, naming the
+stage of rendering the section belongs to:
+
+- ``load``: reading SRFs and realisations,
+- ``compute``: deriving plotted quantities (moment rates, labels, ...),
+- ``grid``: interpolating subfault values onto grids,
+- ``render``: drawing the figure,
+- ``save``: encoding and writing the image.
+
+A span name may add a detail after the stage, as in ``render:coast``,
+which is reported separately in the list of spans but counted towards
+its stage.
+
+Spans are recorded only inside a `profiling` block, and otherwise cost
+one global lookup. Spans nest, and the time of a span is attributed to
+its stage excluding the time of the spans inside it, so a ``render``
+span around a whole plot reports only the drawing time that is not
+already accounted to loading, gridding or saving.
+
+Memory is reported alongside the timings. For each span the growth of
+the process's peak resident set size (RSS) is always recorded, so the
+stage that pushed the peak up can be found. This includes memory
+allocated by GMT and other native libraries. Python and numpy
+allocations may also be traced with `tracemalloc`, which gives the peak
+memory of each span rather than of the process so far, but slows down
+allocation-heavy code.
+
+The plotting commands take a ``--profile`` option, which profiles the
+whole command with `profile_command` and writes the stage times and
+memory, the spans and the number of GMT module calls to a JSON report.
+"""
+
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from collections.abc import Generator
+from contextlib import contextmanager, nullcontext
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Windows has no getrusage, so RSS growth is not reported.
+    resource = None
+
+STAGES = ("load", "compute", "grid", "render", "save")
+"""The stages of rendering, in the order they usually occur."""
+
+UNTRACKED_STAGE = "other"
+"""The stage of the time inside a `profiling` block but outside any span."""
+
+
+def rss_high_water() -> int:
+    """Find the peak resident set size of the current process.
+
+    Returns
+    -------
+    int
+        The largest resident set size (bytes) the process has had, or
+        0 if the platform does not report it.
+    """
+    if resource is None:  # pragma: no cover
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _exclusive(
+    inclusive: dict[tuple[str, ...], float],
+) -> dict[tuple[str, ...], float]:
+    """Subtract the totals of the spans inside each span from its total.
+
+    Parameters
+    ----------
+    inclusive : dict[tuple[str, ...], float]
+        The total of each span, including the spans inside it.
+
+    Returns
+    -------
+    dict[tuple[str, ...], float]
+        The total of each span, excluding the spans inside it.
+    """
+    exclusive = dict(inclusive)
+    for path, value in inclusive.items():
+        if len(path) > 1:
+            exclusive[path[:-1]] -= value
+    return exclusive
+
+
+class Profile:
+    """The spans recorded while profiling.
+
+    Parameters
+    ----------
+    trace_memory : bool
+        If True, record the peak traced memory of each span.
+    """
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        """Create an empty profile."""  # numpydoc ignore=PR01
+        self.inclusive_times: dict[tuple[str, ...], float] = defaultdict(float)
+        """The total time of each span, by its path of enclosing span names."""
+        self.counts: dict[tuple[str, ...], int] = defaultdict(int)
+        """The number of times each span was entered."""
+        self.wall_time = 0.0
+        """The wall time of the `profiling` block (s)."""
+        self.gmt_modules: Counter[str] = Counter()
+        """The number of calls of each GMT module, if counted."""
+        self.rss_growth: dict[tuple[str, ...], int] = defaultdict(int)
+        """The total growth of the peak RSS inside each span (bytes)."""
+        self.rss_start = 0
+        """The peak RSS when the `profiling` block began (bytes)."""
+        self.rss_end = 0
+        """The peak RSS when the `profiling` block ended (bytes)."""
+        self.trace_memory = trace_memory
+        """Whether traced memory is recorded."""
+        self.traced_peaks: dict[tuple[str, ...], int] = defaultdict(int)
+        """The peak traced memory inside each span (bytes), if traced."""
+        self.traced_peak = 0
+        """The peak traced memory of the `profiling` block (bytes), if traced."""
+        self._stack: list[str] = []
+        # The peak traced memory so far of each open span, innermost last.
+        self._running_peaks: list[int] = []
+
+    def _enter_traced(self) -> None:
+        """Start tracking the peak traced memory of a new innermost span."""
+        current, peak = tracemalloc.get_traced_memory()
+        if self._running_peaks:
+            self._running_peaks[-1] = max(self._running_peaks[-1], peak)
+        self._running_peaks.append(current)
+        tracemalloc.reset_peak()
+
+    def _exit_traced(self) -> int:
+        """Stop tracking the peak traced memory of the innermost span.
+
+        Returns
+        -------
+        int
+            The peak traced memory of the span (bytes).
+        """
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(self._running_peaks.pop(), peak)
+        if self._running_peaks:
+            self._running_peaks[-1] = max(self._running_peaks[-1], peak)
+        tracemalloc.reset_peak()
+        return peak
+
+    def exclusive_times(self) -> dict[tuple[str, ...], float]:
+        """Find the time of each span excluding the spans inside it.
+
+        Returns
+        -------
+        dict[tuple[str, ...], float]
+            The exclusive time of each span, by span path.
+        """
+        return _exclusive(self.inclusive_times)
+
+    def stage_times(self) -> dict[str, float]:
+        """Find the total exclusive time of each stage.
+
+        Returns
+        -------
+        dict[str, float]
+            The time spent in each stage (s). Every stage of `STAGES`
+            is present, and time outside any span is reported under
+            `UNTRACKED_STAGE`.
+        """
+        stage_times = dict.fromkeys(STAGES, 0.0)
+        for path, elapsed in self.exclusive_times().items():
+            stage = path[-1].partition(":")[0]
+            stage_times[stage] = stage_times.get(stage, 0.0) + elapsed
+        tracked_time = sum(
+            elapsed for path, elapsed in self.inclusive_times.items() if len(path) == 1
+        )
+        stage_times[UNTRACKED_STAGE] = max(self.wall_time - tracked_time, 0.0)
+        return stage_times
+
+    def stage_memory(self) -> dict[str, dict[str, Optional[int]]]:
+        """Find the memory used by each stage.
+
+        Returns
+        -------
+        dict[str, dict[str, Optional[int]]]
+            For each stage, ``rss_growth``, the growth of the peak RSS
+            in the stage excluding nested spans, and ``traced_peak``,
+            the largest peak traced memory of a span of the stage (None
+            if memory was not traced). Sizes are in bytes. Growth
+            outside any span is reported under `UNTRACKED_STAGE`.
+        """
+        stage_growth = Counter(dict.fromkeys(STAGES, 0))
+        stage_peaks = Counter(dict.fromkeys(STAGES, 0))
+        for path, growth in _exclusive(self.rss_growth).items():
+            stage = path[-1].partition(":")[0]
+            stage_growth[stage] += int(growth)
+            stage_peaks[stage] = max(stage_peaks[stage], self.traced_peaks.get(path, 0))
+        stage_memory = {
+            stage: {
+                "rss_growth": stage_growth[stage],
+                "traced_peak": stage_peaks[stage] if self.trace_memory else None,
+            }
+            for stage in stage_growth
+        }
+        tracked_growth = sum(
+            growth for path, growth in self.rss_growth.items() if len(path) == 1
+        )
+        stage_memory[UNTRACKED_STAGE] = {
+            "rss_growth": max(self.rss_end - self.rss_start - tracked_growth, 0),
+            "traced_peak": None,
+        }
+        return stage_memory
+
+    def to_dict(self) -> dict[str, Any]:
+        """Summarise the profile as JSON-serialisable data.
+
+        Returns
+        -------
+        dict[str, Any]
+            The wall time, stage times, memory, individual spans (with
+            their paths joined by ``/``) and GMT module calls of the
+            profile. Sizes are in bytes.
+        """
+        exclusive_times = self.exclusive_times()
+        return {
+            "wall_time": self.wall_time,
+            "stages": self.stage_times(),
+            "memory": {
+                "rss_start": self.rss_start,
+                "rss_high_water": self.rss_end,
+                "traced_peak": self.traced_peak if self.trace_memory else None,
+                "stages": self.stage_memory(),
+            },
+            "gmt_modules": dict(self.gmt_modules),
+            "spans": [
+                {
+                    "path": "/".join(path),
+                    "count": self.counts[path],
+                    "inclusive_time": elapsed,
+                    "exclusive_time": exclusive_times[path],
+                    "rss_growth": self.rss_growth[path],
+                    "traced_peak": (
+                        self.traced_peaks[path] if self.trace_memory else None
+                    ),
+                }
+                for path, elapsed in self.inclusive_times.items()
+            ],
+        }
+
+
+_active_profile: Optional[Profile] = None
+
+
+@contextmanager
+def span(name: str) -> Generator[None, None, None]:
+    """Record the time of a section of code in the active profile.
+
+    May also be used as a function decorator.
+
+    Parameters
+    ----------
+    name : str
+        The stage of the section, usually one of `STAGES`, optionally
+        followed by a colon and a detail.
+
+    Yields
+    ------
+    None
+        Control returns to the section being timed.
+    """
+    profile = _active_profile
+    if profile is None:
+        yield
+        return
+
+    profile._stack.append(name)
+    path = tuple(profile._stack)
+    if profile.trace_memory:
+        profile._enter_traced()
+    rss_start = rss_high_water()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.inclusive_times[path] += time.perf_counter() - start
+        profile.counts[path] += 1
+        profile.rss_growth[path] += rss_high_water() - rss_start
+        if profile.trace_memory:
+            profile.traced_peaks[path] = max(
+                profile.traced_peaks[path], profile._exit_traced()
+            )
+        profile._stack.pop()
+
+
+@contextmanager
+def _count_gmt_modules(profile: Profile) -> Generator[None, None, None]:
+    """Count the GMT modules called inside a block.
+
+    Parameters
+    ----------
+    profile : Profile
+        The profile to count the module calls in.
+
+    Yields
+    ------
+    None
+        Control returns to the block being counted.
+    """
+    try:
+        from pygmt.clib import Session
+    except ImportError:
+        yield
+        return
+
+    call_module = Session.call_module
+
+    def counted_call_module(
+        session: Session, module: str, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Count a GMT module call, then make it.
+
+        Parameters
+        ----------
+        session : Session
+            The GMT session to call the module in.
+        module : str
+            The name of the GMT module.
+        *args : Any
+            The positional arguments to the module call.
+        **kwargs : Any
+            The keyword arguments to the module call.
+
+        Returns
+        -------
+        Any
+            The result of the module call.
+        """
+        profile.gmt_modules[module] += 1
+        return call_module(session, module, *args, **kwargs)
+
+    Session.call_module = counted_call_module
+    try:
+        yield
+    finally:
+        Session.call_module = call_module
+
+
+@contextmanager
+def _trace_memory(profile: Profile) -> Generator[None, None, None]:
+    """Trace the peak memory of a block with `tracemalloc`.
+
+    Parameters
+    ----------
+    profile : Profile
+        The profile to record the peak memory of the block in.
+
+    Yields
+    ------
+    None
+        Control returns to the block being traced.
+    """
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profile._enter_traced()
+    try:
+        yield
+    finally:
+        profile.traced_peak = profile._exit_traced()
+        if started_tracing:
+            tracemalloc.stop()
+
+
+@contextmanager
+def profiling(
+    gmt_modules: bool = False, trace_memory: bool = False
+) -> Generator[Profile, None, None]:
+    """Record the spans entered inside a block.
+
+    Parameters
+    ----------
+    gmt_modules : bool
+        If True, also count the GMT module calls inside the block. This
+        imports pygmt (before the block is timed) if it is installed.
+    trace_memory : bool
+        If True, also trace the peak memory of every span with
+        `tracemalloc`. Tracing slows down code that allocates many
+        Python objects, which inflates its stage times.
+
+    Yields
+    ------
+    Profile
+        The profile of the block, complete once the block exits.
+    """
+    global _active_profile
+
+    profile = Profile(trace_memory=trace_memory)
+    with (
+        _count_gmt_modules(profile) if gmt_modules else nullcontext(),
+        _trace_memory(profile) if trace_memory else nullcontext(),
+    ):
+        previous_profile = _active_profile
+        _active_profile = profile
+        profile.rss_start = rss_high_water()
+        start = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            profile.wall_time = time.perf_counter() - start
+            profile.rss_end = rss_high_water()
+            _active_profile = previous_profile
+
+
+@contextmanager
+def profile_command(
+    report_ffp: Optional[Path],
+    cprofile_ffp: Optional[Path] = None,
+    trace_memory: bool = False,
+) -> Generator[None, None, None]:
+    """Profile the body of a command if requested.
+
+    Parameters
+    ----------
+    report_ffp : Optional[Path]
+        Path to write the JSON report of the stage times and memory,
+        spans and GMT module calls of the command to. The report is
+        written even if the command fails. If None, and `cprofile_ffp`
+        is None, the command is not profiled.
+    cprofile_ffp : Optional[Path]
+        Path to dump `cProfile` statistics of the command to, which can
+        be read with `pstats` or snakeviz. Function level profiling
+        slows the command down, so stage times are inflated when it is
+        enabled.
+    trace_memory : bool
+        If True, trace the peak memory of each stage with `tracemalloc`.
+
+    Yields
+    ------
+    None
+        Control returns to the command being profiled.
+    """
+    if report_ffp is None and cprofile_ffp is None:
+        yield
+        return
+
+    profiler = cProfile.Profile() if cprofile_ffp else None
+    try:
+        with profiling(gmt_modules=True, trace_memory=trace_memory) as profile:
+            if profiler:
+                profiler.enable()
+            try:
+                yield
+            finally:
+                if profiler:
+                    profiler.disable()
+    finally:
+        if profiler:
+            profiler.dump_stats(cprofile_ffp)
+        if report_ffp:
+            report = {
+                "argv": sys.argv,
+                "timestamp": datetime.now(UTC).isoformat(),
+                "cprofile": str(cprofile_ffp) if cprofile_ffp else None,
+            } | profile.to_dict()
+            Path(report_ffp).write_text(json.dumps(report, indent=2))
@@ -0,0 +1,50 @@
+"""Shared loading of the realisation configuration used by plotting scripts."""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from visualisation import profiling
+
+if TYPE_CHECKING:
+    from workflow.realisations import (
+        RealisationMetadata,
+        RupturePropagationConfig,
+        SourceConfig,
+    )
+
+
+class Realisation(NamedTuple):
+    """The realisation configuration sections required for plotting."""
+
+    source_config: "SourceConfig"
+    rupture_propagation_config: "RupturePropagationConfig"
+    metadata: "RealisationMetadata"
+
+
+@profiling.span("load:realisation")
+def read_realisation(realisation_ffp: Path) -> Realisation:
+    """Read the realisation configuration sections required for plotting.
+
+    Parameters
+    ----------
+    realisation_ffp : Path
+        Path to the realisation file.
+
+    Returns
+    -------
+    Realisation
+        The source, rupture propagation and metadata configurations.
+    """
+    # NOTE: this import is here because the workflow is, as yet,
+    # not ready to be installed along-side source modelling.
+    from workflow.realisations import (
+        RealisationMetadata,
+        RupturePropagationConfig,
+        SourceConfig,
+    )
+
+    return Realisation(
+        SourceConfig.read_from_realisation(realisation_ffp),
+        RupturePropagationConfig.read_from_realisation(realisation_ffp),
+        RealisationMetadata.read_from_realisation(realisation_ffp),
+    )
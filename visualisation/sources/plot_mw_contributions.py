@@ -1,40 +1,41 @@
 """Plot magnitude contributions of each segment in a rupture against the Leonard scaling relation."""
 
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import numpy as np
 import typer
-from matplotlib import pyplot as plt
 
 from qcore import cli
-from source_modelling import moment, rupture_propagation, srf
-from workflow.realisations import (
-    RealisationMetadata,
-    RupturePropagationConfig,
-    SourceConfig,
-)
+from visualisation import profiling
+from visualisation.realisation import read_realisation
+
+if TYPE_CHECKING:
+    from source_modelling import srf
+    from visualisation.realisation import Realisation
 
 app = typer.Typer()
 
+SRF_COLUMNS = frozenset({"area", "slip"})
 
-@cli.from_docstring(app)
-def plot_mw_contributions(
-    srf_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
-    realisation_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
-    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
-    dpi: Annotated[float, typer.Option()] = 300,
-    height: Annotated[float, typer.Option(min=0)] = 10,
-    width: Annotated[float, typer.Option(min=0)] = 10,
+
+@profiling.span("render")
+def render_mw_contributions(
+    srf_data: "srf.SrfFile",
+    realisation: "Realisation",
+    output_ffp: Path,
+    dpi: float = 300,
+    height: float = 10,
+    width: float = 10,
 ) -> None:
-    """Plot segment magnitudes against the Leonard scaling relation.
+    """Plot segment magnitudes against the Leonard scaling relation from a loaded SRF.
 
     Parameters
     ----------
-    srf_ffp : Path
-        Path to SRF file.
-    realisation_ffp : Path
-        Realisation filepath.
+    srf_data : srf.SrfFile
+        The SRF to plot.
+    realisation : Realisation
+        The realisation the SRF was generated from.
     output_ffp : Path
         Output plot path.
     dpi : float, default 300
@@ -44,11 +45,13 @@ def plot_mw_contributions(
     width : float
         Width of plot (in cm).
     """
-    source_config = SourceConfig.read_from_realisation(realisation_ffp)
-    rupture_propogation_config = RupturePropagationConfig.read_from_realisation(
-        realisation_ffp
-    )
-    realisation_metadata = RealisationMetadata.read_from_realisation(realisation_ffp)
+    from matplotlib import pyplot as plt
+
+    from source_modelling import moment
+    from visualisation.fault_index import FaultPointIndex
+
+    source_config = realisation.source_config
+    realisation_metadata = realisation.metadata
     total_area = sum(fault.area() for fault in source_config.source_geometries.values())
     smallest_area = min(
         fault.area() for fault in source_config.source_geometries.values()
@@ -63,44 +66,82 @@ def plot_mw_contributions(
         area, np.log10(area) + 3.995, label="Leonard 2014 Interplate (Average Rake)"
     )
 
-    srf_data = srf.read_srf(srf_ffp)
     total_magnitude = moment.moment_to_magnitude(
         moment.MU * (srf_data.points["area"] * srf_data.points["slip"] / (100**3)).sum()
     )
     ax.scatter(total_area, total_magnitude, label="Total Magnitude")
 
-    segment_counter = 0
-    point_counter = 0
-    for fault_name in rupture_propagation.tree_nodes_in_order(
-        rupture_propogation_config.rupture_causality_tree
-    ):
-        plane_count = len(source_config.source_geometries[fault_name].planes)
-        segments = srf_data.header.iloc[segment_counter : segment_counter + plane_count]
-
-        num_points = (segments["nstk"] * segments["ndip"]).sum()
+    fault_index = FaultPointIndex.from_realisation(realisation, srf_data.header)
+    fault_moments = moment.MU * fault_index.fault_sum(
+        srf_data.points["area"] * srf_data.points["slip"] / (100**3)
+    )
+    for fault_name, fault_moment in zip(fault_index.fault_names, fault_moments):
         individual_area = source_config.source_geometries[fault_name].area()
-
-        # get all points associated with all segments in the current fault
-        segment_points = srf_data.points.iloc[
-            point_counter : point_counter + num_points
-        ]
-        individual_magnitude = moment.moment_to_magnitude(
-            (
-                moment.MU * segment_points["area"] * segment_points["slip"] / (100**3)
-            ).sum()
-        )
+        individual_magnitude = moment.moment_to_magnitude(fault_moment)
         ax.scatter(individual_area, individual_magnitude, label=fault_name)
 
-        # advance segment counter and point counter to skip all points from the current point
-        segment_counter += plane_count
-        point_counter += num_points
-
     ax.set_xlabel("Area (m^2)")
     ax.set_ylabel("Mw")
     ax.set_xscale("log")
     ax.legend()
     ax.set_title(f"Log Area vs Magnitude ({realisation_metadata.name})")
-    fig.savefig(output_ffp, dpi=dpi)
+    with profiling.span("save"):
+        fig.savefig(output_ffp, dpi=dpi)
+    plt.close(fig)
+
+
+@cli.from_docstring(app)
+def plot_mw_contributions(
+    srf_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+    realisation_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
+    dpi: Annotated[float, typer.Option()] = 300,
+    height: Annotated[float, typer.Option(min=0)] = 10,
+    width: Annotated[float, typer.Option(min=0)] = 10,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
+) -> None:
+    """Plot segment magnitudes against the Leonard scaling relation.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to SRF file.
+    realisation_ffp : Path
+        Realisation filepath.
+    output_ffp : Path
+        Output plot path.
+    dpi : float, default 300
+        Output plot DPI (higher is better).
+    height : float
+        Height of plot (in cm).
+    width : float
+        Width of plot (in cm).
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
+    """
+    from visualisation import srf_cache
+
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        render_mw_contributions(
+            srf_cache.read_srf(srf_ffp, SRF_COLUMNS, slip=False),
+            read_realisation(realisation_ffp),
+            output_ffp,
+            dpi=dpi,
+            height=height,
+            width=width,
+        )
 
 
 if __name__ == "__main__":
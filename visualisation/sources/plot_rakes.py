@@ -1,51 +1,199 @@
 """Plot a sample of rake values across a multi-segment rupture."""
 
+from enum import StrEnum
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import numpy as np
 import typer
 
-from pygmt_helper import plotting
 from qcore import cli
-from source_modelling import srf
+from visualisation import presets, profiling
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from source_modelling import srf
 
 app = typer.Typer()
 
+SRF_COLUMNS = frozenset({"lon", "lat", "rake", "slip"})
+SAMPLE_SIZE = 200
+"""The number of rake vectors drawn by a full quality plot."""
 
-@cli.from_docstring(app)
-def plot_rakes(
-    srf_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
-    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
-    dpi: Annotated[float, typer.Option()] = 300,
-    title: Annotated[Optional[str], typer.Option()] = None,
-    sample_size: Annotated[int, typer.Option()] = 200,
-    vector_length: Annotated[float, typer.Option()] = 0.2,
-    seed: Annotated[Optional[int], typer.Option()] = None,
-    width: Annotated[float, typer.Option(min=0)] = 17,
+
+class RakeSampling(StrEnum):
+    """How the subfaults shown as rake vectors are chosen."""
+
+    stratified = "stratified"
+    """One random subfault in each cell of a coarse grid over each plane."""
+    mean = "mean"
+    """The slip-weighted mean rake of each cell of a coarse grid over each plane."""
+    random = "random"
+    """Subfaults drawn at random from the whole rupture."""
+
+
+def plane_cells(header: "pd.DataFrame", cell_count: int) -> tuple[np.ndarray, int]:
+    """Divide each SRF plane into a coarse grid of cells.
+
+    The cells are about square, and about the same size on every plane,
+    so that there are about `cell_count` cells over the whole rupture.
+    Every plane has at least one cell, and no more cells than subfaults.
+
+    Parameters
+    ----------
+    header : pd.DataFrame
+        The SRF plane headers.
+    cell_count : int
+        The approximate number of cells over all planes.
+
+    Returns
+    -------
+    cells : np.ndarray
+        The cell containing each subfault, in SRF order.
+    cell_count : int
+        The number of cells.
+    """
+    nstk = header["nstk"].to_numpy()
+    ndip = header["ndip"].to_numpy()
+    length = header["len"].to_numpy(dtype=np.float64)
+    width = header["wid"].to_numpy(dtype=np.float64)
+    cell_size = np.sqrt((length * width).sum() / max(cell_count, 1))
+    strike_cells = np.clip(np.round(length / cell_size).astype(np.int64), 1, nstk)
+    dip_cells = np.clip(np.round(width / cell_size).astype(np.int64), 1, ndip)
+    plane_cell_counts = strike_cells * dip_cells
+    first_cells = np.cumsum(plane_cell_counts) - plane_cell_counts
+
+    plane_sizes = nstk * ndip
+    first_points = np.cumsum(plane_sizes) - plane_sizes
+    planes = np.repeat(np.arange(len(header)), plane_sizes)
+    plane_points = np.arange(plane_sizes.sum()) - first_points[planes]
+    strike_index = plane_points % nstk[planes]
+    dip_index = plane_points // nstk[planes]
+    cells = (
+        first_cells[planes]
+        + dip_index * dip_cells[planes] // ndip[planes] * strike_cells[planes]
+        + strike_index * strike_cells[planes] // nstk[planes]
+    )
+    return cells, int(plane_cell_counts.sum())
+
+
+def sample_rakes(
+    points: "pd.DataFrame",
+    header: "pd.DataFrame",
+    sample_size: int,
+    sampling: RakeSampling = RakeSampling.stratified,
+    seed: Optional[int] = None,
+) -> "pd.DataFrame":
+    """Choose the rake vectors to plot.
+
+    Parameters
+    ----------
+    points : pd.DataFrame
+        The SRF points, with lon, lat and rake columns, and a slip
+        column for `RakeSampling.mean`.
+    header : pd.DataFrame
+        The SRF plane headers.
+    sample_size : int
+        The number of vectors. The stratified samplers produce about
+        this many vectors, depending on how the planes divide into cells.
+    sampling : RakeSampling
+        How the vectors are chosen.
+    seed : Optional[int]
+        The random seed. `RakeSampling.random` draws from a
+        `np.random.RandomState`, reproducing the samples of older
+        versions, and `RakeSampling.stratified` from a
+        `np.random.Generator`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The lon, lat and rake of each vector.
+    """
+    import pandas as pd
+
+    if sampling == RakeSampling.random:
+        return points[["lon", "lat", "rake"]].sample(
+            sample_size, random_state=np.random.RandomState(seed)
+        )
+
+    cells, cell_count = plane_cells(header, sample_size)
+    if sampling == RakeSampling.stratified:
+        # The first subfault of each cell in a random order of the
+        # subfaults is a uniformly random choice from the cell.
+        order = np.random.default_rng(seed).permutation(len(cells))
+        _, first = np.unique(cells[order], return_index=True)
+        return points[["lon", "lat", "rake"]].iloc[np.sort(order[first])]
+
+    rake = np.radians(points["rake"].to_numpy(dtype=np.float64))
+    slip = points["slip"].to_numpy(dtype=np.float64)
+    cell_slip = np.bincount(cells, weights=slip, minlength=cell_count)
+    # Rakes are averaged as unit vectors so that, e.g., the mean of 179
+    # and -179 degrees is 180 degrees. Cells without slip are averaged
+    # without weights.
+    weights = np.where(cell_slip[cells] > 0, slip, 1.0)
+    subfault_counts = np.bincount(cells, minlength=cell_count)
+    return pd.DataFrame(
+        {
+            "lon": np.bincount(cells, weights=points["lon"], minlength=cell_count)
+            / subfault_counts,
+            "lat": np.bincount(cells, weights=points["lat"], minlength=cell_count)
+            / subfault_counts,
+            "rake": np.degrees(
+                np.arctan2(
+                    np.bincount(
+                        cells, weights=weights * np.sin(rake), minlength=cell_count
+                    ),
+                    np.bincount(
+                        cells, weights=weights * np.cos(rake), minlength=cell_count
+                    ),
+                )
+            ),
+        }
+    )
+
+
+@profiling.span("render")
+def render_rakes(
+    srf_data: "srf.SrfFile",
+    output_ffp: Path,
+    dpi: Optional[float] = None,
+    title: Optional[str] = None,
+    sample_size: Optional[int] = None,
+    vector_length: float = 0.2,
+    seed: Optional[int] = None,
+    width: float = 17,
+    preset: presets.RenderPreset = presets.FULL,
+    sampling: RakeSampling = RakeSampling.stratified,
 ) -> None:
-    """Plot a sample of rake values across a multi-segment rupture.
+    """Plot a sample of rake values across a multi-segment rupture from a loaded SRF.
 
     Parameters
     ----------
-    srf_ffp : Path
-        Path to the SRF file to plot.
+    srf_data : srf.SrfFile
+        The SRF to plot.
     output_ffp : Path
         Output plot image.
-    dpi : float
-        Plot output DPI (higher is better).
+    dpi : Optional[float]
+        Plot output DPI (higher is better), by default that of the preset.
     title : Optional[str]
         Plot title to use.
-    sample_size : int
-        Number of points to sample for rake.
+    sample_size : Optional[int]
+        Number of points to sample for rake, by default `SAMPLE_SIZE`
+        thinned out by the preset.
     vector_length : float
         Length of rake vectors (cm).
     seed : Optional[int]
         Random seed to sample rakes with.
     width : float
         Width of plot (in cm).
+    preset : presets.RenderPreset
+        The rendering preset.
+    sampling : RakeSampling
+        How the subfaults shown as rake vectors are chosen.
     """
-    srf_data = srf.read_srf(srf_ffp)
+    from pygmt_helper import plotting
+
     region = (
         srf_data.points["lon"].min() - 0.5,
         srf_data.points["lon"].max() + 0.5,
@@ -58,13 +206,25 @@ def plot_rakes(
     )
     i = 0
 
-    np.random.seed(seed)
-    vectors = srf_data.points[["lon", "lat", "rake"]].sample(sample_size)
-    vectors["rake"] = (vectors["rake"] + 90) % 360
-    vectors["length"] = vector_length
+    with profiling.span("compute"):
+        vectors = sample_rakes(
+            srf_data.points,
+            srf_data.header,
+            sample_size or preset.vector_count(SAMPLE_SIZE),
+            sampling,
+            seed,
+        )
 
     fig.plot(
-        data=vectors.values.tolist(), style="v0.1c+e+a30", pen="0.2p", fill="black"
+        x=vectors["lon"].to_numpy(),
+        y=vectors["lat"].to_numpy(),
+        direction=[
+            (vectors["rake"].to_numpy() + 90) % 360,
+            np.full(len(vectors), vector_length),
+        ],
+        style="v0.1c+e+a30",
+        pen="0.2p",
+        fill="black",
     )
     for _, segment in srf_data.header.iterrows():
         nstk = int(segment["nstk"])
@@ -80,11 +240,88 @@ def plot_rakes(
 
         i += point_count
 
-    fig.savefig(
-        output_ffp,
-        dpi=dpi,
-        anti_alias=True,
-    )
+    with profiling.span("save"):
+        fig.savefig(
+            output_ffp,
+            dpi=dpi or preset.dpi,
+            anti_alias=preset.anti_alias,
+        )
+
+
+@cli.from_docstring(app)
+def plot_rakes(
+    srf_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
+    dpi: Annotated[Optional[float], typer.Option()] = None,
+    title: Annotated[Optional[str], typer.Option()] = None,
+    sample_size: Annotated[Optional[int], typer.Option(min=1)] = None,
+    vector_length: Annotated[float, typer.Option()] = 0.2,
+    seed: Annotated[Optional[int], typer.Option()] = None,
+    width: Annotated[float, typer.Option(min=0)] = 17,
+    sampling: Annotated[RakeSampling, typer.Option()] = RakeSampling.stratified,
+    draft: Annotated[bool, typer.Option()] = False,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
+) -> None:
+    """Plot a sample of rake values across a multi-segment rupture.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file to plot.
+    output_ffp : Path
+        Output plot image.
+    dpi : Optional[float]
+        Plot output DPI (higher is better). Defaults to 300, or 100 for
+        draft plots.
+    title : Optional[str]
+        Plot title to use.
+    sample_size : Optional[int]
+        Number of points to sample for rake. Defaults to 200, or 100 for
+        draft plots.
+    vector_length : float
+        Length of rake vectors (cm).
+    seed : Optional[int]
+        Random seed to sample rakes with.
+    width : float
+        Width of plot (in cm).
+    sampling : RakeSampling
+        How the subfaults shown as rake vectors are chosen: one random
+        subfault (stratified) or the slip-weighted mean rake (mean) of
+        each cell of a coarse grid over each plane, or subfaults drawn
+        at random from the whole rupture (random).
+    draft : bool
+        If set, render a quick-look plot with low DPI, no
+        anti-aliasing and fewer rake vectors.
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
+    """
+    from visualisation import srf_cache
+
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        render_rakes(
+            srf_cache.read_srf(srf_ffp, SRF_COLUMNS, slip=False),
+            output_ffp,
+            dpi=dpi,
+            title=title,
+            sample_size=sample_size,
+            vector_length=vector_length,
+            seed=seed,
+            width=width,
+            preset=presets.render_preset(draft),
+            sampling=sampling,
+        )
 
 
 if __name__ == "__main__":
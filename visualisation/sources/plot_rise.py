@@ -1,53 +1,58 @@
 """Plot multi-segment rupture with rise."""
 
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import typer
 
-from pygmt_helper import plotting
 from qcore import cli
-from source_modelling import srf
+from visualisation import presets, profiling
+
+if TYPE_CHECKING:
+    from source_modelling import srf
 
 app = typer.Typer()
 
+SRF_COLUMNS = frozenset({"lon", "lat", "tinit", "rise"})
 
-@cli.from_docstring(app)
-def plot_rise(
-    srf_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
-    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
-    dpi: Annotated[float, typer.Option()] = 300,
-    title: Annotated[Optional[str], typer.Option()] = None,
-    width: Annotated[float, typer.Option(min=0)] = 17,
+
+@profiling.span("render")
+def render_rise_map(
+    srf_data: "srf.SrfFile",
+    output_ffp: Path,
+    dpi: Optional[float] = None,
+    title: Optional[str] = None,
+    width: float = 17,
+    preset: presets.RenderPreset = presets.FULL,
 ) -> None:
-    """Plot multi-segment rupture with rise.
+    """Plot multi-segment rupture with rise from a loaded SRF.
 
     Parameters
     ----------
-    srf_ffp : Path
-        Path to SRF file to plot.
+    srf_data : srf.SrfFile
+        The SRF to plot.
     output_ffp : Path
         Output plot image.
-    dpi : float
-        Plot output DPI (higher is better).
+    dpi : Optional[float]
+        Plot output DPI (higher is better), by default that of the preset.
     title : Optional[str]
         Plot title to use.
     width : float
         Width of plot (in cm).
+    preset : presets.RenderPreset
+        The rendering preset.
     """
-    srf_data = srf.read_srf(srf_ffp)
+    from pygmt_helper import plotting
+    from visualisation import gridding
+
     region = (
         srf_data.points["lon"].min() - 0.5,
         srf_data.points["lon"].max() + 0.5,
         srf_data.points["lat"].min() - 0.25,
         srf_data.points["lat"].max() + 0.25,
     )
-    srf_slip = srf_data.slip
-
-    srf_data.points["trise"] = (
-        srf_slip.indptr[1:] - srf_slip.indptr[:-1]
-    ) * srf_data.points["dt"]
-    trise_cb_max = srf_data.points["trise"].max()
+    # The rise column is nt * dt, so the slip time function is not required.
+    trise_cb_max = srf_data.points["rise"].max()
     cmap_limits = (0, trise_cb_max, trise_cb_max / 10)
 
     fig = plotting.gen_region_fig(
@@ -55,50 +60,35 @@ def plot_rise(
     )
 
     for i, segment_points in enumerate(srf_data.segments):
-        cur_grid = plotting.create_grid(
-            segment_points,
-            "trise",
-            grid_spacing="5e/5e",
-            region=(
-                segment_points["lon"].min(),
-                segment_points["lon"].max(),
-                segment_points["lat"].min(),
-                segment_points["lat"].max(),
-            ),
-            set_water_to_nan=False,
-        )
-        plotting.plot_grid(
-            fig,
-            cur_grid,
-            "hot",
-            cmap_limits,
-            ("white", "black"),
-            transparency=0,
-            reverse_cmap=True,
-            plot_contours=False,
-            cb_label="trise",
-            continuous_cmap=True,
-        )
-        time_grid = plotting.create_grid(
-            segment_points,
-            "tinit",
-            grid_spacing="5e/5e",
-            region=(
-                segment_points["lon"].min(),
-                segment_points["lon"].max(),
-                segment_points["lat"].min(),
-                segment_points["lat"].max(),
-            ),
-            set_water_to_nan=False,
-        )
-        fig.grdcontour(
-            levels=0.5,
-            annotation=1,
-            grid=time_grid,
-            pen="0.1p",
-        )
         nstk = srf_data.header["nstk"].iloc[i]
         ndip = srf_data.header["ndip"].iloc[i]
+        grids = gridding.create_grids(
+            segment_points,
+            ["rise", "tinit"],
+            grid_spacing=preset.grid_spacing,
+            region=gridding.segment_region(segment_points),
+            plane_shape=(nstk, ndip),
+        )
+        with profiling.span("render:grdimage"):
+            plotting.plot_grid(
+                fig,
+                grids["rise"],
+                "hot",
+                cmap_limits,
+                ("white", "black"),
+                transparency=0,
+                reverse_cmap=True,
+                plot_contours=False,
+                cb_label="trise",
+                continuous_cmap=True,
+            )
+        with profiling.span("render:grdcontour"):
+            fig.grdcontour(
+                levels=0.5 * preset.contour_interval,
+                annotation=preset.contour_interval,
+                grid=grids["tinit"],
+                pen="0.1p",
+            )
         corners = segment_points.iloc[[0, nstk - 1, -1, (ndip - 1) * nstk]]
         fig.plot(
             x=corners["lon"].iloc[list(range(len(corners))) + [0]].to_list(),
@@ -106,11 +96,68 @@ def plot_rise(
             pen="0.5p,black,-",
         )
 
-    fig.savefig(
-        output_ffp,
-        dpi=dpi,
-        anti_alias=True,
-    )
+    with profiling.span("save"):
+        fig.savefig(
+            output_ffp,
+            dpi=dpi or preset.dpi,
+            anti_alias=preset.anti_alias,
+        )
+
+
+@cli.from_docstring(app)
+def plot_rise(
+    srf_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
+    dpi: Annotated[Optional[float], typer.Option()] = None,
+    title: Annotated[Optional[str], typer.Option()] = None,
+    width: Annotated[float, typer.Option(min=0)] = 17,
+    draft: Annotated[bool, typer.Option()] = False,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
+) -> None:
+    """Plot multi-segment rupture with rise.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to SRF file to plot.
+    output_ffp : Path
+        Output plot image.
+    dpi : Optional[float]
+        Plot output DPI (higher is better). Defaults to 300, or 100 for
+        draft plots.
+    title : Optional[str]
+        Plot title to use.
+    width : float
+        Width of plot (in cm).
+    draft : bool
+        If set, render a quick-look plot with low DPI, coarse grids,
+        fewer time contours and no anti-aliasing.
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
+    """
+    from visualisation import srf_cache
+
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        render_rise_map(
+            srf_cache.read_srf(srf_ffp, SRF_COLUMNS, slip=False),
+            output_ffp,
+            dpi=dpi,
+            title=title,
+            width=width,
+            preset=presets.render_preset(draft),
+        )
 
 
 if __name__ == "__main__":
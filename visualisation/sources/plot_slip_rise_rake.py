@@ -1,33 +1,32 @@
-#!/usr/bin/env python3
 """Plot slip-rise-rake for segments."""
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from enum import StrEnum
+from itertools import repeat
 from pathlib import Path
-from typing import Annotated, NamedTuple, Optional
+from typing import TYPE_CHECKING, Annotated, Any, Literal, NamedTuple, Optional
 
-import geopandas as gpd
-import matplotlib
 import numpy as np
-import pandas as pd
-import pooch
-import shapely
 import typer
-from matplotlib import pyplot as plt
-from pooch import Unzip
 
-from qcore import cli, coordinates
-from source_modelling import rupture_propagation, srf
-from source_modelling.sources import Fault
-from visualisation import utils
-from workflow.realisations import RupturePropagationConfig, SourceConfig
+from qcore import cli
+from visualisation import presets, profiling, utils
+from visualisation.realisation import read_realisation
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+    from matplotlib import pyplot as plt
+    from matplotlib.figure import Figure
+    from matplotlib.gridspec import GridSpec
+    from matplotlib.image import AxesImage
+
+    from source_modelling import srf
+    from visualisation.realisation import Realisation
 
 app = typer.Typer()
 
-# Path on Dropbox: QuakeCoRE/Public/PlottingData/Topo/lds-nz-coastlines-and-islands-polygons-topo-150k-SHP.zip
-NZ_SHP_HIGHRES = "https://www.dropbox.com/scl/fi/oal7iuvvmsmheyod8csc7/lds-nz-coastlines-and-islands-polygons-topo-150k-SHP.zip?rlkey=abnebsm06z4l5hx0jd7m1406c&st=klxhet56&dl=1"
-NZ_SHP_HIGHRES_HASH = (
-    "sha256:4c9547aab7d868f11b0cac4b85eafa4111d104a944d0603c4d77a6af2983108c"
-)
+SRF_COLUMNS = frozenset({"slip", "tinit", "rise", "rake"})
 
 PLOT_CONFIG = {
     "font.size": 14,
@@ -38,6 +37,14 @@ PLOT_CONFIG = {
     "legend.fontsize": 12,
     "figure.titlesize": 18,
 }
+ALL_SEGMENTS = "all"
+SUBPLOT_PARAMS = ("left", "right", "bottom", "top", "wspace", "hspace")
+# Pixels of margin kept around a panel rendered by a worker process.
+PANEL_PADDING = 4
+# Fault grids with more values than this (e.g. 200 by 500 subfaults)
+# are drawn as images by default, as filled contours of them are slow
+# to draw and very large in vector output.
+RASTER_THRESHOLD = 100_000
 
 
 def create_grid(
@@ -64,8 +71,53 @@ def create_grid(
     return np.meshgrid(x, y)
 
 
+def plot_raster(
+    ax: "plt.Axes",
+    data: np.ndarray,
+    length: float,
+    width: float,
+    levels: np.ndarray,
+    cmap: str,
+) -> "AxesImage":
+    """Plot a grid as an image coloured like filled contours of it.
+
+    Parameters
+    ----------
+    ax : plt.Axes
+        Matplotlib axis to plot on.
+    data : np.ndarray
+        Data to plot, with the top row at zero width.
+    length : float
+        Segment length in km.
+    width : float
+        Segment width in km.
+    levels : np.ndarray
+        Contour levels, at least two and increasing.
+    cmap : str
+        Colormap to use.
+
+    Returns
+    -------
+    AxesImage
+        The image, with one colour for each band between contour
+        levels, as `ax.contourf` would colour it.
+    """
+    from matplotlib import colormaps, colors
+
+    bands = (levels[:-1] + levels[1:]) / 2
+    band_colours = colormaps[cmap](colors.Normalize(levels[0], levels[-1])(bands))
+    return ax.imshow(
+        data,
+        cmap=colors.ListedColormap(band_colours),
+        norm=colors.BoundaryNorm(levels, len(bands)),
+        extent=(0, length, width, 0),
+        aspect="auto",
+        interpolation="nearest",
+    )
+
+
 def plot_contour(
-    ax: plt.Axes,
+    ax: "plt.Axes",
     data: np.ndarray,
     length: float,
     width: float,
@@ -78,6 +130,7 @@ def plot_contour(
     extra_contour_levels: np.ndarray = None,
     extra_contour_color: str = "black",
     summary: bool = True,
+    raster: bool = False,
 ) -> None:
     """Plot a filled contour plot with optional additional contour lines.
 
@@ -109,10 +162,19 @@ def plot_contour(
         Color for additional contours, by default "black".
     summary : bool, optional
         If True, include a summary text box, by default True.
+    raster : bool, optional
+        If True, draw the filled contours as an image (see
+        `plot_raster`), which is much faster for fine grids and keeps
+        vector output small. By default False.
     """
     x, y = create_grid(data, length, width)
-    contours = ax.contourf(x, y, data, cmap=cmap, levels=levels)
-    plt.colorbar(contours, ax=ax, label=label)
+    if raster:
+        with profiling.span("render:raster"):
+            contours = plot_raster(ax, data, length, width, levels, cmap)
+    else:
+        with profiling.span("render:contourf"):
+            contours = ax.contourf(x, y, data, cmap=cmap, levels=levels)
+    ax.figure.colorbar(contours, ax=ax, label=label)
     ax.set_ylim(width, 0)
     ax.set_title(title)
 
@@ -140,13 +202,14 @@ def plot_contour(
 
 
 def plot_slip(
-    ax: plt.Axes,
+    ax: "plt.Axes",
     tinit: np.ndarray,
     slip: np.ndarray,
     length: float,
     width: float,
     levels: np.ndarray,
     t_levels: Optional[np.ndarray | int] = 15,
+    raster: bool = False,
 ) -> None:
     """Plot slip distribution with optional initial time contours.
 
@@ -166,8 +229,11 @@ def plot_slip(
         Contour levels for slip.
     t_levels : Optional[np.ndarray | int], optional
         Contour levels for initial time, by default None.
+    raster : bool, optional
+        If True, draw slip as an image rather than filled contours. The
+        initial time contours are still drawn as lines.
     """
-    hypocentre_index = np.argmin(tinit.ravel())
+    hypocentre_index = np.nanargmin(tinit)
     hypocentre_y, hypocentre_x = np.unravel_index(hypocentre_index, tinit.shape)
     plot_contour(
         ax,
@@ -181,6 +247,7 @@ def plot_slip(
         extra_contour_data=tinit,
         extra_contour_levels=t_levels,
         extra_contour_color="black",
+        raster=raster,
     )
     ax.scatter(
         hypocentre_x * length / tinit.shape[1],
@@ -193,7 +260,12 @@ def plot_slip(
 
 
 def plot_rise(
-    ax: plt.Axes, rise_time: np.ndarray, length: float, width: float, levels: np.ndarray
+    ax: "plt.Axes",
+    rise_time: np.ndarray,
+    length: float,
+    width: float,
+    levels: np.ndarray,
+    raster: bool = False,
 ) -> None:
     """Plot rise distribution as a contour plot.
 
@@ -209,6 +281,8 @@ def plot_rise(
         Segment width in km.
     levels : np.ndarray
         Contour levels for rise.
+    raster : bool, optional
+        If True, draw rise as an image rather than filled contours.
     """
     plot_contour(
         ax,
@@ -219,11 +293,12 @@ def plot_rise(
         cmap="cool",
         label="Rise Time (s)",
         title="Rise Time",
+        raster=raster,
     )
 
 
 def plot_rake(
-    ax: plt.Axes,
+    ax: "plt.Axes",
     rake: np.ndarray,
     slip: np.ndarray,
     length: float,
@@ -267,7 +342,7 @@ def plot_rake(
     ax.set_ylabel("W (km)")
 
 
-def plot_map(ax: plt.Axes, geometry: gpd.GeoDataFrame) -> None:
+def plot_map(ax: "plt.Axes", geometry: "gpd.GeoDataFrame") -> None:
     """Plot segment geometry on a map of New Zealand.
 
     Parameters
@@ -277,21 +352,16 @@ def plot_map(ax: plt.Axes, geometry: gpd.GeoDataFrame) -> None:
     geometry : gpd.GeoDataFrame
         Geometry to plot.
     """
-    nz = gpd.read_file(
-        next(
-            file
-            for file in pooch.retrieve(
-                NZ_SHP_HIGHRES, known_hash=NZ_SHP_HIGHRES_HASH, processor=Unzip()
-            )
-            if file.endswith("shp")
-        )
-    )
+    from visualisation import coastline
 
-    nz.plot(ax=ax, color="lightgrey")
     xmin, ymin, xmax, ymax = geometry.total_bounds
     pad = 0.5  # add a padding around the geometry
-    ax.set_xlim(xmin - pad, xmax + pad)
-    ax.set_ylim(ymin - pad, ymax + pad)
+    bounds = (xmin - pad, ymin - pad, xmax + pad, ymax + pad)
+    with profiling.span("load:coastline"):
+        coast_polygons = coastline.read_coastline(bounds)
+    coast_polygons.plot(ax=ax, color="lightgrey")
+    ax.set_xlim(bounds[0], bounds[2])
+    ax.set_ylim(bounds[1], bounds[3])
     geometry["coords"] = geometry["geometry"].apply(
         lambda x: x.representative_point().coords[:]
     )
@@ -309,7 +379,7 @@ def plot_map(ax: plt.Axes, geometry: gpd.GeoDataFrame) -> None:
     ax.set_aspect("auto")  # Allow the plot to stretch vertically
 
 
-def plot_slip_histogram(ax: plt.Axes, slip: np.ndarray, summary: bool = True) -> None:
+def plot_slip_histogram(ax: "plt.Axes", slip: np.ndarray, summary: bool = True) -> None:
     """Plot slip histogram.
 
     Parameters
@@ -334,110 +404,495 @@ def plot_slip_histogram(ax: plt.Axes, slip: np.ndarray, summary: bool = True) ->
         )
 
 
-class FaultData(NamedTuple):
-    """Fault data tuple returned by `extract_fault_data`."""
+class PlotType(StrEnum):
+    """Plot type to use."""
+
+    slip = "slip"
+    rise = "rise"
+    rake = "rake"
+    distribution = "dist"
+
+
+class PanelBackend(StrEnum):
+    """How slip and rise time panels are drawn."""
 
-    faults: list[Fault]
-    slip: list[np.ndarray]
-    tinit: list[np.ndarray]
-    rise: list[np.ndarray]
-    rake: list[np.ndarray]
+    auto = "auto"
+    contour = "contour"
+    raster = "raster"
 
 
-def extract_fault_data(
-    headers: pd.DataFrame,
-    segments: list[pd.DataFrame],
-    sources: SourceConfig,
-    rup_prop: RupturePropagationConfig,
-) -> FaultData:
-    """Extract fault arrays for plotting.
+def use_raster(
+    backend: PanelBackend, grid_size: int, raster_threshold: int = RASTER_THRESHOLD
+) -> bool:
+    """Choose whether to draw slip and rise time panels as images.
 
     Parameters
     ----------
-    headers : pd.DataFrame
-        DataFrame containing fault segment metadata.
-    segments : list[pd.DataFrame]
-        List of DataFrames with segment-specific data.
-    sources : SourceConfig
-        Configuration containing source geometries.
-    rup_prop : RupturePropagationConfig
-        Configuration containing rupture causality tree.
+    backend : PanelBackend
+        The backend to use. The auto backend draws images if the grid
+        is larger than `raster_threshold`, and filled contours otherwise.
+    grid_size : int
+        The number of grid values of the largest fault.
+    raster_threshold : int
+        The grid size above which the auto backend draws images.
 
     Returns
     -------
-    FaultData
-        The fault data extracted from the SRF.
+    bool
+        True if the panels are drawn as images.
     """
-    faults, slip, tinit, rise, rake = [], [], [], [], []
-    fault_names = rupture_propagation.tree_nodes_in_order(
-        rup_prop.rupture_causality_tree
-    )
-    index = 0
-
-    for fault_name in fault_names:
-        fault = sources.source_geometries[fault_name]
-        ndip = int(headers["ndip"].iloc[index])
-
-        def segment_data(key: str) -> np.ndarray:
-            return np.hstack(
-                [
-                    segments[i][key].values.reshape(ndip, -1)
-                    for i in range(index, index + len(fault.planes))
-                ]
+    if backend == PanelBackend.auto:
+        return grid_size > raster_threshold
+    return backend == PanelBackend.raster
+
+
+PANEL_NAMES = {PlotType.distribution: "Slip distrubition"}
+
+
+class FaultPanel(NamedTuple):
+    """The data and settings of the panel of one fault."""
+
+    plot_type: PlotType
+    """The type of plot of the panel."""
+    fault: int
+    """The fault number."""
+    slip: np.ndarray
+    """The slip grid of the fault."""
+    tinit: np.ndarray
+    """The rupture time grid of the fault."""
+    rise: np.ndarray
+    """The rise time grid of the fault."""
+    rake: np.ndarray
+    """The rake grid of the fault."""
+    slip_values: np.ndarray
+    """The slip of each subfault of the fault."""
+    length: float
+    """The length of the fault (km)."""
+    width: float
+    """The width of the fault (km)."""
+    slip_levels: np.ndarray
+    """The contour levels of slip."""
+    rise_levels: np.ndarray
+    """The contour levels of rise time."""
+    time_levels: int
+    """The number of rupture time contours."""
+    rake_norm: float
+    """The scale of rake vectors."""
+    rake_stride: int
+    """The sampling stride of rake vectors."""
+    raster: bool
+    """If True, slip and rise time are drawn as images rather than
+    filled contours."""
+
+
+class PanelLayout(NamedTuple):
+    """The layout of the fault panels of a figure."""
+
+    figsize: tuple[float, float]
+    """The size of the figure (inches)."""
+    rows: int
+    """The number of rows of fault panels."""
+    cols: int
+    """The number of columns of fault panels."""
+    overview: bool
+    """If True, the figure has a column for the overview map."""
+    rc_params: dict[str, Any]
+    """The matplotlib settings of the figure."""
+
+    def gridspec(self, fig: "Figure") -> "GridSpec":
+        """Add the grid of the fault panels and overview map to a figure.
+
+        Parameters
+        ----------
+        fig : Figure
+            The figure.
+
+        Returns
+        -------
+        GridSpec
+            The grid, with the overview map in the last column.
+        """
+        # The overview map takes a column as wide as the segment panels.
+        if self.overview:
+            return fig.add_gridspec(
+                self.rows, self.cols + 1, width_ratios=[1] * self.cols + [self.cols]
             )
+        return fig.add_gridspec(self.rows, self.cols)
 
-        slip.append(segment_data("slip"))
-        tinit.append(segment_data("tinit"))
-        rise.append(segment_data("rise"))
-        rake.append(segment_data("rake"))
-        faults.append(fault)
-        index += len(fault.planes)
+    def cell(self, fault: int) -> tuple[int, int]:
+        """Find the grid cell of the panel of a fault.
 
-    return faults, slip, tinit, rise, rake
+        Parameters
+        ----------
+        fault : int
+            The fault number.
 
+        Returns
+        -------
+        tuple[int, int]
+            The row and column of the panel.
+        """
+        return np.unravel_index(fault, (self.rows, self.cols))
 
-class PlotType(StrEnum):
-    """Plot type to use."""
 
-    slip = "slip"
-    rise = "rise"
-    rake = "rake"
-    distribution = "dist"
+def draw_fault_panel(ax: "plt.Axes", panel: FaultPanel) -> None:
+    """Draw the panel of a fault.
+
+    Parameters
+    ----------
+    ax : plt.Axes
+        Matplotlib axis to plot on.
+    panel : FaultPanel
+        The panel to draw.
+    """
+    match panel.plot_type:
+        case PlotType.slip:
+            plot_slip(
+                ax,
+                panel.tinit,
+                panel.slip,
+                panel.length,
+                panel.width,
+                panel.slip_levels,
+                t_levels=panel.time_levels,
+                raster=panel.raster,
+            )
+        case PlotType.rise:
+            plot_rise(
+                ax,
+                panel.rise,
+                panel.length,
+                panel.width,
+                panel.rise_levels,
+                raster=panel.raster,
+            )
+        case PlotType.rake:
+            plot_rake(
+                ax,
+                panel.rake,
+                panel.slip,
+                panel.length,
+                panel.width,
+                panel.rake_norm,
+                stride=panel.rake_stride,
+            )
+        case PlotType.distribution:
+            plot_slip_histogram(ax, panel.slip_values)
+    name = PANEL_NAMES.get(panel.plot_type, panel.plot_type)
+    ax.set_title(f"{name.capitalize()} on segment {panel.fault + 1}")
 
 
-@cli.from_docstring(app)
-def plot_slip_rise_rake(
-    realisation_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
-    srf_ffp: Annotated[
-        Path,
-        typer.Argument(exists=True, dir_okay=False),
-    ],
-    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
-    dpi: Annotated[float, typer.Option()] = 300,
-    title: Annotated[Optional[str], typer.Option()] = None,
-    width: Annotated[float, typer.Option(min=0)] = 10,
-    height: Annotated[float, typer.Option(min=0)] = 10,
-    plot_type: Annotated[
-        PlotType,
-        typer.Option(),
-    ] = PlotType.slip,
-    segment: Annotated[
-        Optional[int],
-        typer.Option(),
-    ] = None,
+def current_rc_params() -> dict[str, Any]:
+    """Find the matplotlib settings to pass to worker processes.
+
+    Returns
+    -------
+    dict[str, Any]
+        The current matplotlib settings, except the backend.
+    """
+    import matplotlib
+
+    return {
+        key: value for key, value in matplotlib.rcParams.items() if key != "backend"
+    }
+
+
+def segment_output_ffp(output_ffp: Path, segment: int) -> Path:
+    """Find the output path of the summary of one segment of many.
+
+    Parameters
+    ----------
+    output_ffp : Path
+        The output path given for the summaries.
+    segment : int
+        The segment number (starting from 1).
+
+    Returns
+    -------
+    Path
+        The output path with the segment number appended to its name,
+        e.g. ``plot_segment_1.png`` for ``plot.png``.
+    """
+    return output_ffp.with_stem(f"{output_ffp.stem}_segment_{segment}")
+
+
+def render_segment_summary(
+    panel: FaultPanel,
+    output_ffp: Path,
+    figsize: tuple[float, float],
+    dpi: float,
+    rc_params: dict[str, Any],
 ) -> None:
-    """Plot slip-rise-rake for segments.
+    """Plot the slip, rise time, rake and slip density of one fault.
 
     Parameters
     ----------
-    realisation_ffp : Path
-        Path to ralisation file.
-    srf_ffp : Path
-        Path to SRF file to plot.
+    panel : FaultPanel
+        The data of the fault. The plot type of the panel is ignored.
     output_ffp : Path
         Output plot image.
+    figsize : tuple[float, float]
+        The size of the figure (inches).
+    dpi : float
+        Plot output DPI.
+    rc_params : dict[str, Any]
+        The matplotlib settings of the figure.
+    """
+    import matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    segment = panel.fault + 1
+    with matplotlib.rc_context(rc_params):
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(4)
+        plot_slip(
+            axes[0],
+            panel.tinit,
+            panel.slip,
+            panel.length,
+            panel.width,
+            panel.slip_levels,
+            t_levels=panel.time_levels,
+            raster=panel.raster,
+        )
+        axes[0].set_title(f"Slip (cm) on Segment {segment}")
+        plot_rise(
+            axes[1],
+            panel.rise,
+            panel.length,
+            panel.width,
+            panel.rise_levels,
+            raster=panel.raster,
+        )
+        axes[1].set_title(f"Rise Time (s) on Segment {segment}")
+        plot_rake(
+            axes[2],
+            panel.rake,
+            panel.slip,
+            panel.length,
+            panel.width,
+            panel.rake_norm,
+            stride=panel.rake_stride,
+        )
+        axes[2].set_title(f"Rake on Segment {segment}")
+        plot_slip_histogram(axes[3], panel.slip_values, summary=False)
+        axes[3].set_title(f"Slip Density on Segment {segment}")
+        fig.tight_layout()
+        with profiling.span("save"):
+            fig.savefig(output_ffp, dpi=dpi)
+
+
+def _panel_figure(panel: FaultPanel, layout: PanelLayout) -> "Figure":
+    """Draw the panel of a fault alone in its cell of a figure.
+
+    Parameters
+    ----------
+    panel : FaultPanel
+        The panel to draw.
+    layout : PanelLayout
+        The layout of the figure.
+
+    Returns
+    -------
+    Figure
+        A figure, of the size of the whole plot, holding only the panel.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=layout.figsize)
+    FigureCanvasAgg(fig)
+    gs = layout.gridspec(fig)
+    draw_fault_panel(fig.add_subplot(gs[layout.cell(panel.fault)]), panel)
+    return fig
+
+
+def fault_panel_extent(
+    panel: FaultPanel, layout: PanelLayout
+) -> tuple[float, float, float, float]:
+    """Find the extent of the panel of a fault, before layout.
+
+    Parameters
+    ----------
+    panel : FaultPanel
+        The panel.
+    layout : PanelLayout
+        The layout of the figure.
+
+    Returns
+    -------
+    tuple[float, float, float, float]
+        The extent of the panel and its labels and colorbar used to lay
+        out the figure (left, bottom, right and top, in figure
+        coordinates).
+    """
+    import matplotlib
+    from matplotlib.transforms import Bbox
+
+    with matplotlib.rc_context(layout.rc_params):
+        fig = _panel_figure(panel, layout)
+        renderer = fig.canvas.get_renderer()
+        # The extent the figure is laid out with, which as in
+        # `Figure.tight_layout` ignores the width of x axis labels.
+        bbox = Bbox.union(
+            [ax.get_tightbbox(renderer, for_layout_only=True) for ax in fig.axes]
+        )
+        return tuple(bbox.transformed(fig.transFigure.inverted()).extents)
+
+
+def render_fault_panel(
+    panel: FaultPanel,
+    layout: PanelLayout,
+    subplot_params: dict[str, float],
+    dpi: float,
+) -> tuple[np.ndarray, int, int]:
+    """Render the panel of a fault at its place in the laid out figure.
+
+    Parameters
+    ----------
+    panel : FaultPanel
+        The panel.
+    layout : PanelLayout
+        The layout of the figure.
+    subplot_params : dict[str, float]
+        The subplot parameters of the laid out figure.
     dpi : float
-        Plot output DPI (higher is better).
+        The output DPI of the figure.
+
+    Returns
+    -------
+    np.ndarray
+        The RGBA pixels of the panel on a transparent background, top
+        row first.
+    int
+        The column of the figure of the left of the pixels.
+    int
+        The row of the figure (from the bottom) of the bottom of the pixels.
+    """
+    import matplotlib
+    from matplotlib.transforms import Bbox
+
+    with matplotlib.rc_context(layout.rc_params):
+        fig = _panel_figure(panel, layout)
+        fig.subplots_adjust(**subplot_params)
+        fig.set_dpi(dpi)
+        # Labels of crowded panels can overlap their neighbours, which
+        # must show through the background of the panel.
+        fig.patch.set_alpha(0)
+        fig.canvas.draw()
+        renderer = fig.canvas.get_renderer()
+        bbox = Bbox.union([ax.get_tightbbox(renderer) for ax in fig.axes])
+        pixels = np.asarray(fig.canvas.buffer_rgba())
+    height, width = pixels.shape[:2]
+    left, bottom, right, top = bbox.padded(PANEL_PADDING).extents
+    left, bottom = max(int(np.floor(left)), 0), max(int(np.floor(bottom)), 0)
+    right, top = min(int(np.ceil(right)), width), min(int(np.ceil(top)), height)
+    return pixels[height - top : height - bottom, left:right].copy(), left, bottom
+
+
+def composite_fault_panels(
+    fig: "Figure",
+    gs: "GridSpec",
+    panels: list[FaultPanel],
+    layout: PanelLayout,
+    dpi: float,
+    workers: Optional[int] = None,
+) -> None:
+    """Render fault panels in worker processes and composite them.
+
+    Each panel is drawn alone in a figure of the size of the plot, first
+    to find the extent of its labels and colorbar. The figure is laid
+    out as if it held the panels, then each panel is rendered at its
+    laid out position at the output DPI, and its pixels are placed on
+    the figure, which then looks as if the panels were drawn in it.
+
+    Parameters
+    ----------
+    fig : Figure
+        The figure, holding any other axes.
+    gs : GridSpec
+        The grid of the figure (see `PanelLayout.gridspec`).
+    panels : list[FaultPanel]
+        The panels to render.
+    layout : PanelLayout
+        The layout of the figure.
+    dpi : float
+        The output DPI of the figure.
+    workers : Optional[int]
+        The number of worker processes, by default one per CPU.
+    """
+    from matplotlib.patches import Rectangle
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers or os.cpu_count(), len(panels))
+    ) as executor:
+        extents = executor.map(fault_panel_extent, panels, repeat(layout))
+        # Empty axes covering the extent of each panel stand in for the
+        # panels while the figure is laid out.
+        proxies = []
+        for panel, (left, bottom, right, top) in zip(panels, extents):
+            proxy = fig.add_subplot(gs[layout.cell(panel.fault)])
+            proxy.set_axis_off()
+            proxy.add_artist(
+                Rectangle(
+                    (left, bottom),
+                    right - left,
+                    top - bottom,
+                    transform=fig.transFigure,
+                    fill=False,
+                    linewidth=0,
+                    clip_on=False,
+                )
+            )
+            proxies.append(proxy)
+        fig.tight_layout()
+        for proxy in proxies:
+            proxy.remove()
+
+        subplot_params = {
+            name: getattr(fig.subplotpars, name) for name in SUBPLOT_PARAMS
+        }
+        for pixels, left, bottom in executor.map(
+            render_fault_panel,
+            panels,
+            repeat(layout),
+            repeat(subplot_params),
+            repeat(dpi),
+        ):
+            fig.figimage(pixels, left, bottom, origin="upper")
+
+
+@profiling.span("render")
+def render_slip_rise_rake(
+    srf_data: "srf.SrfFile",
+    realisation: "Realisation",
+    output_ffp: Path,
+    dpi: Optional[float] = None,
+    title: Optional[str] = None,
+    width: float = 10,
+    height: float = 10,
+    plot_type: PlotType = PlotType.slip,
+    segment: Optional[int | Literal["all"]] = None,
+    preset: presets.RenderPreset = presets.FULL,
+    parallel: bool = False,
+    workers: Optional[int] = None,
+    backend: PanelBackend = PanelBackend.auto,
+    raster_threshold: int = RASTER_THRESHOLD,
+) -> None:
+    """Plot slip-rise-rake for segments from a loaded SRF.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF to plot.
+    realisation : Realisation
+        The realisation the SRF was generated from.
+    output_ffp : Path
+        Output plot image.
+    dpi : Optional[float]
+        Plot output DPI (higher is better), by default that of the preset.
     title : Optional[str]
         Plot title to use.
     width : float
@@ -446,103 +901,140 @@ def plot_slip_rise_rake(
         Plot height (cm).
     plot_type : PlotType
         Type of plot to generate.
-    segment : int, optional
-        The segment to plot, default will plot all segments.
+    segment : int or "all", optional
+        The segment to summarise, default will plot all segments in one
+        figure. If "all", the summary of each segment is written to its
+        own file (see `segment_output_ffp`).
+    preset : presets.RenderPreset
+        The rendering preset, setting the number of contour levels and
+        rake vectors, anti-aliasing and whether the overview map is drawn.
+    parallel : bool
+        If True, render the panels of each segment (see
+        `composite_fault_panels`), or the summary of each segment, in
+        worker processes.
+    workers : Optional[int]
+        The number of worker processes of a parallel render, by default
+        one per CPU.
+    backend : PanelBackend
+        How to draw slip and rise time (see `use_raster`). The choice
+        is made once for the whole rupture, from its largest fault.
+    raster_threshold : int
+        The fault grid size above which the auto backend draws slip and
+        rise time as images.
     """
+    import geopandas as gpd
+    import matplotlib
+    import shapely
+    from matplotlib import pyplot as plt
+
+    from qcore import coordinates
+    from visualisation.fault_grid import FaultGrid
+    from visualisation.fault_index import FaultPointIndex
+
     matplotlib.rcParams.update(matplotlib.rcParamsDefault)
-    srf_data = srf.read_srf(srf_ffp)
+    if not preset.anti_alias:
+        matplotlib.rcParams.update(
+            {
+                "lines.antialiased": False,
+                "patch.antialiased": False,
+                "text.antialiased": False,
+            }
+        )
     centimeters = 1 / 2.54
 
-    headers = srf_data.header
-    segments = srf_data.segments
-    sources = SourceConfig.read_from_realisation(realisation_ffp)
-    rup_prop = RupturePropagationConfig.read_from_realisation(realisation_ffp)
-
-    faults, slip, tinit, rise, rake = extract_fault_data(
-        headers, segments, sources, rup_prop
+    sources = realisation.source_config
+    fault_index = FaultPointIndex.from_realisation(realisation, srf_data.header)
+    with profiling.span("grid"):
+        grid = FaultGrid.from_srf(
+            srf_data.points, srf_data.header, fault_index, SRF_COLUMNS
+        )
+    faults = [
+        sources.source_geometries[fault_name] for fault_name in fault_index.fault_names
+    ]
+    slip, tinit, rise, rake = (
+        [grid.fault(field, i) for i in range(grid.fault_count)]
+        for field in ("slip", "tinit", "rise", "rake")
     )
+    # The axes span the realisation's fault geometry, of which the SRF
+    # header lengths and widths are a rounded copy.
+    lengths = [fault.length for fault in faults]
+    widths = [fault.width for fault in faults]
+
+    global_slip_max = grid.maxima["slip"]
+    global_rise_max = grid.maxima["rise"]
 
-    global_slip_max = max(segment["slip"].max() for segment in srf_data.segments)
-    global_rise_max = max(segment["rise"].max() for segment in srf_data.segments)
+    slip_levels = np.linspace(0, global_slip_max, num=preset.level_count(20))
+    rise_levels = np.linspace(0, global_rise_max, num=preset.level_count(20))
+    time_levels = preset.level_count(15)
+    rake_stride = 3 * preset.decimation
 
     rows = int(np.ceil(np.sqrt(len(faults))))
     cols = int(np.ceil(len(faults) / rows))
+    figsize = (width * centimeters, height * centimeters)
+    raster = use_raster(
+        backend, int(grid.fault_shapes.prod(axis=1).max()), raster_threshold
+    )
+    # The colour scales are shared by the panels of every fault.
+    panels = [
+        FaultPanel(
+            plot_type=plot_type,
+            fault=i,
+            slip=slip[i],
+            tinit=tinit[i],
+            rise=rise[i],
+            rake=rake[i],
+            slip_values=grid.fault_values("slip", i),
+            length=lengths[i],
+            width=widths[i],
+            slip_levels=slip_levels,
+            rise_levels=rise_levels,
+            time_levels=time_levels,
+            rake_norm=0.1 / global_slip_max,
+            rake_stride=rake_stride,
+            raster=raster,
+        )
+        for i in range(len(faults))
+    ]
 
     if segment is not None:
-        i = segment - 1
-        fig, axes = plt.subplots(4, figsize=(width * centimeters, height * centimeters))
-        levels = np.linspace(0, global_slip_max, num=20)
-        plot_slip(
-            axes[0],
-            tinit[i],
-            slip[i],
-            faults[i].length,
-            faults[i].width,
-            levels,
-            t_levels=15,
-        )
-        axes[0].set_title(f"Slip (cm) on Segment {i + 1}")
-        levels = np.linspace(0, global_rise_max, num=20)
-        plot_rise(
-            axes[1],
-            rise[i],
-            faults[i].length,
-            faults[i].width,
-            levels,
-        )
-        axes[1].set_title(f"Rise Time (s) on Segment {i + 1}")
-        scale = 0.1 / global_slip_max
-        plot_rake(
-            axes[2],
-            rake[i],
-            slip[i],
-            faults[i].length,
-            faults[i].width,
-            scale,
+        if segment == ALL_SEGMENTS:
+            summaries = [
+                (panel, segment_output_ffp(output_ffp, panel.fault + 1))
+                for panel in panels
+            ]
+        else:
+            summaries = [(panels[segment - 1], output_ffp)]
+        summary_panels, output_ffps = zip(*summaries)
+        arguments = (
+            summary_panels,
+            output_ffps,
+            repeat(figsize),
+            repeat(dpi or preset.dpi),
+            repeat(current_rc_params()),
         )
-        axes[2].set_title(f"Rake on Segment {i + 1}")
-        plot_slip_histogram(axes[3], slip[i], summary=False)
-        axes[3].set_title(f"Slip Density on Segment {i + 1}")
-    else:
-        plt.rcParams.update(PLOT_CONFIG)
-        fig = plt.figure(figsize=(width * centimeters, height * centimeters))
-        gs = fig.add_gridspec(rows, cols + 1, width_ratios=[1] * cols + [cols])
-
-        plot_functions = {
-            PlotType.slip: lambda ax, i: plot_slip(
-                ax,
-                tinit[i],
-                slip[i],
-                faults[i].length,
-                faults[i].width,
-                np.linspace(0, global_slip_max, num=20),
-            ),
-            PlotType.rise: lambda ax, i: plot_rise(
-                ax,
-                rise[i],
-                faults[i].length,
-                faults[i].width,
-                np.linspace(0, global_rise_max, num=20),
-            ),
-            PlotType.rake: lambda ax, i: plot_rake(
-                ax,
-                rake[i],
-                slip[i],
-                faults[i].length,
-                faults[i].width,
-                0.1 / global_slip_max,
-            ),
-            PlotType.distribution: lambda ax, i: plot_slip_histogram(ax, slip[i]),
-        }
-        plot_names = {PlotType.distribution: "Slip distrubition"}
-
-        for i, fault in enumerate(faults):
-            ax = fig.add_subplot(gs[np.unravel_index(i, (rows, cols))])
-            plot_functions[plot_type](ax, i)
-            ax.set_title(
-                f"{plot_names.get(plot_type, plot_type).capitalize()} on segment {i + 1}"
-            )
+        if parallel and len(summaries) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(workers or os.cpu_count(), len(summaries))
+            ) as executor:
+                list(executor.map(render_segment_summary, *arguments))
+        else:
+            for summary in zip(*arguments):
+                render_segment_summary(*summary)
+        return
 
+    plt.rcParams.update(PLOT_CONFIG)
+    layout = PanelLayout(
+        figsize=figsize,
+        rows=rows,
+        cols=cols,
+        overview=preset.insets,
+        rc_params=current_rc_params(),
+    )
+    fig = plt.figure(figsize=layout.figsize)
+    gs = layout.gridspec(fig)
+    if preset.insets:
+        # The map is drawn first, as geopandas redraws the whole
+        # figure, panels included, when plotting into it.
         map_ax = fig.add_subplot(gs[:, cols])
         df = gpd.GeoDataFrame(
             data=list(range(len(sources.source_geometries))),
@@ -556,6 +1048,152 @@ def plot_slip_rise_rake(
         )
 
         plot_map(map_ax, df)
-    plt.tight_layout()
-    fig.savefig(output_ffp, dpi=dpi)
+
+    if parallel:
+        with profiling.span("render:panels"):
+            composite_fault_panels(
+                fig, gs, panels, layout, dpi or preset.dpi, workers=workers
+            )
+    else:
+        for panel in panels:
+            draw_fault_panel(fig.add_subplot(gs[layout.cell(panel.fault)]), panel)
+        plt.tight_layout()
+    with profiling.span("save"):
+        fig.savefig(output_ffp, dpi=dpi or preset.dpi)
     plt.close(fig)
+
+
+def parse_segment(value: str) -> int | Literal["all"]:
+    """Parse the segment option of the command line.
+
+    Parameters
+    ----------
+    value : str
+        The option value, a segment number or "all".
+
+    Returns
+    -------
+    int or "all"
+        The segment number, or "all".
+
+    Raises
+    ------
+    typer.BadParameter
+        If the value is not a positive segment number or "all".
+    """
+    if value == ALL_SEGMENTS:
+        return ALL_SEGMENTS
+    try:
+        segment = int(value)
+    except ValueError:
+        segment = 0
+    if segment < 1:
+        raise typer.BadParameter(f"Expected a segment number or {ALL_SEGMENTS!r}.")
+    return segment
+
+
+@cli.from_docstring(app)
+def plot_slip_rise_rake(
+    realisation_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+    srf_ffp: Annotated[
+        Path,
+        typer.Argument(exists=True, dir_okay=False),
+    ],
+    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
+    dpi: Annotated[Optional[float], typer.Option()] = None,
+    title: Annotated[Optional[str], typer.Option()] = None,
+    width: Annotated[float, typer.Option(min=0)] = 10,
+    height: Annotated[float, typer.Option(min=0)] = 10,
+    plot_type: Annotated[
+        PlotType,
+        typer.Option(),
+    ] = PlotType.slip,
+    segment: Annotated[
+        Optional[str],
+        typer.Option(parser=parse_segment),
+    ] = None,
+    draft: Annotated[bool, typer.Option()] = False,
+    parallel: Annotated[bool, typer.Option()] = False,
+    workers: Annotated[Optional[int], typer.Option(min=1)] = None,
+    backend: Annotated[PanelBackend, typer.Option()] = PanelBackend.auto,
+    raster_threshold: Annotated[int, typer.Option(min=0)] = RASTER_THRESHOLD,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
+) -> None:
+    """Plot slip-rise-rake for segments.
+
+    Parameters
+    ----------
+    realisation_ffp : Path
+        Path to ralisation file.
+    srf_ffp : Path
+        Path to SRF file to plot.
+    output_ffp : Path
+        Output plot image.
+    dpi : Optional[float]
+        Plot output DPI (higher is better). Defaults to 300, or 100 for
+        draft plots.
+    title : Optional[str]
+        Plot title to use.
+    width : float
+        Plot width (cm).
+    height : float
+        Plot height (cm).
+    plot_type : PlotType
+        Type of plot to generate.
+    segment : str, optional
+        The segment number to summarise, default will plot all segments
+        in one figure. Pass ``all`` to write the summary of every
+        segment in one run, to ``OUTPUT_FFP`` with ``_segment_N``
+        appended to its name for segment N.
+    draft : bool
+        If set, render a quick-look plot with low DPI, fewer contour
+        levels and rake vectors, no anti-aliasing and no overview map.
+    parallel : bool
+        If set, render the panel (or, with ``--segment all``, the
+        summary) of each segment in a worker process. This speeds up
+        plots of many segments, which otherwise render one at a time.
+    workers : Optional[int]
+        Number of worker processes of a parallel plot, by default one
+        per CPU.
+    backend : PanelBackend
+        How to draw slip and rise time: as filled contours, as images
+        coloured in the same bands (much faster for fine subfault grids,
+        and smaller in vector formats), or automatically by grid size.
+        Rupture time contours are drawn as lines either way.
+    raster_threshold : int
+        Number of subfaults of the largest fault above which the auto
+        backend draws images.
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
+    """
+    from visualisation import srf_cache
+
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        render_slip_rise_rake(
+            srf_cache.read_srf(srf_ffp, SRF_COLUMNS, slip=False),
+            read_realisation(realisation_ffp),
+            output_ffp,
+            dpi=dpi,
+            title=title,
+            width=width,
+            height=height,
+            plot_type=plot_type,
+            segment=segment,
+            preset=presets.render_preset(draft),
+            parallel=parallel,
+            workers=workers,
+            backend=backend,
+            raster_threshold=raster_threshold,
+        )
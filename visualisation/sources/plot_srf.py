@@ -1,26 +1,33 @@
-#!/usr/bin/env python3
 """Plot multi-segment rupture with slip."""
 
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import numpy as np
-import pygmt
 import typer
 
-from pygmt_helper import plotting
-from qcore import cli, coordinates
-from source_modelling import srf
-from visualisation import utils
+from qcore import cli
+from visualisation import presets, profiling, tiles, utils
+from visualisation.realisation import read_realisation
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pygmt
+
+    from source_modelling import srf
+    from visualisation.realisation import Realisation
 
 app = typer.Typer()
 
+SRF_COLUMNS = frozenset({"lon", "lat", "dep", "tinit", "slip"})
+TILE_COLUMNS = frozenset({"lon", "lat", "slip", "rise"})
+
 
 NZ_REGION = [166, 179, -47, -34]
 
 
 def show_map(
-    fig: pygmt.Figure,
+    fig: "pygmt.Figure",
     highlight_region: tuple[float, float, float, float],
     projection: str = "M?",
 ) -> None:
@@ -43,8 +50,11 @@ def show_map(
     >>> show_map(fig, highlight_region, projection="M6i")
     >>> fig.show()  # Displays the plot with the highlighted region
     """
+    from visualisation import map_layers
+
     fig.basemap(region=NZ_REGION, projection=projection, frame=["f"])
-    fig.coast(shorelines=True, resolution="i", water="lightblue", land="lightgray")
+    with profiling.span("render:coast"):
+        map_layers.plot_coast(fig, NZ_REGION, land="lightgray", water="lightblue")
     rectangle = [
         [
             highlight_region[0],
@@ -56,14 +66,98 @@ def show_map(
     fig.plot(data=rectangle, style="r+s", pen="1p,red")
 
 
+@profiling.span("compute")
+def rupture_time_annotations(
+    points: "pd.DataFrame", header: "pd.DataFrame", tolerance: float = 0.1
+) -> "pd.DataFrame":
+    """Place whole-second rupture time labels on each segment.
+
+    For each segment and each whole second between the (rounded)
+    earliest and latest rupture time on the segment, the label is
+    placed at the segment point whose rupture time is closest to that
+    second, provided it is within `tolerance` of it. The closest
+    points of every segment are found together by binary search over
+    the rupture times, sorted by segment then time.
+
+    Parameters
+    ----------
+    points : pd.DataFrame
+        The SRF points, with lon, lat and tinit columns.
+    header : pd.DataFrame
+        The SRF plane headers.
+    tolerance : float
+        The largest difference (in seconds) between a label and the
+        rupture time of the point it is placed at.
+
+    Returns
+    -------
+    pd.DataFrame
+        The lon, lat and label (the whole second) of each annotation.
+    """
+    import pandas as pd
+
+    tinit = points["tinit"].to_numpy()
+    plane_sizes = (header["nstk"] * header["ndip"]).to_numpy()
+    plane_starts = np.concatenate([[0], np.cumsum(plane_sizes)[:-1]])
+    planes = np.repeat(np.arange(len(header)), plane_sizes)
+
+    # Offset each plane's rupture times so that one sorted array holds
+    # every plane in order, and one search finds the closest point on
+    # the plane for every label.
+    plane_span = float(np.ptp(tinit)) + 2 * tolerance + 2 if len(tinit) else 0
+    order = np.lexsort((tinit, planes))
+    sorted_key = tinit[order].astype(np.float64) + planes[order] * plane_span
+
+    tinit_min = np.round(np.minimum.reduceat(tinit, plane_starts)).astype(int)
+    tinit_max = np.round(np.maximum.reduceat(tinit, plane_starts)).astype(int)
+    label_counts = np.maximum(tinit_max - tinit_min, 0)
+    label_planes = np.repeat(np.arange(len(header)), label_counts)
+    labels = np.repeat(tinit_min, label_counts) + (
+        np.arange(label_counts.sum())
+        - np.repeat(np.cumsum(label_counts) - label_counts, label_counts)
+    )
+
+    label_keys = labels + label_planes * plane_span
+    right = np.searchsorted(sorted_key, label_keys)
+    first = plane_starts[label_planes]
+    last = first + plane_sizes[label_planes] - 1
+    left = np.clip(right - 1, first, last)
+    right = np.clip(right, first, last)
+    # Points sharing a rupture time are sorted in SRF order, so the
+    # first point of a run of equal times is found by a left search.
+    left = np.searchsorted(sorted_key, sorted_key[left])
+    # Differences are taken in the precision of the SRF, so that ties
+    # are broken consistently with the rupture times themselves.
+    left_delta = np.abs(tinit[order[left]] - labels.astype(tinit.dtype))
+    right_delta = np.abs(tinit[order[right]] - labels.astype(tinit.dtype))
+    # Ties go to the point that appears first in the SRF.
+    closest = np.where(
+        (left_delta < right_delta)
+        | ((left_delta == right_delta) & (order[left] < order[right])),
+        order[left],
+        order[right],
+    )
+    within_tolerance = np.minimum(left_delta, right_delta) < tolerance
+
+    closest = closest[within_tolerance]
+    return pd.DataFrame(
+        {
+            "lon": points["lon"].to_numpy()[closest],
+            "lat": points["lat"].to_numpy()[closest],
+            "label": labels[within_tolerance],
+        }
+    )
+
+
 def show_slip(
-    fig: pygmt.Figure,
+    fig: "pygmt.Figure",
     region: tuple[float, float, float, float],
-    srf_data: srf.SrfFile,
+    srf_data: "srf.SrfFile",
     annotations: bool,
     projection: str = "M?",
-    realisation_ffp: Optional[Path] = None,
+    realisation: Optional["Realisation"] = None,
     title: Optional[str] = None,
+    preset: presets.RenderPreset = presets.FULL,
 ):
     """Show a slip map with optional contours.
 
@@ -79,10 +173,13 @@ def show_slip(
         If True, display annotations of slip times.
     projection : str
         The projection to apply. Defaults to autoexpanding mercator projection.
-    realisation_ffp : Optional[Path]
+    realisation : Optional[Realisation]
         The realisation to use for jump points, if any.
     title : Optional[str]
         The title of the slip plot.
+    preset : presets.RenderPreset
+        The rendering preset, setting the coastline resolution, grid
+        spacing and contour interval.
 
     Examples
     --------
@@ -94,6 +191,10 @@ def show_slip(
     >>> show_slip(fig, region, srf_data, annotations=True, projection="M6i", title="Slip Distribution")
     >>> fig.show()  # Displays the slip map with optional annotations
     """
+    from pygmt_helper import plotting
+    from visualisation import gridding, map_layers
+    from visualisation.spatial_index import SubfaultIndex
+
     subtitle = utils.format_description(
         srf_data.points["slip"], units="cm", compact=True
     )
@@ -104,12 +205,16 @@ def show_slip(
         projection=projection,
         frame=plotting.DEFAULT_PLT_KWARGS["frame_args"] + title_args,
     )
-    fig.coast(
-        shorelines=["1/0.1p,black", "2/0.1p,black"],
-        resolution="f",
-        land="#666666",
-        water="skyblue",
-    )
+    with profiling.span("render:coast"):
+        map_layers.plot_coast(
+            fig,
+            region,
+            land="#666666",
+            water="skyblue",
+            pen="0.1p,black",
+            resolution=preset.coastline_resolution,
+            max_level=2,
+        )
 
     slip_quantile = srf_data.points["slip"].quantile(0.98)
     slip_cb_max = max(int(np.round(slip_quantile, -1)), 10)
@@ -125,47 +230,35 @@ def show_slip(
         nstk = segment["nstk"]
         ndip = segment["ndip"]
 
-        # Create standard slip heatmap.
-        cur_grid = plotting.create_grid(
+        # The slip heatmap and time contours share one grid geometry.
+        grids = gridding.create_grids(
             segment_points,
-            "slip",
-            grid_spacing="5e/5e",
-            region=(
-                segment_points["lon"].min(),
-                segment_points["lon"].max(),
-                segment_points["lat"].min(),
-                segment_points["lat"].max(),
-            ),
-            set_water_to_nan=False,
+            ["slip", "tinit"],
+            grid_spacing=preset.grid_spacing,
+            region=gridding.segment_region(segment_points),
+            plane_shape=(nstk, ndip),
         )
 
-        plotting.plot_grid(
-            fig,
-            cur_grid,
-            "hot",
-            cmap_limits,
-            ("white", "black"),
-            transparency=0,
-            reverse_cmap=True,
-            plot_contours=False,
-            cb_label="Slip (cm)",
-            continuous_cmap=True,
-        )
+        # Create standard slip heatmap.
+        with profiling.span("render:grdimage"):
+            plotting.plot_grid(
+                fig,
+                grids["slip"],
+                "hot",
+                cmap_limits,
+                ("white", "black"),
+                transparency=0,
+                reverse_cmap=True,
+                plot_contours=False,
+                cb_label="Slip (cm)",
+                continuous_cmap=True,
+            )
 
         # Plot time contours
-        time_grid = plotting.create_grid(
-            segment_points,
-            "tinit",
-            grid_spacing="5e/5e",
-            region=(
-                segment_points["lon"].min(),
-                segment_points["lon"].max(),
-                segment_points["lat"].min(),
-                segment_points["lat"].max(),
-            ),
-            set_water_to_nan=False,
-        )
-        fig.grdcontour(levels=1, grid=time_grid, pen="0.1p")
+        with profiling.span("render:grdcontour"):
+            fig.grdcontour(
+                levels=preset.contour_interval, grid=grids["tinit"], pen="0.1p"
+            )
 
         # Plot bounds of the current segment.
         corners = segment_points.iloc[[0, nstk - 1, -1, (ndip - 1) * nstk]]
@@ -180,33 +273,16 @@ def show_slip(
             pen="0.8p,black",
         )
 
-        if not annotations:
-            continue
-
-        # Custom annotation implementation. Rough algorithm is:
-        # 1. Compute the number of whole second increments in tinit
-        tinit_max = int(np.round(segment_points["tinit"].max()))
-        tinit_min = int(np.round(segment_points["tinit"].min()))
-        # 2. Provided we have a non-trivial number of increments
-        if tinit_max - tinit_min >= 1:
-            # 3. Iterate over every second between the two and
-            for j in range(tinit_min, tinit_max):
-                # 4. Find the segment point with the closest tinit value to the current second.
-                min_delta = (segment_points["tinit"] - j).abs().min()
-                # 5. Provided that this point has a tinit closest enough to the current second.
-                if min_delta < 0.1:
-                    # 6. Get that point and
-                    closest_point = segment_points[
-                        (segment_points["tinit"] - j).abs() == min_delta
-                    ].iloc[0]
-                    # Add an annotation label to the plot.
-                    fig.text(
-                        text=f"{j}",
-                        x=closest_point["lon"],
-                        y=closest_point["lat"],
-                        font="5p",
-                        fill="white",
-                    )
+    if annotations:
+        time_annotations = rupture_time_annotations(srf_data.points, srf_data.header)
+        if len(time_annotations):
+            fig.text(
+                text=time_annotations["label"].astype(str).to_list(),
+                x=time_annotations["lon"].to_numpy(),
+                y=time_annotations["lat"].to_numpy(),
+                font="5p",
+                fill="white",
+            )
 
     # Plot the hypocentre.
     hypocentre = srf_data.points[
@@ -221,15 +297,11 @@ def show_slip(
     )
 
     # If we are supplied a JSON realisation, we can add labels for jump points.
-    if realisation_ffp:  # pragma: no cover
-        # NOTE: this import is here because the workflow is, as yet,
-        # not ready to be installed along-side source modelling.
-        from workflow.realisations import RupturePropagationConfig, SourceConfig
-
-        rupture_propagation_config = RupturePropagationConfig.read_from_realisation(
-            realisation_ffp
-        )
-        source_config = SourceConfig.read_from_realisation(realisation_ffp)
+    if realisation:  # pragma: no cover
+        rupture_propagation_config = realisation.rupture_propagation_config
+        source_config = realisation.source_config
+        from_points = []
+        to_points = []
         for fault_name, jump_point in rupture_propagation_config.jump_points.items():
             parent_name = rupture_propagation_config.rupture_causality_tree[fault_name]
             if not parent_name:
@@ -238,52 +310,125 @@ def show_slip(
             parent = source_config.source_geometries[parent_name]
 
             # Ruptures jump from_point --> to_point
-            from_point = parent.fault_coordinates_to_wgs_depth_coordinates(
-                jump_point.from_point
-            )
-
-            # Find the closest point to the theoretical jump point (so we can lookup the time).
-            closest_from_point_distance_idx = (
-                coordinates.distance_between_wgs_depth_coordinates(
-                    srf_data.points[["lat", "lon", "dep"]].to_numpy()
-                    * np.array([1, 1, 1000]),
-                    from_point,
-                )
-            ).argmin()
-            srf_jump_point = srf_data.points.iloc[closest_from_point_distance_idx]
-
-            to_point = source.fault_coordinates_to_wgs_depth_coordinates(
-                jump_point.to_point
-            )[:2]
-
-            fig.plot(
-                x=from_point[1],
-                y=from_point[0],
-                style="t0.4c",
-                pen="1p,black",
-                fill="white",
+            from_points.append(
+                parent.fault_coordinates_to_wgs_depth_coordinates(jump_point.from_point)
             )
-            fig.text(
-                x=srf_jump_point["lon"],
-                y=srf_jump_point["lat"] - 0.01,
-                font="5p",
-                fill="white",
-                text=f"t_jump = {srf_jump_point['tinit']:.2f}",
+            to_points.append(
+                source.fault_coordinates_to_wgs_depth_coordinates(jump_point.to_point)
             )
-            fig.plot(
-                x=to_point[1],
-                y=to_point[0],
-                style="i0.4c",
-                pen="1p,black",
-                fill="white",
+        if not from_points:
+            return
+        from_points = np.array(from_points)
+        to_points = np.array(to_points)
+
+        # Find the closest point to each theoretical jump point (so we can lookup the time).
+        _, closest_from_points = SubfaultIndex.from_srf(srf_data).nearest(from_points)
+        srf_jump_points = srf_data.points.iloc[closest_from_points]
+
+        fig.plot(
+            x=from_points[:, 1],
+            y=from_points[:, 0],
+            style="t0.4c",
+            pen="1p,black",
+            fill="white",
+        )
+        fig.text(
+            x=srf_jump_points["lon"].to_numpy(),
+            y=srf_jump_points["lat"].to_numpy() - 0.01,
+            font="5p",
+            fill="white",
+            text=[f"t_jump = {tinit:.2f}" for tinit in srf_jump_points["tinit"]],
+        )
+        fig.plot(
+            x=to_points[:, 1],
+            y=to_points[:, 0],
+            style="i0.4c",
+            pen="1p,black",
+            fill="white",
+        )
+
+
+@profiling.span("render")
+def render_slip_map(
+    srf_data: "srf.SrfFile",
+    output_ffp: Path,
+    realisation: Optional["Realisation"] = None,
+    dpi: Optional[float] = None,
+    title: Optional[str] = None,
+    latitude_pad: float = 0,
+    longitude_pad: float = 0,
+    annotations: bool = True,
+    width: float = 17,
+    show_inset: bool = False,
+    preset: presets.RenderPreset = presets.FULL,
+) -> None:
+    """Plot multi-segment rupture with slip from a loaded SRF.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF to plot.
+    output_ffp : Path
+        Output plot image.
+    realisation : Optional[Realisation]
+        The realisation, used to mark jump points.
+    dpi : Optional[float]
+        Plot output DPI (higher is better), by default that of the preset.
+    title : Optional[str]
+        Plot title to use.
+    latitude_pad : float
+        Latitude padding to apply (degrees).
+    longitude_pad : float
+        Longitude padding to apply (degrees).
+    annotations : bool
+        Label contours.
+    width : float
+        Width of plot (in cm).
+    show_inset : bool
+        If True, show an inset overview map. Presets without insets
+        never show it.
+    preset : presets.RenderPreset
+        The rendering preset.
+    """
+    import pygmt
+
+    region = (
+        srf_data.points["lon"].min() - longitude_pad,
+        srf_data.points["lon"].max() + longitude_pad,
+        srf_data.points["lat"].min() - latitude_pad,
+        srf_data.points["lat"].max() + latitude_pad,
+    )
+
+    fig = pygmt.Figure()
+
+    with pygmt.config(FONT_SUBTITLE="9p,Helvetica,black", FORMAT_GEO_MAP="ddd.xx"):
+        show_slip(
+            fig,
+            region,
+            srf_data,
+            annotations,
+            projection=f"M{width}c",
+            realisation=realisation,
+            title=title,
+            preset=preset,
+        )
+        if show_inset and preset.insets:
+            with fig.inset(position=f"jTR+w{np.sqrt(width)}c", margin=0.2):
+                show_map(fig, region)
+
+        with profiling.span("save"):
+            fig.savefig(
+                output_ffp,
+                dpi=dpi or preset.dpi,
+                anti_alias=preset.anti_alias,
             )
 
 
 @cli.from_docstring(app)
 def plot_srf(
     srf_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
-    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
-    dpi: Annotated[float, typer.Option()] = 300,
+    output_ffp: Annotated[Path, typer.Argument()],
+    dpi: Annotated[Optional[float], typer.Option()] = None,
     title: Annotated[Optional[str], typer.Option()] = None,
     realisation_ffp: Annotated[Optional[Path], typer.Option(exists=True)] = None,
     latitude_pad: Annotated[float, typer.Option()] = 0,
@@ -291,6 +436,18 @@ def plot_srf(
     annotations: Annotated[bool, typer.Option()] = True,
     width: Annotated[float, typer.Option(min=0)] = 17,
     show_inset: bool = False,
+    draft: Annotated[bool, typer.Option()] = False,
+    write_tiles: Annotated[bool, typer.Option("--tiles")] = False,
+    min_zoom: Annotated[int, typer.Option(min=0, max=tiles.MAX_ZOOM)] = 5,
+    max_zoom: Annotated[Optional[int], typer.Option(min=0, max=tiles.MAX_ZOOM)] = None,
+    tile_format: Annotated[tiles.TileFormat, typer.Option()] = tiles.TileFormat.png,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
 ) -> None:
     """Plot multi-segment rupture with slip.
 
@@ -299,9 +456,10 @@ def plot_srf(
     srf_ffp : Path
         Path to SRF file to plot.
     output_ffp : Path
-        Output plot image.
-    dpi : float
-        Plot output DPI (higher is better).
+        Output plot image, or with ``--tiles`` the tile directory.
+    dpi : Optional[float]
+        Plot output DPI (higher is better). Defaults to 300, or 100 for
+        draft plots.
     title : Optional[str]
         Plot title to use.
     realisation_ffp : Optional[Path]
@@ -316,6 +474,32 @@ def plot_srf(
         Width of plot (in cm).
     show_inset : bool
         If True, show an inset overview map.
+    draft : bool
+        If set, render a quick-look plot with low DPI, coarse coastlines
+        and grids, fewer time contours, no anti-aliasing and no inset.
+    write_tiles : bool
+        If set, write an XYZ tile pyramid of the slip and rise of each
+        plane for web map viewers instead of a plot, as
+        ``<layer>/<z>/<x>/<y>.<format>`` under `output_ffp`. Only tiles
+        intersecting a plane are rendered, and rerunning over an
+        existing pyramid only re-renders the tiles of changed planes.
+        The plot options (title, padding, annotations and so on) are
+        ignored.
+    min_zoom : int
+        The shallowest zoom level of the tile pyramid.
+    max_zoom : Optional[int]
+        The deepest zoom level of the tile pyramid. Defaults to the
+        first zoom level at which subfaults span at least two pixels.
+    tile_format : tiles.TileFormat
+        The image format of the tiles.
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
 
     Examples
     --------
@@ -339,36 +523,43 @@ def plot_srf(
     >>> # The plot will have a latitude and longitude padding of 0.5 degrees.
     >>> # The plot will have annotations of slip times and an inset map.
     """
-    srf_data = srf.read_srf(srf_ffp)
-    region = (
-        srf_data.points["lon"].min() - longitude_pad,
-        srf_data.points["lon"].max() + longitude_pad,
-        srf_data.points["lat"].min() - latitude_pad,
-        srf_data.points["lat"].max() + latitude_pad,
-    )
-
-    fig = pygmt.Figure()
+    from visualisation import srf_cache
 
-    pygmt.config(FONT_SUBTITLE="9p,Helvetica,black", FORMAT_GEO_MAP="ddd.xx")
+    if max_zoom is not None and max_zoom < min_zoom:
+        raise typer.BadParameter(
+            "The maximum zoom must be at least the minimum zoom.",
+            param_hint="--max-zoom",
+        )
+    if not write_tiles and output_ffp.is_dir():
+        raise typer.BadParameter(
+            f"{output_ffp} is a directory.", param_hint="output_ffp"
+        )
 
-    show_slip(
-        fig,
-        region,
-        srf_data,
-        annotations,
-        projection=f"M{width}c",
-        realisation_ffp=realisation_ffp,
-        title=title,
-    )
-    if show_inset:
-        with fig.inset(position=f"jTR+w{np.sqrt(width)}c", margin=0.2):
-            show_map(fig, region)
-
-    fig.savefig(
-        output_ffp,
-        dpi=dpi,
-        anti_alias=True,
-    )
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        if write_tiles:
+            srf_data = srf_cache.read_srf(srf_ffp, TILE_COLUMNS, slip=False)
+            if max_zoom is None:
+                max_zoom = max(tiles.default_max_zoom(srf_data), min_zoom)
+            tiles.write_tile_pyramid(
+                srf_data,
+                output_ffp,
+                range(min_zoom, max_zoom + 1),
+                tile_format=tile_format,
+            )
+            return
+        render_slip_map(
+            srf_cache.read_srf(srf_ffp, SRF_COLUMNS, slip=False),
+            output_ffp,
+            realisation=read_realisation(realisation_ffp) if realisation_ffp else None,
+            dpi=dpi,
+            title=title,
+            latitude_pad=latitude_pad,
+            longitude_pad=longitude_pad,
+            annotations=annotations,
+            width=width,
+            show_inset=show_inset,
+            preset=presets.render_preset(draft),
+        )
 
 
 if __name__ == "__main__":
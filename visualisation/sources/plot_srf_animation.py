@@ -0,0 +1,793 @@
+"""Animate slip accumulating over a multi-segment rupture.
+
+Each frame of the animation differs from the last only in the slip on
+the planes, so the map (coastline, axes, colour bar and title) is drawn
+once with matplotlib into a background image, and the plane outlines
+and hypocentre once into a transparent overlay. The pixels of the map
+covered by each plane are also found once, as a `gridding.GridGeometry`
+over the map pixels. A frame is then the background, with the
+cumulative slip interpolated onto the covered pixels and the overlay
+blended on top, so drawing it needs no plotting library at all.
+
+The cumulative slip of each frame is the slip of the previous frame
+plus the slip in the time windows between them, read from the slip
+time function as one contiguous slice of its compressed columns.
+Frames are drawn in order by a pool of worker processes and encoded to
+a GIF with Pillow or to an MP4 with ffmpeg.
+"""
+
+import functools
+import itertools
+import os
+import shutil
+import subprocess
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Optional
+
+import numpy as np
+import typer
+
+from qcore import cli
+from visualisation import profiling
+
+if TYPE_CHECKING:
+    import scipy as sp
+    from matplotlib.axes import Axes
+
+    from source_modelling import srf
+    from visualisation.gridding import GridGeometry
+
+app = typer.Typer()
+
+SRF_COLUMNS = frozenset({"lon", "lat", "tinit", "dt", "slip"})
+SLIP_COLOURMAP = "hot_r"
+"""The colour map of slip, matching the slip map of `plot-srf`."""
+LABEL_FONT_SIZE = 10
+"""The font size of the frame time label (points)."""
+
+_frame_renderer: Optional["FrameRenderer"] = None
+"""The renderer of a worker process (see `_initialise_worker`)."""
+
+
+@dataclass(frozen=True)
+class FrameRenderer:
+    """The static layers of an animation, and the slip pixels of its map."""
+
+    background: np.ndarray
+    """The RGB pixels of the map, colour bar and title (shape (height,
+    width, 3))."""
+    overlay: np.ndarray
+    """The RGBA pixels of the plane outlines and hypocentre, drawn over
+    the slip (shape (height, width, 4))."""
+    map_rows: slice
+    """The rows of the image inside the map axes."""
+    map_columns: slice
+    """The columns of the image inside the map axes."""
+    geometry: "GridGeometry"
+    """The interpolation of subfault values onto the map pixels, with
+    rows from the top of the map."""
+    slip_limit: float
+    """The slip at the top of the colour map (cm)."""
+    dpi: float
+    """The resolution of the image."""
+
+    @functools.cached_property
+    def overlay_pixels(self) -> tuple[np.ndarray, np.ndarray]:  # numpydoc ignore=RT01
+        """tuple[np.ndarray, np.ndarray]: The indices of the drawn overlay pixels."""
+        return np.nonzero(self.overlay[..., 3])
+
+    def render(self, time: float, slip: np.ndarray) -> np.ndarray:
+        """Draw one frame of the animation.
+
+        Parameters
+        ----------
+        time : float
+            The time of the frame (s).
+        slip : np.ndarray
+            The cumulative slip (cm) of each subfault at `time`.
+
+        Returns
+        -------
+        np.ndarray
+            The RGB pixels of the frame (shape (height, width, 3)).
+        """
+        from matplotlib import colormaps
+        from matplotlib.colors import Normalize
+        from PIL import Image, ImageDraw, ImageFont
+
+        frame = self.background.copy()
+        slip_grid = self.geometry.interpolate(slip).values
+        covered = ~np.isnan(slip_grid)
+        colours = colormaps[SLIP_COLOURMAP](
+            Normalize(0, self.slip_limit)(slip_grid[covered]), bytes=True
+        )
+        frame[self.map_rows, self.map_columns][covered] = colours[:, :3]
+
+        # Only the few pixels of the outlines are blended.
+        drawn = self.overlay_pixels
+        overlay = self.overlay[drawn]
+        alpha = overlay[:, 3:] / 255
+        frame[drawn] = np.round(
+            frame[drawn] * (1 - alpha) + overlay[:, :3] * alpha
+        ).astype(np.uint8)
+
+        image = Image.fromarray(frame)
+        ImageDraw.Draw(image).text(
+            (self.map_columns.start + 4, self.map_rows.start + 4),
+            f"t = {time:.1f} s",
+            fill="black",
+            font=ImageFont.load_default(LABEL_FONT_SIZE * self.dpi / 72),
+            stroke_width=2,
+            stroke_fill="white",
+        )
+        return np.asarray(image)
+
+
+def plane_corners(srf_data: "srf.SrfFile") -> list[np.ndarray]:
+    """Find the corners of each plane of an SRF.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF.
+
+    Returns
+    -------
+    list[np.ndarray]
+        The (lon, lat) of the corner subfaults of each plane (shape (4,
+        2)), starting at the top of the plane, as in `plot-srf`.
+    """
+    corners = []
+    for (_, plane), plane_points in zip(srf_data.header.iterrows(), srf_data.segments):
+        nstk = plane["nstk"]
+        ndip = plane["ndip"]
+        corners.append(
+            plane_points[["lon", "lat"]]
+            .iloc[[0, nstk - 1, -1, (ndip - 1) * nstk]]
+            .to_numpy(dtype=np.float64)
+        )
+    return corners
+
+
+def map_geometry(
+    srf_data: "srf.SrfFile", lon: np.ndarray, lat: np.ndarray
+) -> "GridGeometry":
+    """Find the interpolation of every plane of an SRF onto map pixels.
+
+    Planes later in the SRF are drawn over earlier ones.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF.
+    lon : np.ndarray
+        The longitude of each pixel column.
+    lat : np.ndarray
+        The latitude of each pixel row.
+
+    Returns
+    -------
+    GridGeometry
+        The interpolation of the SRF points onto the pixels covered by a
+        plane. Planes without area on the map are not drawn.
+    """
+    from visualisation import gridding
+
+    plane_sizes = (srf_data.header["nstk"] * srf_data.header["ndip"]).to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(plane_sizes)])
+    coordinates = srf_data.points[["lon", "lat"]].to_numpy(dtype=np.float64)
+    geometries = [
+        gridding.GridGeometry(
+            lon=lon,
+            lat=lat,
+            nodes=np.zeros(0, dtype=np.int64),
+            vertices=np.zeros((0, 4), dtype=np.int64),
+            weights=np.zeros((0, 4)),
+        )
+    ]
+    offsets_of_geometries = [0]
+    for plane, plane_shape in enumerate(
+        srf_data.header[["nstk", "ndip"]].to_numpy(dtype=np.int64)
+    ):
+        affine = gridding.plane_index_transform(
+            coordinates[offsets[plane] : offsets[plane + 1]], tuple(plane_shape)
+        )
+        if affine is not None:
+            geometries.append(
+                gridding.plane_geometry(affine, tuple(plane_shape), lon, lat)
+            )
+            offsets_of_geometries.append(offsets[plane])
+
+    nodes = np.concatenate([geometry.nodes for geometry in geometries])
+    vertices = np.concatenate(
+        [
+            geometry.vertices + offset
+            for geometry, offset in zip(geometries, offsets_of_geometries)
+        ]
+    )
+    weights = np.concatenate([geometry.weights for geometry in geometries])
+    # The last occurrence of each pixel is from the plane drawn on top.
+    last = len(nodes) - 1 - np.unique(nodes[::-1], return_index=True)[1]
+    return gridding.GridGeometry(
+        lon=lon,
+        lat=lat,
+        nodes=nodes[last],
+        vertices=vertices[last],
+        weights=weights[last],
+    )
+
+
+def _plot_outlines(ax: "Axes", srf_data: "srf.SrfFile") -> None:
+    """Plot the outline of each plane and the hypocentre of an SRF.
+
+    Parameters
+    ----------
+    ax : Axes
+        The map axes.
+    srf_data : srf.SrfFile
+        The SRF.
+    """
+    for corners in plane_corners(srf_data):
+        ax.plot(*corners[[0, 1, 2, 3, 0]].T, "k--", linewidth=0.5)
+        ax.plot(*corners[:2].T, "k-", linewidth=0.8)
+    hypocentre = srf_data.points.iloc[srf_data.points["tinit"].argmin()]
+    ax.plot(
+        hypocentre["lon"],
+        hypocentre["lat"],
+        marker="*",
+        markersize=10,
+        markerfacecolor="white",
+        markeredgecolor="black",
+    )
+
+
+@profiling.span("render:static")
+def render_static_layers(
+    srf_data: "srf.SrfFile",
+    slip_limit: float,
+    width: float = 17,
+    dpi: float = 150,
+    title: Optional[str] = None,
+    latitude_pad: float = 0,
+    longitude_pad: float = 0,
+    coastline: bool = True,
+) -> FrameRenderer:
+    """Draw the static layers of a slip animation.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF to animate.
+    slip_limit : float
+        The slip at the top of the colour map (cm).
+    width : float
+        Width of the animation (in cm).
+    dpi : float
+        Resolution of the animation.
+    title : Optional[str]
+        Title of the animation.
+    latitude_pad : float
+        Latitude padding to apply (degrees).
+    longitude_pad : float
+        Longitude padding to apply (degrees).
+    coastline : bool
+        If True, draw the coastline (see `coastline.read_coastline`).
+
+    Returns
+    -------
+    FrameRenderer
+        The renderer of the animation frames.
+    """
+    from matplotlib import colormaps
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.cm import ScalarMappable
+    from matplotlib.colors import Normalize
+    from matplotlib.figure import Figure
+
+    from visualisation import coastline as nz_coastline
+
+    region = (
+        srf_data.points["lon"].min() - longitude_pad,
+        srf_data.points["lon"].max() + longitude_pad,
+        srf_data.points["lat"].min() - latitude_pad,
+        srf_data.points["lat"].max() + latitude_pad,
+    )
+    aspect = 1 / np.cos(np.radians((region[2] + region[3]) / 2))
+    map_width = width / 2.54
+    fig = Figure(
+        figsize=(
+            map_width,
+            map_width * aspect * (region[3] - region[2]) / (region[1] - region[0]),
+        ),
+        dpi=dpi,
+    )
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_facecolor("skyblue")
+    if coastline:
+        with profiling.span("load:coastline"):
+            coast_polygons = nz_coastline.read_coastline(
+                (region[0], region[2], region[1], region[3])
+            )
+        coast_polygons.plot(ax=ax, color="#666666", edgecolor="black", linewidth=0.1)
+    ax.set_xlim(region[0], region[1])
+    ax.set_ylim(region[2], region[3])
+    ax.set_aspect(aspect)
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    fig.colorbar(
+        ScalarMappable(Normalize(0, slip_limit), colormaps[SLIP_COLOURMAP]),
+        ax=ax,
+        label="Slip (cm)",
+    )
+    if title:
+        ax.set_title(title)
+    fig.tight_layout()
+    canvas.draw()
+    background = np.asarray(canvas.buffer_rgba())[..., :3].copy()
+
+    # The overlay has the same map axes, with only the outlines visible.
+    overlay_fig = Figure(figsize=fig.get_size_inches(), dpi=dpi)
+    overlay_fig.patch.set_alpha(0)
+    overlay_canvas = FigureCanvasAgg(overlay_fig)
+    overlay_ax = overlay_fig.add_axes(ax.get_position())
+    overlay_ax.set_axis_off()
+    overlay_ax.set_xlim(ax.get_xlim())
+    overlay_ax.set_ylim(ax.get_ylim())
+    _plot_outlines(overlay_ax, srf_data)
+    overlay_canvas.draw()
+    overlay = np.asarray(overlay_canvas.buffer_rgba()).copy()
+
+    # The pixels whose centres are inside the map axes.
+    height = background.shape[0]
+    x0, y0, x1, y1 = ax.get_window_extent().extents
+    map_columns = slice(int(np.ceil(x0 - 0.5)), int(np.floor(x1 - 0.5)) + 1)
+    map_rows = slice(
+        int(np.ceil(height - y1 - 0.5)), int(np.floor(height - y0 - 0.5)) + 1
+    )
+    to_data = ax.transData.inverted()
+    column_centres = np.arange(map_columns.start, map_columns.stop) + 0.5
+    row_centres = height - (np.arange(map_rows.start, map_rows.stop) + 0.5)
+    lon = to_data.transform(
+        np.column_stack([column_centres, np.full_like(column_centres, y0)])
+    )[:, 0]
+    lat = to_data.transform(
+        np.column_stack([np.full_like(row_centres, x0), row_centres])
+    )[:, 1]
+    with profiling.span("grid"):
+        geometry = map_geometry(srf_data, lon, lat)
+
+    return FrameRenderer(
+        background=background,
+        overlay=overlay,
+        map_rows=map_rows,
+        map_columns=map_columns,
+        geometry=geometry,
+        slip_limit=slip_limit,
+        dpi=dpi,
+    )
+
+
+def cumulative_slip(
+    slip: "sp.sparse.csr_array", dt: float, times: np.ndarray
+) -> Iterator[np.ndarray]:
+    """Accumulate the slip of each subfault up to a sequence of times.
+
+    The slip time function is converted once to compressed columns, so
+    the slip in the time windows between one time and the next is one
+    contiguous slice of it, added to the slip up to the previous time.
+
+    Parameters
+    ----------
+    slip : sp.sparse.csr_array
+        The slip rate (cm/s) of each subfault (row) in each time window
+        (column).
+    dt : float
+        The length of each time window (s).
+    times : np.ndarray
+        The increasing times (s) to accumulate slip to. The slip of a
+        time window is included once the window has ended.
+
+    Yields
+    ------
+    np.ndarray
+        The cumulative slip (cm) of each subfault at each time.
+    """
+    slip_by_window = slip.tocsc()
+    windows = np.clip(np.round(np.asarray(times) / dt).astype(np.int64), 0, None)
+    windows = np.minimum(windows, slip.shape[1])
+    total = np.zeros(slip.shape[0])
+    previous_window = 0
+    for window in windows:
+        with profiling.span("compute"):
+            start = slip_by_window.indptr[previous_window]
+            stop = slip_by_window.indptr[window]
+            total += dt * np.bincount(
+                slip_by_window.indices[start:stop],
+                weights=slip_by_window.data[start:stop],
+                minlength=len(total),
+            )
+            previous_window = window
+            frame_slip = total.copy()
+        yield frame_slip
+
+
+def _initialise_worker(frame_renderer: FrameRenderer) -> None:
+    """Keep the renderer of a worker process.
+
+    Parameters
+    ----------
+    frame_renderer : FrameRenderer
+        The renderer of the animation.
+    """
+    global _frame_renderer
+    _frame_renderer = frame_renderer
+
+
+def _render_frame(time: float, slip: np.ndarray) -> np.ndarray:
+    """Draw one frame with the renderer of a worker process.
+
+    Parameters
+    ----------
+    time : float
+        The time of the frame (s).
+    slip : np.ndarray
+        The cumulative slip of each subfault.
+
+    Returns
+    -------
+    np.ndarray
+        The RGB pixels of the frame.
+    """
+    return _frame_renderer.render(time, slip)
+
+
+def render_frames(
+    frame_renderer: FrameRenderer,
+    times: np.ndarray,
+    slip: Iterable[np.ndarray],
+    parallel: bool = True,
+    workers: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """Draw the frames of an animation, in order.
+
+    Parameters
+    ----------
+    frame_renderer : FrameRenderer
+        The renderer of the animation.
+    times : np.ndarray
+        The time of each frame (s).
+    slip : Iterable[np.ndarray]
+        The cumulative slip of each subfault in each frame.
+    parallel : bool
+        If True, draw frames in worker processes.
+    workers : Optional[int]
+        The number of worker processes, by default one per CPU.
+
+    Yields
+    ------
+    np.ndarray
+        The RGB pixels of each frame.
+    """
+    if not parallel:
+        for time, frame_slip in zip(times, slip):
+            with profiling.span("render:frames"):
+                frame = frame_renderer.render(time, frame_slip)
+            yield frame
+        return
+
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_initialise_worker,
+        initargs=(frame_renderer,),
+    ) as executor:
+        # Only a few frames are in flight at once, so that the slip of
+        # every frame is not held in memory together.
+        pending = deque()
+        for time, frame_slip in zip(times, slip):
+            pending.append(executor.submit(_render_frame, time, frame_slip))
+            if len(pending) < 2 * workers:
+                continue
+            with profiling.span("render:frames"):
+                frame = pending.popleft().result()
+            yield frame
+        while pending:
+            with profiling.span("render:frames"):
+                frame = pending.popleft().result()
+            yield frame
+
+
+def encode_gif(
+    frames: Iterable[np.ndarray],
+    output_ffp: Path,
+    fps: float,
+    palette_frame: np.ndarray,
+) -> None:
+    """Encode frames as an animated GIF with Pillow.
+
+    Every frame shares the 256 colour palette of `palette_frame`, which
+    is much faster than choosing a palette for each frame. Frames are
+    reduced to the palette as they are drawn, so no RGB frame is kept
+    after it is encoded.
+
+    Parameters
+    ----------
+    frames : Iterable[np.ndarray]
+        The RGB pixels of each frame.
+    output_ffp : Path
+        The output GIF.
+    fps : float
+        The frame rate.
+    palette_frame : np.ndarray
+        The RGB pixels of a frame with every colour of the animation,
+        e.g. the last frame.
+    """
+    from PIL import Image
+
+    palette = Image.fromarray(palette_frame).quantize()
+    images = (
+        Image.fromarray(frame).quantize(palette=palette, dither=Image.Dither.NONE)
+        for frame in frames
+    )
+    first = next(images)
+    first.save(
+        output_ffp,
+        save_all=True,
+        append_images=images,
+        duration=1000 / fps,
+        loop=0,
+    )
+
+
+def encode_mp4(frames: Iterable[np.ndarray], output_ffp: Path, fps: float) -> None:
+    """Encode frames as an H.264 MP4 with ffmpeg.
+
+    Frames are streamed to ffmpeg as they are drawn.
+
+    Parameters
+    ----------
+    frames : Iterable[np.ndarray]
+        The RGB pixels of each frame.
+    output_ffp : Path
+        The output MP4.
+    fps : float
+        The frame rate.
+
+    Raises
+    ------
+    FileNotFoundError
+        If ffmpeg is not installed.
+    subprocess.CalledProcessError
+        If ffmpeg fails.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise FileNotFoundError("ffmpeg is required to write MP4 animations.")
+    frames = iter(frames)
+    first = next(frames)
+    height, width, _ = first.shape
+    command = [
+        ffmpeg,
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgb24",
+        "-s",
+        f"{width}x{height}",
+        "-r",
+        str(fps),
+        "-i",
+        "-",
+        # H.264 in yuv420p needs even frame dimensions.
+        "-vf",
+        "pad=ceil(iw/2)*2:ceil(ih/2)*2:color=white",
+        "-c:v",
+        "libx264",
+        "-pix_fmt",
+        "yuv420p",
+        str(output_ffp),
+    ]
+    with subprocess.Popen(command, stdin=subprocess.PIPE) as encoder:
+        for frame in itertools.chain([first], frames):
+            encoder.stdin.write(np.ascontiguousarray(frame).tobytes())
+        encoder.stdin.close()
+    if encoder.returncode:
+        raise subprocess.CalledProcessError(encoder.returncode, command)
+
+
+ENCODERS: dict[str, Callable[..., None]] = {
+    ".gif": encode_gif,
+    ".mp4": encode_mp4,
+}
+"""The encoder of each animation file extension."""
+
+
+@profiling.span("render")
+def render_slip_animation(
+    srf_data: "srf.SrfFile",
+    output_ffp: Path,
+    frame_count: int = 100,
+    fps: int = 10,
+    width: float = 17,
+    dpi: float = 150,
+    title: Optional[str] = None,
+    latitude_pad: float = 0,
+    longitude_pad: float = 0,
+    coastline: bool = True,
+    parallel: bool = True,
+    workers: Optional[int] = None,
+) -> None:
+    """Animate slip accumulating over a loaded SRF.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF to animate, with its slip time function.
+    output_ffp : Path
+        Output animation, a GIF or MP4 (see `ENCODERS`).
+    frame_count : int
+        Number of frames, evenly spaced from the start to the end of
+        the slip time function.
+    fps : int
+        Frames per second of the animation.
+    width : float
+        Width of the animation (in cm).
+    dpi : float
+        Resolution of the animation.
+    title : Optional[str]
+        Title of the animation.
+    latitude_pad : float
+        Latitude padding to apply (degrees).
+    longitude_pad : float
+        Longitude padding to apply (degrees).
+    coastline : bool
+        If True, draw the coastline.
+    parallel : bool
+        If True, draw frames in worker processes.
+    workers : Optional[int]
+        The number of worker processes, by default one per CPU.
+    """
+    from visualisation import tiles
+
+    _, slip_limit = tiles.layer_limits(srf_data, tiles.TileLayer.slip)
+    frame_renderer = render_static_layers(
+        srf_data,
+        slip_limit,
+        width=width,
+        dpi=dpi,
+        title=title,
+        latitude_pad=latitude_pad,
+        longitude_pad=longitude_pad,
+        coastline=coastline,
+    )
+    times = np.linspace(0, srf_data.nt * srf_data.dt, frame_count)
+    encoder = ENCODERS[output_ffp.suffix.lower()]
+    if encoder is encode_gif:
+        # The last frame has the colours of all the slip, so it is drawn
+        # first to choose the palette the frames are encoded with.
+        final_slip = next(cumulative_slip(srf_data.slip, srf_data.dt, times[-1:]))
+        with profiling.span("render:frames"):
+            palette_frame = frame_renderer.render(times[-1], final_slip)
+        encoder = functools.partial(encode_gif, palette_frame=palette_frame)
+    frames = render_frames(
+        frame_renderer,
+        times,
+        cumulative_slip(srf_data.slip, srf_data.dt, times),
+        parallel=parallel,
+        workers=workers,
+    )
+    with profiling.span("save"):
+        encoder(frames, output_ffp, fps)
+
+
+@cli.from_docstring(app)
+def plot_srf_animation(
+    srf_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+    output_ffp: Annotated[Path, typer.Argument(dir_okay=False)],
+    frame_count: Annotated[int, typer.Option(min=2)] = 100,
+    fps: Annotated[int, typer.Option(min=1)] = 10,
+    dpi: Annotated[float, typer.Option(min=1)] = 150,
+    title: Annotated[Optional[str], typer.Option()] = None,
+    latitude_pad: Annotated[float, typer.Option()] = 0,
+    longitude_pad: Annotated[float, typer.Option()] = 0,
+    width: Annotated[float, typer.Option(min=0)] = 17,
+    coastline: Annotated[bool, typer.Option()] = True,
+    parallel: Annotated[bool, typer.Option()] = True,
+    workers: Annotated[Optional[int], typer.Option(min=1)] = None,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
+) -> None:
+    """Animate slip accumulating over a multi-segment rupture.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to SRF file to animate.
+    output_ffp : Path
+        Output animation. A ``.gif`` is written with Pillow, and an
+        ``.mp4`` with ffmpeg, which must be installed.
+    frame_count : int
+        Number of frames, evenly spaced over the rupture.
+    fps : int
+        Frames per second of the animation.
+    dpi : float
+        Animation DPI (higher is better).
+    title : Optional[str]
+        Animation title to use.
+    latitude_pad : float
+        Latitude padding to apply (degrees).
+    longitude_pad : float
+        Longitude padding to apply (degrees).
+    width : float
+        Width of animation (in cm).
+    coastline : bool
+        If set, draw the coastline (see ``build-nz-coastline``).
+    parallel : bool
+        If set, draw frames in worker processes.
+    workers : Optional[int]
+        Number of worker processes drawing frames, by default one per
+        CPU.
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
+
+    Examples
+    --------
+    >>> plot_srf_animation(
+    ...     srf_ffp="tests/srfs/rupture_1.srf",
+    ...     output_ffp="slip.mp4",
+    ...     frame_count=200,
+    ...     fps=20,
+    ... )
+    >>> # The above code would animate the slip of 'rupture_1.srf' over
+    >>> # 200 frames, and save it as a 10 second video 'slip.mp4'.
+    """
+    from visualisation import srf_cache
+
+    suffix = output_ffp.suffix.lower()
+    if suffix not in ENCODERS:
+        raise typer.BadParameter(
+            f"Expected a {' or '.join(ENCODERS)} file.", param_hint="output_ffp"
+        )
+    if suffix == ".mp4" and shutil.which("ffmpeg") is None:
+        raise typer.BadParameter(
+            "ffmpeg is required to write MP4 animations.", param_hint="output_ffp"
+        )
+
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        render_slip_animation(
+            srf_cache.read_srf(srf_ffp, SRF_COLUMNS),
+            output_ffp,
+            frame_count=frame_count,
+            fps=fps,
+            width=width,
+            dpi=dpi,
+            title=title,
+            latitude_pad=latitude_pad,
+            longitude_pad=longitude_pad,
+            coastline=coastline,
+            parallel=parallel,
+            workers=workers,
+        )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,451 @@
+"""Render SRF plot products for many realisations in parallel."""
+
+import glob
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from collections import Counter
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Annotated, Any, Optional
+
+import typer
+
+from qcore import cli
+from visualisation import presets, profiling
+from visualisation.realisation import read_realisation
+from visualisation.sources import plot_srf_suite
+from visualisation.sources.plot_srf_suite import Product
+
+app = typer.Typer()
+
+MANIFEST_FILENAME = "manifest.json"
+
+_started: Optional["multiprocessing.queues.SimpleQueue"] = None
+"""The queue a worker process reports the realisations it starts on."""
+
+
+def find_srfs(inputs: Iterable[str]) -> list[Path]:
+    """Expand a list of SRF paths, directories and globs into SRF paths.
+
+    Parameters
+    ----------
+    inputs : Iterable[str]
+        SRF paths, directories (searched recursively for ``*.srf``
+        files) or glob patterns.
+
+    Returns
+    -------
+    list[Path]
+        The SRF paths, in the order they were found and without
+        duplicates.
+    """
+    srf_ffps: dict[Path, None] = {}
+    for pattern in inputs:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(path.rglob("*.srf"))
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = [
+                Path(match) for match in sorted(glob.glob(pattern, recursive=True))
+            ]
+        srf_ffps.update(dict.fromkeys(matches))
+    return list(srf_ffps)
+
+
+def output_directories(srf_ffps: list[Path]) -> list[Path]:
+    """Name the output directory of each SRF of a batch.
+
+    Each SRF is plotted into a directory named after it. SRFs sharing a
+    name (in different input directories) would overwrite each other's
+    plots, so these are instead plotted into directories mirroring their
+    path relative to the directory containing every SRF of the batch.
+
+    Parameters
+    ----------
+    srf_ffps : list[Path]
+        The SRF paths.
+
+    Returns
+    -------
+    list[Path]
+        The output directory of each SRF, relative to the output
+        directory of the batch.
+    """
+    if not srf_ffps:
+        return []
+    stem_counts = Counter(srf_ffp.stem for srf_ffp in srf_ffps)
+    resolved_ffps = [srf_ffp.resolve() for srf_ffp in srf_ffps]
+    root = Path(os.path.commonpath([srf_ffp.parent for srf_ffp in resolved_ffps]))
+    return [
+        srf_ffp.relative_to(root).with_suffix("")
+        if stem_counts[srf_ffp.stem] > 1
+        else Path(srf_ffp.stem)
+        for srf_ffp in resolved_ffps
+    ]
+
+
+def find_realisation(
+    srf_ffp: Path, realisation_dir: Optional[Path] = None
+) -> Optional[Path]:
+    """Find the realisation an SRF was generated from.
+
+    The realisation is the JSON file with the same name as the SRF,
+    either in `realisation_dir` or alongside the SRF.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+    realisation_dir : Optional[Path]
+        The directory containing realisations, by default the directory
+        containing the SRF.
+
+    Returns
+    -------
+    Optional[Path]
+        The realisation path, or None if there is no realisation.
+    """
+    realisation_ffp = (realisation_dir or srf_ffp.parent) / f"{srf_ffp.stem}.json"
+    return realisation_ffp if realisation_ffp.is_file() else None
+
+
+def _initialise_worker(started: "multiprocessing.queues.SimpleQueue") -> None:
+    """Prepare a worker process for rendering plots.
+
+    Parameters
+    ----------
+    started : multiprocessing.queues.SimpleQueue
+        The queue the worker reports each realisation it starts on.
+    """
+    global _started
+    _started = started
+    # Importing pygmt loads the GMT shared library, which takes longer
+    # than rendering some plots. Workers started without forking begin
+    # with a fresh interpreter, so the import is done here to pay for
+    # it once per worker rather than with the first plot of each task.
+    import matplotlib
+    import pygmt  # noqa: F401
+
+    matplotlib.use("Agg")
+
+
+def manifest_entry(
+    srf_ffp: Path, realisation_ffp: Optional[Path], output_dir: Path
+) -> dict[str, Any]:
+    """Create the manifest entry of a realisation that has not been rendered.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+    realisation_ffp : Optional[Path]
+        Path to the realisation, if any.
+    output_dir : Path
+        The directory the plots are written into.
+
+    Returns
+    -------
+    dict[str, Any]
+        The manifest entry, with an ``ok`` status and no outputs.
+    """
+    return {
+        "srf": str(srf_ffp),
+        "realisation": str(realisation_ffp) if realisation_ffp else None,
+        "output_dir": str(output_dir),
+        "status": "ok",
+        "outputs": {},
+        "timings": {},
+        "profile": None,
+        "error": None,
+    }
+
+
+def render_realisation(
+    srf_ffp: Path,
+    realisation_ffp: Optional[Path],
+    output_dir: Path,
+    products: list[Product],
+    preset: presets.RenderPreset = presets.FULL,
+) -> dict[str, Any]:
+    """Render the plot products for one realisation, recording the outcome.
+
+    Any error raised while reading or plotting the realisation is
+    recorded in the returned manifest entry rather than propagated, so
+    that one bad realisation does not abort a batch.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+    realisation_ffp : Optional[Path]
+        Path to the realisation. Products requiring a realisation are
+        skipped if this is None.
+    output_dir : Path
+        The directory to write the plots into.
+    products : list[Product]
+        The products to render.
+    preset : presets.RenderPreset
+        The rendering preset of the map and panel products.
+
+    Returns
+    -------
+    dict[str, Any]
+        The manifest entry for the realisation, containing the input
+        paths, the outputs rendered and the time taken to render them,
+        the profile of the time spent in each rendering stage, and the
+        error traceback if rendering failed.
+    """
+    entry = manifest_entry(srf_ffp, realisation_ffp, output_dir)
+    if not realisation_ffp:
+        products = [
+            product
+            for product in products
+            if product not in plot_srf_suite.REALISATION_PRODUCTS
+        ]
+
+    profile = None
+    try:
+        with profiling.profiling(gmt_modules=True) as profile:
+            start = time.perf_counter()
+            srf_data = plot_srf_suite.read_srf_for_products(srf_ffp, products)
+            realisation = read_realisation(realisation_ffp) if realisation_ffp else None
+            entry["timings"]["load"] = time.perf_counter() - start
+
+            output_dir.mkdir(parents=True, exist_ok=True)
+            timings = plot_srf_suite.render_suite(
+                srf_data,
+                srf_ffp.stem,
+                output_dir,
+                realisation=realisation,
+                products=products,
+                preset=preset,
+            )
+    except Exception:  # noqa: BLE001
+        # Failures are isolated to the realisation, and reported in the manifest.
+        entry["status"] = "failed"
+        entry["error"] = traceback.format_exc()
+        return entry
+    finally:
+        if profile is not None:
+            entry["profile"] = profile.to_dict()
+
+    entry["timings"] |= timings
+    entry["outputs"] = {
+        product: str(
+            plot_srf_suite.product_output_path(output_dir, srf_ffp.stem, product)
+        )
+        for product in timings
+    }
+    return entry
+
+
+def _render_task(
+    i: int,
+    srf_ffp: Path,
+    realisation_ffp: Optional[Path],
+    output_dir: Path,
+    products: list[Product],
+    preset: presets.RenderPreset,
+) -> dict[str, Any]:
+    """Render one realisation of a batch in a worker process.
+
+    Parameters
+    ----------
+    i : int
+        The index of the realisation in the batch.
+    srf_ffp : Path
+        Path to the SRF file.
+    realisation_ffp : Optional[Path]
+        Path to the realisation, if any.
+    output_dir : Path
+        The directory to write the plots into.
+    products : list[Product]
+        The products to render.
+    preset : presets.RenderPreset
+        The rendering preset of the map and panel products.
+
+    Returns
+    -------
+    dict[str, Any]
+        The manifest entry for the realisation.
+    """
+    # Reported before rendering, so that if the worker dies the parent
+    # knows which realisations it was rendering.
+    _started.put(i)
+    return render_realisation(srf_ffp, realisation_ffp, output_dir, products, preset)
+
+
+def _render_pool(
+    tasks: list[tuple[Path, Optional[Path], Path]],
+    indices: list[int],
+    products: list[Product],
+    preset: presets.RenderPreset,
+    workers: int,
+) -> tuple[dict[int, dict[str, Any]], list[int], list[int]]:
+    """Render realisations in a pool of worker processes until it breaks.
+
+    A worker that dies (e.g. because GMT crashed) breaks the pool, so
+    no realisation still in the pool is rendered. The status of each
+    realisation that is rendered is printed as it finishes.
+
+    Parameters
+    ----------
+    tasks : list[tuple[Path, Optional[Path], Path]]
+        The SRF path, realisation path and output directory of every
+        realisation in the batch.
+    indices : list[int]
+        The indices of the realisations to render.
+    products : list[Product]
+        The products to render.
+    preset : presets.RenderPreset
+        The rendering preset of the map and panel products.
+    workers : int
+        The number of worker processes.
+
+    Returns
+    -------
+    entries : dict[int, dict[str, Any]]
+        The manifest entry of each realisation, by index. Realisations
+        not rendered because the pool broke have a failed entry.
+    broken : list[int]
+        The realisations not rendered because the pool broke.
+    running : list[int]
+        The realisations not rendered because the pool broke that had
+        started rendering, one of which killed its worker. If the pool
+        broke before any started (e.g. a worker failed to start), this
+        is every realisation not rendered.
+    """
+    started = multiprocessing.SimpleQueue()
+    started_indices = set()
+    broken = []
+    entries = {}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_initialise_worker, initargs=(started,)
+    ) as executor:
+        futures = {
+            executor.submit(_render_task, i, *tasks[i], products, preset): i
+            for i in indices
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            while not started.empty():
+                started_indices.add(started.get())
+            try:
+                entries[i] = future.result()
+            except Exception as e:  # noqa: BLE001
+                entries[i] = manifest_entry(*tasks[i])
+                entries[i]["status"] = "failed"
+                entries[i]["error"] = traceback.format_exc()
+                if isinstance(e, BrokenProcessPool):
+                    broken.append(i)
+                    continue
+            print(f"{entries[i]['status']:<8}{entries[i]['srf']}")
+    while not started.empty():
+        started_indices.add(started.get())
+    running = [i for i in broken if i in started_indices]
+    return entries, broken, running or broken
+
+
+@cli.from_docstring(app)
+def plot_srf_batch(
+    inputs: Annotated[list[str], typer.Argument()],
+    output_dir: Annotated[Path, typer.Option(file_okay=False)] = Path("."),
+    realisation_dir: Annotated[
+        Optional[Path], typer.Option(exists=True, file_okay=False)
+    ] = None,
+    product: Annotated[Optional[list[Product]], typer.Option()] = None,
+    workers: Annotated[Optional[int], typer.Option(min=1)] = None,
+    draft: Annotated[bool, typer.Option()] = False,
+) -> None:
+    """Render plot products for many SRFs in parallel.
+
+    The plots for each SRF are written to a subdirectory of the output
+    directory named after the SRF (or, for SRFs sharing a name, after
+    its path relative to the directory containing every SRF), and a
+    manifest of the outputs, timings and any failures is written to
+    ``manifest.json`` in the output directory.
+
+    Parameters
+    ----------
+    inputs : list[str]
+        SRF files, directories of SRF files or glob patterns matching
+        SRF files.
+    output_dir : Path
+        Directory to write plots and the manifest into.
+    realisation_dir : Optional[Path]
+        Directory containing the realisation for each SRF, named
+        ``<SRF name>.json``. By default, realisations are searched for
+        alongside each SRF.
+    product : Optional[list[Product]]
+        Product to render, may be repeated. Defaults to every product.
+    workers : Optional[int]
+        Number of worker processes, by default one per CPU.
+    draft : bool
+        If set, render the maps and panels as quick-look plots (see the
+        ``--draft`` option of each plot command).
+
+    Raises
+    ------
+    typer.Exit
+        If any realisation failed to render.
+    """
+    products = [
+        product_type for product_type in Product if product_type in (product or Product)
+    ]
+    preset = presets.render_preset(draft)
+    srf_ffps = find_srfs(inputs)
+    srf_output_dirs = [
+        output_dir / srf_output_dir for srf_output_dir in output_directories(srf_ffps)
+    ]
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    tasks = [
+        (srf_ffp, find_realisation(srf_ffp, realisation_dir), srf_output_dir)
+        for srf_ffp, srf_output_dir in zip(srf_ffps, srf_output_dirs)
+    ]
+    entries = [None] * len(tasks)
+    remaining = list(range(len(tasks)))
+    while remaining:
+        pool_entries, broken, running = _render_pool(
+            tasks, remaining, products, preset, workers or os.cpu_count()
+        )
+        for i in running:
+            # One of the realisations running when the pool broke killed
+            # its worker. Each is retried once in a pool of its own, so a
+            # crash there is the fault of that realisation alone, and it
+            # is recorded as failed rather than retried again.
+            retry_entries, crashed, _ = _render_pool(tasks, [i], products, preset, 1)
+            pool_entries[i] = retry_entries[i]
+            if crashed:
+                print(f"{pool_entries[i]['status']:<8}{pool_entries[i]['srf']}")
+        for i, entry in pool_entries.items():
+            entries[i] = entry
+        # The realisations that had not started when the pool broke are
+        # rendered in a new pool.
+        remaining = [i for i in broken if i not in running]
+
+    failures = sum(entry["status"] == "failed" for entry in entries)
+    manifest = {
+        "products": products,
+        "preset": preset.name,
+        "wall_time": time.perf_counter() - start,
+        "succeeded": len(entries) - failures,
+        "failed": failures,
+        "realisations": entries,
+    }
+    (output_dir / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2))
+    print(f"Rendered {len(entries) - failures} of {len(entries)} SRFs.")
+    if failures:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -1,17 +1,137 @@
 """Utility script to plot cumulative moment over time for an SRF."""
 
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import numpy as np
 import typer
-from matplotlib import pyplot as plt
 
 from qcore import cli
-from source_modelling import moment, rupture_propagation, srf
+from visualisation import profiling
+from visualisation.realisation import read_realisation
+
+if TYPE_CHECKING:
+    from source_modelling import srf
+    from visualisation.moment_rate import MomentRates
+    from visualisation.realisation import Realisation
 
 app = typer.Typer()
 
+SRF_COLUMNS = frozenset({"area", "dt"})
+
+
+@profiling.span("render")
+def plot_cumulative_moment(
+    moment_rates: "MomentRates",
+    output_png_ffp: Path,
+    dpi: int = 300,
+    min_shade_cutoff: float = 0.05,
+    max_shade_cutoff: float = 0.95,
+    height: float = 10,
+    width: float = 10,
+) -> None:
+    """Plot cumulative moment over time from precomputed moment rates.
+
+    Parameters
+    ----------
+    moment_rates : MomentRates
+        The overall and per-fault moment rates.
+    output_png_ffp : Path
+        Output plot path.
+    dpi : int
+        Plot image pixel density (higher = better).
+    min_shade_cutoff : float, default 0.05
+        Minimum shading cutoff.
+    max_shade_cutoff : float, default 0.95
+        Maximum shading cutoff.
+    height : float
+        Height of plot (in cm).
+    width : float
+        Width of plot (in cm).
+    """
+    from matplotlib import pyplot as plt
+
+    t = moment_rates.t
+    shaded = moment_rates.release_window(min_shade_cutoff, max_shade_cutoff)
+    fig, ax = plt.subplots()
+    cm = 1 / 2.54
+    fig.set_size_inches(width * cm, height * cm)
+    ax.fill_between(t[shaded], moment_rates.moment[shaded], alpha=0.2)
+    ax.plot(t, moment_rates.moment, label="Overall Moment")
+
+    for fault, (fault_name, individual_moment) in enumerate(
+        zip(moment_rates.fault_names, moment_rates.fault_moment)
+    ):
+        ax.plot(t, individual_moment, label=fault_name)
+        shaded = moment_rates.release_window(
+            min_shade_cutoff, max_shade_cutoff, fault=fault
+        )
+        ax.fill_between(t[shaded], individual_moment[shaded], alpha=0.2)
+
+    ax.set_ylabel("Cumulative Moment (Nm)")
+    ax.set_xlabel("Time (s)")
+    ax.legend()
+    min_shade_percent = int(np.round(min_shade_cutoff * 100))
+    max_shade_percent = int(np.round(max_shade_cutoff * 100))
+    ax.set_title(
+        f"Cumulative Moment over Time (Shaded Area: {min_shade_percent}% - {max_shade_percent}%)"
+    )
+
+    with profiling.span("save"):
+        fig.savefig(output_png_ffp, dpi=dpi)
+    plt.close(fig)
+
+
+@profiling.span("compute")
+def render_cumulative_moment(
+    srf_data: "srf.SrfFile",
+    output_png_ffp: Path,
+    realisation: Optional["Realisation"] = None,
+    dpi: int = 300,
+    min_shade_cutoff: float = 0.05,
+    max_shade_cutoff: float = 0.95,
+    height: float = 10,
+    width: float = 10,
+) -> None:
+    """Plot cumulative moment for an SRF over time from a loaded SRF.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF to plot.
+    output_png_ffp : Path
+        Output plot path.
+    realisation : Optional[Realisation]
+        The realisation, used to plot individual fault contribution.
+    dpi : int
+        Plot image pixel density (higher = better).
+    min_shade_cutoff : float, default 0.05
+        Minimum shading cutoff.
+    max_shade_cutoff : float, default 0.95
+        Maximum shading cutoff.
+    height : float
+        Height of plot (in cm).
+    width : float
+        Width of plot (in cm).
+    """
+    from visualisation import moment_rate
+    from visualisation.fault_index import FaultPointIndex
+
+    fault_index = (
+        FaultPointIndex.from_realisation(realisation, srf_data.header)
+        if realisation
+        else None
+    )
+    plot_cumulative_moment(
+        moment_rate.from_srf(srf_data, fault_index),
+        output_png_ffp,
+        dpi=dpi,
+        min_shade_cutoff=min_shade_cutoff,
+        max_shade_cutoff=max_shade_cutoff,
+        height=height,
+        width=width,
+    )
+
 
 @cli.from_docstring(app)
 def plot_srf_cumulative_moment(
@@ -25,6 +145,14 @@ def plot_srf_cumulative_moment(
     max_shade_cutoff: Annotated[float, typer.Option(min=0, max=1)] = 0.95,
     height: Annotated[float, typer.Option(min=0)] = 10,
     width: Annotated[float, typer.Option(min=0)] = 10,
+    streaming: Annotated[bool, typer.Option()] = False,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
 ) -> None:
     """Plot cumulative moment for an SRF over time.
 
@@ -46,89 +174,51 @@ def plot_srf_cumulative_moment(
         Height of plot (in cm).
     width : float, default 10
         Width of plot (in cm).
+    streaming : bool, default False
+        If set, stream the SRF rather than loading it into memory. Use
+        this for SRFs too large to fit in memory.
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
     """
-    srf_data = srf.read_srf(srf_ffp)
-
-    overall_moment = moment.moment_over_time_from_moment_rate(
-        moment.moment_rate_over_time_from_slip(
-            srf_data.points["area"],
-            srf_data.slip,
-            srf_data.dt,
-            srf_data.nt,
-        )
-    )
-    total_moment = overall_moment["moment"].iloc[-1]
-
-    shaded_moments = overall_moment[
-        (overall_moment["moment"] >= total_moment * min_shade_cutoff)
-        & (overall_moment["moment"] <= total_moment * max_shade_cutoff)
-    ]
-    fig, ax = plt.subplots()
-    cm = 1 / 2.54
-    fig.set_size_inches(width * cm, height * cm)
-    ax.fill_between(shaded_moments.index.values, shaded_moments["moment"], alpha=0.2)
-    ax.plot(
-        overall_moment.index.values, overall_moment["moment"], label="Overall Moment"
-    )
-
-    if realisation_ffp:  # pragma: no cover
-        # NOTE: this import is here because the workflow is, as yet,
-        # not ready to be installed along-side source modelling.
-        from workflow.realisations import RupturePropagationConfig, SourceConfig
-
-        source_config = SourceConfig.read_from_realisation(realisation_ffp)
-        rupture_propogation_config = RupturePropagationConfig.read_from_realisation(
-            realisation_ffp
-        )
-        segment_counter = 0
-        point_counter = 0
-        for fault_name in rupture_propagation.tree_nodes_in_order(
-            rupture_propogation_config.rupture_causality_tree
-        ):
-            plane_count = len(source_config.source_geometries[fault_name].planes)
-            segments = srf_data.header.iloc[
-                segment_counter : segment_counter + plane_count
-            ]
-            num_points = (segments["nstk"] * segments["ndip"]).sum()
-            segment_points = srf_data.points.iloc[
-                point_counter : point_counter + num_points
-            ]
-
-            individual_moment = moment.moment_over_time_from_moment_rate(
-                moment.moment_rate_over_time_from_slip(
-                    segment_points["area"],
-                    srf_data.slip[point_counter : point_counter + num_points],
-                    srf_data.dt,
-                    srf_data.nt,
-                )
+    from visualisation import srf_cache, srf_stream
+    from visualisation.fault_index import FaultPointIndex
+
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        realisation = read_realisation(realisation_ffp) if realisation_ffp else None
+        if not streaming:
+            render_cumulative_moment(
+                srf_cache.read_srf(srf_ffp, SRF_COLUMNS),
+                output_png_ffp,
+                realisation=realisation,
+                dpi=dpi,
+                min_shade_cutoff=min_shade_cutoff,
+                max_shade_cutoff=max_shade_cutoff,
+                height=height,
+                width=width,
             )
+            return
 
-            ax.plot(
-                individual_moment.index.values,
-                individual_moment["moment"],
-                label=fault_name,
-            )
-            total_moment = individual_moment["moment"].iloc[-1]
-            shaded_moments = individual_moment[
-                (individual_moment["moment"] >= total_moment * min_shade_cutoff)
-                & (individual_moment["moment"] <= total_moment * max_shade_cutoff)
-            ]
-            ax.fill_between(
-                shaded_moments.index.values, shaded_moments["moment"], alpha=0.2
-            )
-            segment_counter += plane_count
-            point_counter += num_points
-
-    ax.set_ylabel("Cumulative Moment (Nm)")
-    ax.set_xlabel("Time (s)")
-    ax.legend()
-    min_shade_percent = int(np.round(min_shade_cutoff * 100))
-    max_shade_percent = int(np.round(max_shade_cutoff * 100))
-    ax.set_title(
-        f"Cumulative Moment over Time (Shaded Area: {min_shade_percent}% - {max_shade_percent}%)"
-    )
-
-    fig.savefig(output_png_ffp, dpi=dpi)
+        srf_summary = srf_stream.summarise_srf(srf_ffp)
+        fault_index = (
+            FaultPointIndex.from_realisation(realisation, srf_summary.header)
+            if realisation
+            else None
+        )
+        plot_cumulative_moment(
+            srf_summary.moment_rates(fault_index),
+            output_png_ffp,
+            dpi=dpi,
+            min_shade_cutoff=min_shade_cutoff,
+            max_shade_cutoff=max_shade_cutoff,
+            height=height,
+            width=width,
+        )
 
 
 if __name__ == "__main__":
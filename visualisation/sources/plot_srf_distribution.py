@@ -1,17 +1,64 @@
-#!/usr/bin/env python3
 """Plot SRF distributions."""
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import typer
-from matplotlib import pyplot as plt
 
 from qcore import cli
-from source_modelling import srf
-from visualisation import utils
+from visualisation import profiling, utils
+
+if TYPE_CHECKING:
+    from source_modelling import srf
 
 app = typer.Typer()
 
+SRF_COLUMNS = frozenset({"slip"})
+
+
+@profiling.span("render")
+def render_slip_distribution(
+    srf_data: "srf.SrfFile",
+    srf_name: str,
+    plot_png: Path,
+    dpi: int = 300,
+    height: float = 10,
+    width: float = 10,
+    title: Optional[str] = None,
+) -> None:
+    """Plot the slip distribution from a loaded SRF as a histogram.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF to plot.
+    srf_name : str
+        The name of the SRF, used in the default title.
+    plot_png : Path
+        Path to save the output PNG file.
+    dpi : int, optional
+        Pixel density of the output image (higher = better), by default 300.
+    height : float, optional
+        Height of the plot in cm, by default 10.
+    width : float, optional
+        Width of the plot in cm, by default 10.
+    title : str, optional
+        Title for the plot, by default None.
+    """
+    from matplotlib import pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(width, height))
+
+    ax.hist(srf_data.points["slip"], density=True)
+    ax.set_xlabel("Slip (cm)")
+    ax.set_title(
+        title
+        or f'Slip PDF for {srf_name} ({utils.format_description(srf_data.points["slip"], compact=True)})'
+    )
+
+    with profiling.span("save"):
+        fig.savefig(plot_png, dpi=dpi)
+    plt.close(fig)
+
 
 @cli.from_docstring(app)
 def plot_srf_distribution(
@@ -21,6 +68,13 @@ def plot_srf_distribution(
     height: Annotated[float, typer.Option(min=0)] = 10,
     width: Annotated[float, typer.Option(min=0)] = 10,
     title: Annotated[Optional[str], typer.Option()] = None,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
 ) -> None:
     """Plot the slip distribution from an SRF file as a histogram.
 
@@ -38,15 +92,24 @@ def plot_srf_distribution(
         Width of the plot in cm, by default 10.
     title : str, optional
         Title for the plot, by default None.
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
     """
-    srf_data = srf.read_srf(srf_ffp)
-    fig, ax = plt.subplots(figsize=(width, height))
-
-    ax.hist(srf_data.points["slip"], density=True)
-    ax.set_xlabel("Slip (cm)")
-    ax.set_title(
-        title
-        or f'Slip PDF for {srf_ffp.stem} ({utils.format_description(srf_data.points["slip"], compact=True)})'
-    )
+    from visualisation import srf_cache
 
-    plt.savefig(plot_png, dpi=dpi)
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        render_slip_distribution(
+            srf_cache.read_srf(srf_ffp, SRF_COLUMNS, slip=False),
+            srf_ffp.stem,
+            plot_png,
+            dpi=dpi,
+            height=height,
+            width=width,
+            title=title,
+        )
@@ -1,16 +1,119 @@
 """Utility script to plot moment over time for an SRF."""
 
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import typer
-from matplotlib import pyplot as plt
 
 from qcore import cli
-from source_modelling import moment, rupture_propagation, srf
+from visualisation import profiling
+from visualisation.realisation import read_realisation
+
+if TYPE_CHECKING:
+    from source_modelling import srf
+    from visualisation.moment_rate import MomentRates
+    from visualisation.realisation import Realisation
 
 app = typer.Typer()
 
+SRF_COLUMNS = frozenset({"area", "slip", "dt"})
+
+
+@profiling.span("render")
+def plot_moment_rate(
+    moment_rates: "MomentRates",
+    magnitude: float,
+    output_png_ffp: Path,
+    dpi: int = 300,
+    height: float = 10,
+    width: float = 10,
+) -> None:
+    """Plot precomputed moment rates over time.
+
+    Parameters
+    ----------
+    moment_rates : MomentRates
+        The overall and per-fault moment rates.
+    magnitude : float
+        The moment magnitude of the rupture.
+    output_png_ffp : Path
+        Output plot path.
+    dpi : int
+        Plot image pixel density (higher = better).
+    height : float
+        Height of plot (in cm).
+    width : float
+        Width of plot (in cm).
+    """
+    from matplotlib import pyplot as plt
+
+    fig, ax = plt.subplots()
+    cm = 1 / 2.54
+    fig.set_size_inches(width * cm, height * cm)
+    ax.plot(moment_rates.t, moment_rates.moment_rate, label="Overall Moment Rate")
+
+    for fault_name, individual_moment_rate in zip(
+        moment_rates.fault_names, moment_rates.fault_moment_rate
+    ):
+        ax.plot(moment_rates.t, individual_moment_rate, label=fault_name)
+
+    ax.set_ylabel("Moment Rate (Nm/s)")
+    ax.set_xlabel("Time (s)")
+    ax.legend()
+    ax.set_title(f"Moment over Time (Total Mw: {magnitude:.2f})")
+
+    with profiling.span("save"):
+        fig.savefig(output_png_ffp, dpi=dpi)
+    plt.close(fig)
+
+
+@profiling.span("compute")
+def render_moment_rate(
+    srf_data: "srf.SrfFile",
+    output_png_ffp: Path,
+    realisation: Optional["Realisation"] = None,
+    dpi: int = 300,
+    height: float = 10,
+    width: float = 10,
+) -> None:
+    """Plot released moment for an SRF over time from a loaded SRF.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF to plot.
+    output_png_ffp : Path
+        Output plot path.
+    realisation : Optional[Realisation]
+        The realisation, used to plot individual fault contribution.
+    dpi : int
+        Plot image pixel density (higher = better).
+    height : float
+        Height of plot (in cm).
+    width : float
+        Width of plot (in cm).
+    """
+    from source_modelling import moment
+    from visualisation import moment_rate
+    from visualisation.fault_index import FaultPointIndex
+
+    magnitude = moment.moment_to_magnitude(
+        moment.MU * (srf_data.points["area"] * srf_data.points["slip"] / (100**3)).sum()
+    )
+    fault_index = (
+        FaultPointIndex.from_realisation(realisation, srf_data.header)
+        if realisation
+        else None
+    )
+    plot_moment_rate(
+        moment_rate.from_srf(srf_data, fault_index),
+        magnitude,
+        output_png_ffp,
+        dpi=dpi,
+        height=height,
+        width=width,
+    )
+
 
 @cli.from_docstring(app)
 def plot_srf_moment(
@@ -22,6 +125,14 @@ def plot_srf_moment(
     realisation_ffp: Annotated[Optional[Path], typer.Option()] = None,
     height: Annotated[float, typer.Option(min=0)] = 10,
     width: Annotated[float, typer.Option(min=0)] = 10,
+    streaming: Annotated[bool, typer.Option()] = False,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
 ) -> None:
     """Plot released moment for an SRF over time.
 
@@ -39,68 +150,48 @@ def plot_srf_moment(
         Height of plot (in cm).
     width : float
         Width of plot (in cm).
+    streaming : bool
+        If set, stream the SRF rather than loading it into memory. Use
+        this for SRFs too large to fit in memory.
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
     """
-    srf_data = srf.read_srf(srf_ffp)
-
-    magnitude = moment.moment_to_magnitude(
-        moment.MU * (srf_data.points["area"] * srf_data.points["slip"] / (100**3)).sum()
-    )
-
-    dt = srf_data.points["dt"].iloc[0]
-
-    overall_moment_rate = moment.moment_rate_over_time_from_slip(
-        srf_data.points["area"], srf_data.slip, dt, srf_data.nt
-    )
-    fig, ax = plt.subplots()
-    cm = 1 / 2.54
-    fig.set_size_inches(width * cm, height * cm)
-    ax.plot(
-        overall_moment_rate.index.values,
-        overall_moment_rate["moment_rate"],
-        label="Overall Moment Rate",
-    )
-
-    if realisation_ffp:  # pragma: no cover
-        # NOTE: this import is here because the workflow is, as yet,
-        # not ready to be installed along-side source modelling.
-        from workflow.realisations import RupturePropagationConfig, SourceConfig
-
-        source_config = SourceConfig.read_from_realisation(realisation_ffp)
-        rupture_propogation_config = RupturePropagationConfig.read_from_realisation(
-            realisation_ffp
-        )
-        segment_counter = 0
-        point_counter = 0
-        for fault_name in rupture_propagation.tree_nodes_in_order(
-            rupture_propogation_config.rupture_causality_tree
-        ):
-            plane_count = len(source_config.source_geometries[fault_name].planes)
-            segments = srf_data.header.iloc[
-                segment_counter : segment_counter + plane_count
-            ]
-            num_points = (segments["nstk"] * segments["ndip"]).sum()
-            individual_moment_rate = moment.moment_rate_over_time_from_slip(
-                srf_data.points["area"]
-                .iloc[point_counter : point_counter + num_points]
-                .to_numpy(),
-                srf_data.slip[point_counter : point_counter + num_points],
-                dt,
-                srf_data.nt,
+    from visualisation import srf_cache, srf_stream
+    from visualisation.fault_index import FaultPointIndex
+
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        realisation = read_realisation(realisation_ffp) if realisation_ffp else None
+        if not streaming:
+            render_moment_rate(
+                srf_cache.read_srf(srf_ffp, SRF_COLUMNS),
+                output_png_ffp,
+                realisation=realisation,
+                dpi=dpi,
+                height=height,
+                width=width,
             )
-            ax.plot(
-                individual_moment_rate.index.values,
-                individual_moment_rate["moment_rate"],
-                label=fault_name,
-            )
-            segment_counter += plane_count
-            point_counter += num_points
-
-    ax.set_ylabel("Moment Rate (Nm/s)")
-    ax.set_xlabel("Time (s)")
-    ax.legend()
-    ax.set_title(f"Moment over Time (Total Mw: {magnitude:.2f})")
+            return
 
-    fig.savefig(output_png_ffp, dpi=dpi)
+        srf_summary = srf_stream.summarise_srf(srf_ffp)
+        fault_index = (
+            FaultPointIndex.from_realisation(realisation, srf_summary.header)
+            if realisation
+            else None
+        )
+        plot_moment_rate(
+            srf_summary.moment_rates(fault_index),
+            srf_summary.magnitude,
+            output_png_ffp,
+            dpi=dpi,
+            height=height,
+            width=width,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,288 @@
+"""Render every SRF plot product from a single SRF load."""
+
+import time
+from collections.abc import Iterable
+from enum import StrEnum
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Optional
+
+import typer
+
+from qcore import cli
+from visualisation import presets, profiling
+from visualisation.realisation import read_realisation
+from visualisation.sources import (
+    plot_mw_contributions,
+    plot_rakes,
+    plot_rise,
+    plot_slip_rise_rake,
+    plot_srf,
+    plot_srf_cumulative_moment,
+    plot_srf_distribution,
+    plot_srf_moment,
+)
+
+if TYPE_CHECKING:
+    from source_modelling import srf
+    from visualisation.realisation import Realisation
+
+app = typer.Typer()
+
+
+class Product(StrEnum):
+    """Plot products that can be rendered from an SRF."""
+
+    slip = "slip"
+    rise = "rise"
+    rakes = "rakes"
+    moment_rate = "moment_rate"
+    cumulative_moment = "cumulative_moment"
+    mw_contributions = "mw_contributions"
+    slip_rise_rake = "slip_rise_rake"
+    slip_distribution = "slip_distribution"
+
+
+REALISATION_PRODUCTS = frozenset({Product.mw_contributions, Product.slip_rise_rake})
+SLIP_TIME_FUNCTION_PRODUCTS = frozenset(
+    {Product.moment_rate, Product.cumulative_moment}
+)
+PRODUCT_COLUMNS = {
+    Product.slip: plot_srf.SRF_COLUMNS,
+    Product.rise: plot_rise.SRF_COLUMNS,
+    Product.rakes: plot_rakes.SRF_COLUMNS,
+    Product.moment_rate: plot_srf_moment.SRF_COLUMNS,
+    Product.cumulative_moment: plot_srf_cumulative_moment.SRF_COLUMNS,
+    Product.mw_contributions: plot_mw_contributions.SRF_COLUMNS,
+    Product.slip_rise_rake: plot_slip_rise_rake.SRF_COLUMNS,
+    Product.slip_distribution: plot_srf_distribution.SRF_COLUMNS,
+}
+
+
+def render_product(
+    product: Product,
+    srf_data: "srf.SrfFile",
+    output_ffp: Path,
+    realisation: Optional["Realisation"] = None,
+    srf_name: str = "SRF",
+    preset: presets.RenderPreset = presets.FULL,
+) -> None:
+    """Render a single plot product with its default options.
+
+    Parameters
+    ----------
+    product : Product
+        The plot product to render.
+    srf_data : srf.SrfFile
+        The SRF to plot.
+    output_ffp : Path
+        Output plot image.
+    realisation : Optional[Realisation]
+        The realisation the SRF was generated from. Required for the
+        products in `REALISATION_PRODUCTS`.
+    srf_name : str
+        The name of the SRF, used in plot titles.
+    preset : presets.RenderPreset
+        The rendering preset of the map and panel products.
+    """
+    match product:
+        case Product.slip:
+            plot_srf.render_slip_map(
+                srf_data, output_ffp, realisation=realisation, preset=preset
+            )
+        case Product.rise:
+            plot_rise.render_rise_map(srf_data, output_ffp, preset=preset)
+        case Product.rakes:
+            plot_rakes.render_rakes(srf_data, output_ffp, preset=preset)
+        case Product.moment_rate:
+            plot_srf_moment.render_moment_rate(
+                srf_data, output_ffp, realisation=realisation
+            )
+        case Product.cumulative_moment:
+            plot_srf_cumulative_moment.render_cumulative_moment(
+                srf_data, output_ffp, realisation=realisation
+            )
+        case Product.mw_contributions:
+            plot_mw_contributions.render_mw_contributions(
+                srf_data, realisation, output_ffp, width=15, height=15
+            )
+        case Product.slip_rise_rake:
+            plot_slip_rise_rake.render_slip_rise_rake(
+                srf_data, realisation, output_ffp, width=30, height=15, preset=preset
+            )
+        case Product.slip_distribution:
+            plot_srf_distribution.render_slip_distribution(
+                srf_data, srf_name, output_ffp
+            )
+
+
+def product_output_path(output_dir: Path, srf_name: str, product: Product) -> Path:
+    """Find the output path of a plot product.
+
+    Parameters
+    ----------
+    output_dir : Path
+        The directory to write plots into.
+    srf_name : str
+        The name of the SRF being plotted.
+    product : Product
+        The plot product.
+
+    Returns
+    -------
+    Path
+        The path of the product image.
+    """
+    return output_dir / f"{srf_name}_{product}.png"
+
+
+def read_srf_for_products(srf_ffp: Path, products: Iterable[Product]) -> "srf.SrfFile":
+    """Read an SRF, loading only the fields required by a set of products.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+    products : Iterable[Product]
+        The products that will be rendered from the SRF.
+
+    Returns
+    -------
+    srf.SrfFile
+        The SRF restricted to the fields the products require.
+    """
+    from visualisation import srf_cache
+
+    products = set(products)
+    columns = frozenset().union(*(PRODUCT_COLUMNS[product] for product in products))
+    return srf_cache.read_srf(
+        srf_ffp,
+        columns,
+        slip=not products.isdisjoint(SLIP_TIME_FUNCTION_PRODUCTS),
+    )
+
+
+def render_suite(
+    srf_data: "srf.SrfFile",
+    srf_name: str,
+    output_dir: Path,
+    realisation: Optional["Realisation"] = None,
+    products: Iterable[Product] = tuple(Product),
+    preset: presets.RenderPreset = presets.FULL,
+) -> dict[Product, float]:
+    """Render plot products from a loaded SRF.
+
+    Products that require a realisation are skipped if no realisation
+    is supplied.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF to plot.
+    srf_name : str
+        The name of the SRF, used to name the output images.
+    output_dir : Path
+        The directory to write plots into.
+    realisation : Optional[Realisation]
+        The realisation the SRF was generated from.
+    products : Iterable[Product]
+        The plot products to render, by default all products.
+    preset : presets.RenderPreset
+        The rendering preset of the map and panel products.
+
+    Returns
+    -------
+    dict[Product, float]
+        The wall time (in seconds) taken to render each product.
+    """
+    from matplotlib import pyplot as plt
+
+    timings = {}
+    for product in products:
+        if product in REALISATION_PRODUCTS and realisation is None:
+            continue
+        start = time.perf_counter()
+        # Some products modify the global matplotlib configuration,
+        # which must not leak into the products rendered after them.
+        with plt.rc_context():
+            render_product(
+                product,
+                srf_data,
+                product_output_path(output_dir, srf_name, product),
+                realisation=realisation,
+                srf_name=srf_name,
+                preset=preset,
+            )
+        timings[product] = time.perf_counter() - start
+    return timings
+
+
+@cli.from_docstring(app)
+def plot_srf_suite(
+    srf_ffp: Annotated[Path, typer.Argument(exists=True, dir_okay=False)],
+    output_dir: Annotated[Path, typer.Argument(file_okay=False)] = Path("."),
+    realisation_ffp: Annotated[
+        Optional[Path], typer.Option(exists=True, dir_okay=False)
+    ] = None,
+    product: Annotated[Optional[list[Product]], typer.Option()] = None,
+    draft: Annotated[bool, typer.Option()] = False,
+    profile_ffp: Annotated[
+        Optional[Path], typer.Option("--profile", dir_okay=False)
+    ] = None,
+    cprofile_ffp: Annotated[
+        Optional[Path], typer.Option("--cprofile", dir_okay=False)
+    ] = None,
+    trace_memory: Annotated[bool, typer.Option()] = False,
+) -> None:
+    """Render every plot product for an SRF from a single SRF load.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to SRF file to plot.
+    output_dir : Path
+        Directory to write plots into.
+    realisation_ffp : Optional[Path]
+        Path to the realisation, required for the Mw contribution and
+        slip-rise-rake plots and used to break down the other plots by fault.
+    product : Optional[list[Product]]
+        Product to render, may be repeated. Defaults to every product.
+    draft : bool
+        If set, render the maps and panels as quick-look plots (see the
+        ``--draft`` option of each plot command).
+    profile_ffp : Optional[Path]
+        Path to write a JSON report of the time spent in each stage of
+        the command to.
+    cprofile_ffp : Optional[Path]
+        Path to write cProfile statistics of the command to.
+    trace_memory : bool
+        If set, the profile report also includes the peak Python and
+        numpy memory of each stage. This slows the command down.
+    """
+    products = set(product or Product)
+    if not realisation_ffp:
+        products -= REALISATION_PRODUCTS
+
+    with profiling.profile_command(profile_ffp, cprofile_ffp, trace_memory):
+        start = time.perf_counter()
+        srf_data = read_srf_for_products(srf_ffp, products)
+        realisation = read_realisation(realisation_ffp) if realisation_ffp else None
+        load_time = time.perf_counter() - start
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        timings = render_suite(
+            srf_data,
+            srf_ffp.stem,
+            output_dir,
+            realisation=realisation,
+            products=[product for product in Product if product in products],
+            preset=presets.render_preset(draft),
+        )
+
+    print(f"{'load':<20}{load_time:>8.2f}s")
+    for rendered_product, elapsed in timings.items():
+        print(f"{rendered_product:<20}{elapsed:>8.2f}s")
+    print(f"{'total':<20}{load_time + sum(timings.values()):>8.2f}s")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,125 @@
+"""Spatial index over the subfaults of an SRF.
+
+Mapping points given in realisation coordinates (e.g. jump points or
+hypocentres) onto SRF subfaults otherwise requires computing the
+distance from every subfault to every query point. `SubfaultIndex`
+builds a KD-tree over the subfaults in NZTM coordinates once, and then
+answers nearest-subfault and radius queries for many points at a time.
+"""
+
+from typing import TYPE_CHECKING, Self
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from qcore import coordinates
+
+if TYPE_CHECKING:
+    from source_modelling import srf
+
+
+class SubfaultIndex:
+    """A KD-tree over SRF subfaults in a local Cartesian (NZTM) frame.
+
+    Query points are given, like the output of
+    `Fault.fault_coordinates_to_wgs_depth_coordinates`, as (lat, lon,
+    depth) with depth in metres. Distances are returned in metres.
+
+    Parameters
+    ----------
+    points : pd.DataFrame
+        The SRF points, with lat, lon and dep (km) columns.
+    """
+
+    def __init__(self, points: pd.DataFrame) -> None:
+        """Build the index of a set of SRF points."""  # numpydoc ignore=PR01
+        import scipy as sp
+
+        self._tree = sp.spatial.cKDTree(
+            coordinates.wgs_depth_to_nztm(
+                points[["lat", "lon", "dep"]].to_numpy(dtype=np.float64)
+                * np.array([1, 1, 1000])
+            )
+        )
+
+    @classmethod
+    def from_srf(cls, srf_data: "srf.SrfFile") -> Self:
+        """Build the index of the subfaults of an SRF.
+
+        Parameters
+        ----------
+        srf_data : srf.SrfFile
+            The SRF, which must include the lat, lon and dep point columns.
+
+        Returns
+        -------
+        SubfaultIndex
+            The index of the SRF subfaults.
+        """
+        return cls(srf_data.points)
+
+    def __len__(self) -> int:
+        """Find the number of subfaults in the index.
+
+        Returns
+        -------
+        int
+            The number of subfaults.
+        """
+        return self._tree.n
+
+    def nearest(
+        self, wgs_depth_coordinates: npt.ArrayLike
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the subfaults nearest to a set of points.
+
+        Parameters
+        ----------
+        wgs_depth_coordinates : npt.ArrayLike
+            The (lat, lon, depth) coordinates of the query points, with
+            shape (3,) or (n, 3).
+
+        Returns
+        -------
+        distances : np.ndarray
+            The distance (in metres) from each query point to its
+            nearest subfault.
+        indices : np.ndarray
+            The index (in the SRF points) of the nearest subfault to
+            each query point.
+        """
+        return self._tree.query(
+            coordinates.wgs_depth_to_nztm(
+                np.asarray(wgs_depth_coordinates, dtype=np.float64)
+            )
+        )
+
+    def within(
+        self, wgs_depth_coordinates: npt.ArrayLike, radius: float
+    ) -> list[np.ndarray]:
+        """Find the subfaults within a radius of a set of points.
+
+        Parameters
+        ----------
+        wgs_depth_coordinates : npt.ArrayLike
+            The (lat, lon, depth) coordinates of the query points, with
+            shape (n, 3).
+        radius : float
+            The search radius (in metres).
+
+        Returns
+        -------
+        list[np.ndarray]
+            The sorted indices (in the SRF points) of the subfaults
+            within `radius` of each query point.
+        """
+        return [
+            np.sort(np.asarray(indices, dtype=np.int64))
+            for indices in self._tree.query_ball_point(
+                coordinates.wgs_depth_to_nztm(
+                    np.atleast_2d(np.asarray(wgs_depth_coordinates, dtype=np.float64))
+                ),
+                radius,
+            )
+        ]
@@ -0,0 +1,424 @@
+"""Binary sidecar cache for parsed SRF files.
+
+Parsing an ASCII SRF is the dominant fixed cost of every plotting
+script. When the ``VISUALISATION_SRF_CACHE`` environment variable is
+set, `read_srf` stores the parsed header, points table and sparse slip
+matrix as a directory of ``.npy`` files that are memory-mapped on
+subsequent reads. The variable may be set to ``sidecar`` (or ``1``) to
+store the cache next to the SRF, or to a directory in which cache
+entries for every SRF are collected.
+
+Cache entries are keyed on the SRF path, size, modification time and
+content hash. A file whose size and modification time are unchanged is
+trusted, otherwise the content hash is recomputed and the entry is
+rebuilt if it differs.
+
+The arrays of each build of an entry are written to their own
+generation directory inside the entry, and the entry metadata names the
+current generation. A rebuild writes a new generation and then
+atomically replaces the metadata, so readers see either the old or the
+new arrays, never a partially written or partially deleted entry.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Collection
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+import scipy as sp
+
+from source_modelling import srf
+from visualisation import profiling, srf_stream
+
+CACHE_ENV_VAR = "VISUALISATION_SRF_CACHE"
+CACHE_FORMAT_VERSION = 2
+METADATA_FILENAME = "metadata.json"
+SLIP_ARRAYS = ("data", "indices", "indptr")
+GENERATION_PREFIX = "generation-"
+
+_HASH_CHUNK_SIZE = 8 * 1024 * 1024
+_SIDECAR_SETTINGS = {"1", "true", "on", "sidecar"}
+_DISABLED_SETTINGS = {"", "0", "false", "off"}
+
+
+def cache_directory(srf_ffp: Path) -> Optional[Path]:
+    """Find the cache directory for an SRF file.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+
+    Returns
+    -------
+    Optional[Path]
+        The directory holding the cache entry for this SRF, or None if
+        caching is disabled.
+    """
+    setting = os.environ.get(CACHE_ENV_VAR, "").strip()
+    if setting.lower() in _DISABLED_SETTINGS:
+        return None
+
+    srf_ffp = Path(srf_ffp).resolve()
+    if setting.lower() in _SIDECAR_SETTINGS:
+        return srf_ffp.with_name(f"{srf_ffp.name}.cache")
+
+    path_digest = hashlib.sha256(str(srf_ffp).encode()).hexdigest()[:16]
+    return Path(setting) / f"{srf_ffp.stem}-{path_digest}"
+
+
+def content_hash(srf_ffp: Path) -> str:
+    """Compute the content hash of an SRF file.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+
+    Returns
+    -------
+    str
+        The hex digest of the file contents.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    with open(srf_ffp, "rb") as srf_file_handle:
+        while chunk := srf_file_handle.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return f"blake2b:{digest.hexdigest()}"
+
+
+def _file_key(srf_ffp: Path) -> dict[str, Any]:
+    """Compute the stat-based part of the cache key for an SRF file.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+
+    Returns
+    -------
+    dict[str, Any]
+        The resolved path, size and modification time of the file.
+    """
+    stat = srf_ffp.stat()
+    return {
+        "path": str(srf_ffp.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _read_metadata(cache_dir: Path) -> Optional[dict[str, Any]]:
+    """Read the metadata of a cache entry.
+
+    Parameters
+    ----------
+    cache_dir : Path
+        The cache entry directory.
+
+    Returns
+    -------
+    Optional[dict[str, Any]]
+        The cache metadata, or None if there is no usable cache entry.
+    """
+    try:
+        metadata = json.loads((cache_dir / METADATA_FILENAME).read_text())
+    except (OSError, ValueError):
+        return None
+    if metadata.get("format") != CACHE_FORMAT_VERSION:
+        return None
+    return metadata
+
+
+def _write_metadata(cache_dir: Path, metadata: dict[str, Any]) -> None:
+    """Atomically (re)write the metadata of a cache entry.
+
+    Parameters
+    ----------
+    cache_dir : Path
+        The cache entry directory.
+    metadata : dict[str, Any]
+        The metadata to write.
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", dir=cache_dir, suffix=".json", delete=False
+    ) as metadata_file:
+        json.dump(metadata, metadata_file)
+    os.replace(metadata_file.name, cache_dir / METADATA_FILENAME)
+
+
+def _is_valid(metadata: dict[str, Any], srf_ffp: Path, cache_dir: Path) -> bool:
+    """Check a cache entry against the current state of its SRF file.
+
+    If the SRF size and modification time are unchanged the entry is
+    trusted. If the size is unchanged but the path or modification time
+    differs (e.g. the file was touched or copied) the content hash
+    decides, and the metadata is refreshed when the contents match.
+
+    Parameters
+    ----------
+    metadata : dict[str, Any]
+        The cache entry metadata.
+    srf_ffp : Path
+        Path to the SRF file.
+    cache_dir : Path
+        The cache entry directory.
+
+    Returns
+    -------
+    bool
+        True if the cache entry describes the current SRF contents.
+    """
+    file_key = _file_key(srf_ffp)
+    if all(metadata.get(key) == value for key, value in file_key.items()):
+        return True
+    if metadata.get("size") != file_key["size"]:
+        return False
+    if metadata.get("hash") != content_hash(srf_ffp):
+        return False
+    try:
+        _write_metadata(cache_dir, metadata | file_key)
+    except OSError:
+        # A read-only cache is still valid, we just pay for the hash next time.
+        pass
+    return True
+
+
+def write_cache(srf_data: srf.SrfFile, srf_ffp: Path, cache_dir: Path) -> None:
+    """Write a cache entry for a parsed SRF file.
+
+    The arrays are written to a new generation directory of the entry,
+    which becomes current when the entry metadata is atomically replaced
+    to name it. Concurrent readers therefore never observe a partial
+    entry. Superseded generations are then removed; a reader that has
+    already mapped their arrays keeps them until it unmaps them.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The parsed SRF file.
+    srf_ffp : Path
+        Path to the SRF file that was parsed.
+    cache_dir : Path
+        The cache entry directory to write.
+    """
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        generation_dir = Path(tempfile.mkdtemp(prefix=GENERATION_PREFIX, dir=cache_dir))
+    except OSError:
+        return
+
+    try:
+        for column in srf_data.points.columns:
+            np.save(
+                generation_dir / f"points_{column}.npy",
+                srf_data.points[column].to_numpy(),
+            )
+        for name in SLIP_ARRAYS:
+            np.save(generation_dir / f"slip_{name}.npy", getattr(srf_data.slip, name))
+
+        metadata = _file_key(srf_ffp) | {
+            "format": CACHE_FORMAT_VERSION,
+            "hash": content_hash(srf_ffp),
+            "version": srf_data.version,
+            "header": srf_data.header.to_dict(orient="list"),
+            "point_columns": list(srf_data.points.columns),
+            "slip_shape": list(srf_data.slip.shape),
+            "generation": generation_dir.name,
+        }
+        _write_metadata(cache_dir, metadata)
+    except OSError:
+        # The cache location is unwritable (or full), which leaves the
+        # SRF readable, so the cache is simply skipped.
+        shutil.rmtree(generation_dir, ignore_errors=True)
+        return
+
+    # Another process may be writing a generation of its own at the same
+    # time, so only generations older than this one are removed, and
+    # never the generation the metadata currently names.
+    current_metadata = _read_metadata(cache_dir) or {}
+    generation_mtime = generation_dir.stat().st_mtime_ns
+    for old_generation_dir in cache_dir.glob(f"{GENERATION_PREFIX}*"):
+        try:
+            if (
+                old_generation_dir.name
+                not in {generation_dir.name, current_metadata.get("generation")}
+                and old_generation_dir.stat().st_mtime_ns < generation_mtime
+            ):
+                shutil.rmtree(old_generation_dir, ignore_errors=True)
+        except OSError:
+            continue
+
+
+def _select_columns(
+    available: Collection[str], columns: Optional[Collection[str]]
+) -> list[str]:
+    """Select the point columns to load, preserving the SRF column order.
+
+    Parameters
+    ----------
+    available : Collection[str]
+        The point columns present in the SRF.
+    columns : Optional[Collection[str]]
+        The point columns requested, or None for every column.
+
+    Returns
+    -------
+    list[str]
+        The point columns to load.
+
+    Raises
+    ------
+    KeyError
+        If a requested column is not present in the SRF.
+    """
+    if columns is None:
+        return list(available)
+    missing = set(columns) - set(available)
+    if missing:
+        raise KeyError(f"SRF has no point columns {sorted(missing)}")
+    return [column for column in available if column in columns]
+
+
+def read_cache(
+    cache_dir: Path,
+    metadata: dict[str, Any],
+    columns: Optional[Collection[str]] = None,
+    slip: bool = True,
+) -> srf.SrfFile:
+    """Read a cache entry, memory-mapping the requested arrays.
+
+    Parameters
+    ----------
+    cache_dir : Path
+        The cache entry directory.
+    metadata : dict[str, Any]
+        The cache entry metadata.
+    columns : Optional[Collection[str]]
+        The point columns to load, by default every column.
+    slip : bool
+        If False, the slip time function arrays are not loaded and the
+        `slipt1_array` of the returned SRF is None.
+
+    Returns
+    -------
+    srf.SrfFile
+        The SRF file backed by the cached arrays.
+    """
+    header = pd.DataFrame(metadata["header"])
+    header[["nstk", "ndip"]] = header[["nstk", "ndip"]].astype(int)
+
+    generation_dir = cache_dir / metadata["generation"]
+    points = pd.DataFrame(
+        {
+            column: np.load(generation_dir / f"points_{column}.npy", mmap_mode="r")
+            for column in _select_columns(metadata["point_columns"], columns)
+        },
+        copy=False,
+    )
+    slipt1_array = None
+    if slip:
+        data, indices, indptr = (
+            np.load(generation_dir / f"slip_{name}.npy", mmap_mode="r")
+            for name in SLIP_ARRAYS
+        )
+        slipt1_array = sp.sparse.csr_array(
+            (data, indices, indptr), shape=tuple(metadata["slip_shape"]), copy=False
+        )
+    return srf.SrfFile(
+        version=metadata["version"],
+        header=header,
+        points=points,
+        slipt1_array=slipt1_array,
+    )
+
+
+def project(
+    srf_data: srf.SrfFile,
+    columns: Optional[Collection[str]] = None,
+    slip: bool = True,
+) -> srf.SrfFile:
+    """Restrict a parsed SRF file to the fields a plot requires.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The parsed SRF file.
+    columns : Optional[Collection[str]]
+        The point columns to keep, by default every column.
+    slip : bool
+        If False, the slip time function is dropped and the
+        `slipt1_array` of the returned SRF is None.
+
+    Returns
+    -------
+    srf.SrfFile
+        The SRF file restricted to the requested fields.
+    """
+    return srf.SrfFile(
+        version=srf_data.version,
+        header=srf_data.header,
+        points=srf_data.points[_select_columns(srf_data.points.columns, columns)],
+        slipt1_array=srf_data.slipt1_array if slip else None,
+    )
+
+
+@profiling.span("load:srf")
+def read_srf(
+    srf_ffp: Path, columns: Optional[Collection[str]] = None, slip: bool = True
+) -> srf.SrfFile:
+    """Read an SRF file, using the binary sidecar cache when enabled.
+
+    Only the requested point columns are loaded from the cache, and the
+    slip time function is not loaded at all unless `slip` is True. When
+    the cache is disabled and `slip` is False, only the requested point
+    columns are parsed and the slip time functions are skipped (see
+    `srf_stream.read_points`). Otherwise the unused fields are dropped
+    immediately after parsing.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+    columns : Optional[Collection[str]]
+        The point columns to load, by default every column.
+    slip : bool
+        If False, the slip time function is not loaded and the
+        `slipt1_array` of the returned SRF is None. Properties derived
+        from it, such as `nt`, are then unavailable.
+
+    Returns
+    -------
+    srf.SrfFile
+        The parsed SRF file.
+    """
+    srf_ffp = Path(srf_ffp)
+    cache_dir = cache_directory(srf_ffp)
+    if cache_dir is None:
+        if not slip:
+            try:
+                return srf_stream.read_points(srf_ffp, columns)
+            except ValueError:
+                # Points laid out other than as the SRF format specifies
+                # are left to the full parser.
+                pass
+        return project(srf.read_srf(srf_ffp), columns, slip)
+
+    metadata = _read_metadata(cache_dir)
+    if metadata is not None and _is_valid(metadata, srf_ffp, cache_dir):
+        try:
+            return read_cache(cache_dir, metadata, columns, slip)
+        except FileNotFoundError:
+            # The generation was superseded and removed by a concurrent
+            # rebuild after the metadata was read.
+            pass
+
+    srf_data = srf.read_srf(srf_ffp)
+    write_cache(srf_data, srf_ffp, cache_dir)
+    return project(srf_data, columns, slip)
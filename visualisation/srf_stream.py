@@ -0,0 +1,578 @@
+"""Streaming summaries of SRF files too large to load into memory.
+
+`srf.read_srf` materialises the full points table and slip time
+function matrix of an SRF. For the moment rate and summary statistic
+plots only aggregates of these are required, so `summarise_srf` walks
+the points section in fixed-size blocks of text and accumulates
+
+- the moment rate time series of each plane,
+- the total moment released, and
+- running statistics of each point column,
+
+using memory proportional to the block size and the number of planes
+rather than the size of the SRF. Plots that need the points table but
+not the slip time functions use `read_points`, which parses only the
+requested point columns and skips the slip time functions entirely.
+"""
+
+import re
+from collections.abc import Collection, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+import numpy as np
+import pandas as pd
+
+from source_modelling import moment, srf
+from visualisation import profiling
+from visualisation.fault_index import FaultPointIndex
+from visualisation.moment_rate import MomentRates
+from visualisation.utils import RunningStatistics
+
+DEFAULT_BLOCK_SIZE = 16 * 1024 * 1024
+"""The default number of bytes of the points section to parse at a time."""
+POINTS_BLOCK_SIZE = 1024 * 1024
+"""The default number of bytes of the points section to read at a time
+when only the point headers are parsed."""
+MAX_TOKEN_WIDTH = 32
+"""The most characters of a value of a point header."""
+
+HEADER_COLUMNS = [
+    "elon",
+    "elat",
+    "nstk",
+    "ndip",
+    "len",
+    "wid",
+    "stk",
+    "dip",
+    "dtop",
+    "shyp",
+    "dhyp",
+]
+POINT_COLUMNS = {
+    "1.0": ["lon", "lat", "dep", "stk", "dip", "area", "tinit", "dt"],
+    "2.0": ["lon", "lat", "dep", "stk", "dip", "area", "tinit", "dt", "vs", "den"],
+}
+SLIP_COLUMNS = ["rake", "slip1", "nt1", "slip2", "nt2", "slip3", "nt3"]
+DERIVED_COLUMNS = ["rake", "slip", "rise"]
+"""The columns following `POINT_COLUMNS` in `srf.SrfFile.points`."""
+
+_PLANE_COUNT_RE = re.compile(rb"PLANE\s+(\d+)")
+_POINT_COUNT_RE = re.compile(rb"POINTS\s+(\d+)")
+
+
+@dataclass
+class SrfSummary:
+    """Aggregate quantities of an SRF, accumulated by `summarise_srf`."""
+
+    version: str
+    """The SRF version."""
+    header: pd.DataFrame
+    """The plane headers, as in `srf.SrfFile.header`."""
+    dt: float
+    """The time step of the slip time functions (s)."""
+    plane_moment_rate: np.ndarray
+    """The moment rate (Nm/s) of each plane, with shape (planes, nt)."""
+    total_moment: float
+    """The total moment released (Nm)."""
+    statistics: dict[str, RunningStatistics]
+    """Running statistics of each summarised point column."""
+
+    @property
+    def nt(self) -> int:  # numpydoc ignore=RT01
+        """int: The number of time windows."""
+        return self.plane_moment_rate.shape[1]
+
+    @property
+    def magnitude(self) -> float:  # numpydoc ignore=RT01
+        """float: The moment magnitude of the rupture."""
+        return moment.moment_to_magnitude(self.total_moment)
+
+    def moment_rates(
+        self, fault_index: Optional[FaultPointIndex] = None
+    ) -> MomentRates:
+        """Compute the overall and per-fault moment rates of the SRF.
+
+        Parameters
+        ----------
+        fault_index : Optional[FaultPointIndex]
+            The index of the faults in the SRF. If None, no per-fault
+            moment rates are computed.
+
+        Returns
+        -------
+        MomentRates
+            The overall and per-fault moment rates.
+        """
+        if fault_index is not None:
+            fault_moment_rate = np.add.reduceat(
+                self.plane_moment_rate, fault_index.plane_offsets[:-1], axis=0
+            )
+            fault_names = fault_index.fault_names
+        else:
+            fault_moment_rate = np.empty((0, self.nt))
+            fault_names = []
+        return MomentRates.from_fault_moment_rate(
+            self.plane_moment_rate.sum(axis=0), fault_moment_rate, fault_names, self.dt
+        )
+
+
+def _read_header(
+    srf_file_handle: BinaryIO,
+) -> tuple[str, pd.DataFrame, int]:
+    """Read the version, plane headers and point count of an SRF.
+
+    Parameters
+    ----------
+    srf_file_handle : BinaryIO
+        The SRF file, positioned at the start of the file. On return it
+        is positioned at the start of the first point.
+
+    Returns
+    -------
+    tuple[str, pd.DataFrame, int]
+        The SRF version, plane headers and number of points.
+
+    Raises
+    ------
+    ValueError
+        If the SRF version is unsupported or the header is malformed.
+    """
+    version = srf_file_handle.readline().strip().decode()
+    if version not in POINT_COLUMNS:
+        raise ValueError(f"Unsupported SRF version: {version}")
+
+    plane_count_line = srf_file_handle.readline().strip()
+    while plane_count_line.startswith(b"#"):
+        plane_count_line = srf_file_handle.readline().strip()
+    plane_count_match = _PLANE_COUNT_RE.match(plane_count_line)
+    if not plane_count_match:
+        raise ValueError(f'Expecting PLANE header line, got: "{plane_count_line}"')
+    plane_count = int(plane_count_match.group(1))
+
+    # Each plane header is spread over two lines.
+    header_values = b" ".join(
+        srf_file_handle.readline() for _ in range(2 * plane_count)
+    ).split()
+    header = pd.DataFrame(
+        np.array(header_values, dtype=np.float64).reshape(plane_count, -1),
+        columns=HEADER_COLUMNS,
+    )
+    header[["nstk", "ndip"]] = header[["nstk", "ndip"]].astype(int)
+
+    point_count_line = srf_file_handle.readline().strip()
+    point_count_match = _POINT_COUNT_RE.match(point_count_line)
+    if not point_count_match:
+        raise ValueError(f'Expecting POINTS header line, got: "{point_count_line}"')
+    return version, header, int(point_count_match.group(1))
+
+
+def _point_blocks(
+    srf_file_handle: BinaryIO, point_width: int, block_size: int
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Iterate over the points of an SRF in blocks of complete points.
+
+    Parameters
+    ----------
+    srf_file_handle : BinaryIO
+        The SRF file, positioned at the start of the first point.
+    point_width : int
+        The number of values preceding the slip time functions of each
+        point.
+    block_size : int
+        The number of bytes to read at a time.
+
+    Yields
+    ------
+    values : np.ndarray
+        The values of a block of text.
+    starts : np.ndarray
+        The offsets into `values` of each point that lies entirely
+        within the block.
+
+    Raises
+    ------
+    ValueError
+        If the file ends part way through a point.
+    """
+    leftover = np.empty(0)
+    partial_token = b""
+    while True:
+        text = srf_file_handle.read(block_size)
+        at_end = not text
+        # A token may be split across two reads, so the trailing
+        # characters of each block are deferred to the next one.
+        text = partial_token + text
+        tokens = text.split()
+        if at_end or text[-1:].isspace():
+            partial_token = b""
+        else:
+            partial_token = tokens.pop()
+        values = np.concatenate([leftover, np.array(tokens, dtype=np.float64)])
+
+        starts = []
+        start = 0
+        while start + point_width <= len(values):
+            end = (
+                start
+                + point_width
+                + int(values[start + point_width - 5])
+                + int(values[start + point_width - 3])
+                + int(values[start + point_width - 1])
+            )
+            if end > len(values):
+                break
+            starts.append(start)
+            start = end
+
+        if starts:
+            yield values, np.array(starts)
+        leftover = values[start:]
+        if at_end:
+            break
+
+    if leftover.size:
+        raise ValueError("SRF ended part way through a point.")
+
+
+def _parse_tokens(
+    characters: np.ndarray, token_starts: np.ndarray, tokens: np.ndarray
+) -> np.ndarray:
+    """Parse selected whitespace separated tokens of a block of text.
+
+    Parameters
+    ----------
+    characters : np.ndarray
+        The bytes of the text.
+    token_starts : np.ndarray
+        The offset into `characters` of the start of each token, followed
+        by the length of the text.
+    tokens : np.ndarray
+        The indices of the tokens to parse, of any shape.
+
+    Returns
+    -------
+    np.ndarray
+        The value of each selected token, with the shape of `tokens`.
+    """
+    starts = token_starts[tokens]
+    # Each token runs to the whitespace before the next token.
+    gaps = token_starts[tokens + 1] - starts
+    width = int(min(gaps.max(initial=1), MAX_TOKEN_WIDTH))
+    offsets = np.arange(width)
+    token_bytes = characters[
+        np.minimum(starts[..., None] + offsets, len(characters) - 1)
+    ]
+    # Whitespace and the following tokens become trailing NUL padding,
+    # which byte strings ignore.
+    token_bytes[(token_bytes <= ord(" ")) | (offsets >= gaps[..., None])] = 0
+    return token_bytes.view(f"S{width}")[..., 0].astype(np.float64)
+
+
+def _point_values(
+    srf_file_handle: BinaryIO,
+    point_width: int,
+    offsets: Sequence[int],
+    block_size: int,
+) -> Iterator[np.ndarray]:
+    """Iterate over selected values of the points of an SRF in blocks.
+
+    Unlike `_point_blocks`, the slip time functions are skipped rather
+    than parsed. Each point begins with two header lines, of
+    ``point_width - 7`` and 7 values, so the lines that could begin a
+    point are found from the number of values on each line, and the
+    points are then found by following the time window counts of each
+    point from the first.
+
+    Parameters
+    ----------
+    srf_file_handle : BinaryIO
+        The SRF file, positioned at the start of the first point.
+    point_width : int
+        The number of values preceding the slip time functions of each
+        point.
+    offsets : Sequence[int]
+        The offsets of the values to parse within each point.
+    block_size : int
+        The number of bytes to read at a time.
+
+    Yields
+    ------
+    np.ndarray
+        The selected values of each point of a block of text (shape
+        (points, len(offsets))).
+
+    Raises
+    ------
+    ValueError
+        If a point header is malformed, or the file ends part way
+        through a point.
+    """
+    count_offsets = np.array([point_width - 5, point_width - 3, point_width - 1])
+    leftover = b""
+    while True:
+        text = srf_file_handle.read(block_size)
+        at_end = not text
+        text = leftover + text
+        characters = np.frombuffer(text, dtype=np.uint8)
+        in_token = characters > ord(" ")
+        in_token[1:] &= ~in_token[:-1]
+        token_starts = np.append(np.flatnonzero(in_token), len(text))
+        token_count = len(token_starts) - 1
+
+        line_starts = np.flatnonzero(characters == ord("\n")) + 1
+        line_tokens = np.searchsorted(token_starts, np.concatenate([[0], line_starts]))
+        line_lengths = np.diff(line_tokens, append=token_count)
+        line_tokens = line_tokens[line_lengths > 0]
+        line_lengths = line_lengths[line_lengths > 0]
+        candidates = line_tokens[:-1][
+            (line_lengths[:-1] == point_width - 7) & (line_lengths[1:] == 7)
+        ]
+        # The last line of a block may be cut off, so the points of the
+        # last two lines are deferred to the next block.
+        if at_end:
+            limit = token_count
+        else:
+            limit = line_tokens[-2] if len(line_tokens) > 1 else 0
+
+        next_starts = (
+            candidates
+            + point_width
+            + _parse_tokens(
+                characters, token_starts, candidates[:, None] + count_offsets
+            )
+            .sum(axis=1)
+            .astype(np.int64)
+        )
+        # Usually every candidate is a point, and each is followed by the
+        # next, so only the points after the first gap are followed one
+        # by one.
+        if len(candidates) and candidates[0] == 0:
+            chained = np.flatnonzero(
+                (next_starts[:-1] != candidates[1:]) | (next_starts[:-1] > limit)
+            )
+            point_count = chained[0] if len(chained) else len(candidates) - 1
+        else:
+            point_count = 0
+        points = list(range(point_count))
+        start = candidates[point_count] if point_count else 0
+
+        successors = np.searchsorted(candidates, next_starts).tolist()
+        candidate_list = candidates.tolist()
+        next_start_list = next_starts.tolist()
+        candidate = point_count
+        while start < limit:
+            if candidate == len(candidate_list) or candidate_list[candidate] != start:
+                raise ValueError("Malformed SRF point header.")
+            if next_start_list[candidate] > limit:
+                break
+            points.append(candidate)
+            start = next_start_list[candidate]
+            candidate = successors[candidate]
+
+        if points:
+            yield _parse_tokens(
+                characters, token_starts, candidates[points, None] + np.asarray(offsets)
+            )
+        leftover = text[token_starts[start] :]
+        if at_end:
+            break
+
+    if leftover.strip():
+        raise ValueError("SRF ended part way through a point.")
+
+
+@profiling.span("load:stream")
+def summarise_srf(
+    srf_ffp: Path,
+    columns: Optional[Collection[str]] = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> SrfSummary:
+    """Summarise an SRF file without loading it into memory.
+
+    The moment rate of each plane is computed exactly as
+    `moment.moment_rate_over_time_from_slip` would from the slip time
+    functions parsed by `srf.read_srf`.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+    columns : Optional[Collection[str]]
+        The point columns (as named in `srf.SrfFile.points`) to compute
+        running statistics for, by default none.
+    block_size : int
+        The number of bytes of the SRF to parse at a time.
+
+    Returns
+    -------
+    SrfSummary
+        The accumulated summary of the SRF.
+
+    Raises
+    ------
+    ValueError
+        If the SRF is malformed.
+    """
+    with open(srf_ffp, "rb") as srf_file_handle:
+        version, header, point_count = _read_header(srf_file_handle)
+        point_columns = POINT_COLUMNS[version] + SLIP_COLUMNS
+        point_width = len(point_columns)
+        column_offsets = {column: i for i, column in enumerate(point_columns)}
+        # Points are written plane by plane, so the plane of a point
+        # can be found from its index.
+        plane_ends = np.cumsum(header["nstk"] * header["ndip"])
+        statistics = {column: RunningStatistics() for column in columns or []}
+
+        dt = None
+        plane_moment_rate = np.zeros((len(header), 0))
+        total_moment = 0.0
+        points_read = 0
+        for values, starts in _point_blocks(srf_file_handle, point_width, block_size):
+            fields = {
+                column: values[starts + offset]
+                for column, offset in column_offsets.items()
+            }
+            fields["slip"] = fields["slip1"]
+            fields["rise"] = fields["nt1"] * fields["dt"]
+            for column, column_statistics in statistics.items():
+                column_statistics.update(fields[column])
+            if dt is None:
+                dt = fields["dt"][0]
+
+            planes = np.searchsorted(
+                plane_ends, points_read + np.arange(len(starts)), side="right"
+            )
+            points_read += len(starts)
+            total_moment += moment.MU * np.sum(fields["area"] * fields["slip"]) / 1e6
+
+            # Gather the slip rate of every time window in the block,
+            # following the windowing of the SRF parser (which computes
+            # the first window in single precision).
+            nt1 = fields["nt1"].astype(np.int64)
+            window_counts = np.repeat(np.cumsum(nt1) - nt1, nt1)
+            window_offsets = np.arange(nt1.sum()) - window_counts
+            slip_rate = values[np.repeat(starts + point_width, nt1) + window_offsets]
+            first_window = np.floor(
+                fields["tinit"].astype(np.float32) / fields["dt"].astype(np.float32)
+            ).astype(np.int64)
+            windows = np.repeat(first_window, nt1) + window_offsets
+            if windows.size == 0:
+                continue
+
+            nt = max(plane_moment_rate.shape[1], windows.max() + 1)
+            if nt > plane_moment_rate.shape[1]:
+                plane_moment_rate = np.pad(
+                    plane_moment_rate, ((0, 0), (0, nt - plane_moment_rate.shape[1]))
+                )
+            plane_moment_rate += (
+                moment.MU
+                / 1e6
+                * np.bincount(
+                    np.repeat(planes, nt1) * nt + windows,
+                    weights=np.repeat(fields["area"], nt1) * slip_rate,
+                    minlength=plane_moment_rate.size,
+                ).reshape(plane_moment_rate.shape)
+            )
+
+    if points_read != point_count:
+        raise ValueError(
+            f"Expected {point_count} points in SRF, but found {points_read}."
+        )
+
+    return SrfSummary(
+        version=version,
+        header=header,
+        dt=float(dt) if dt is not None else 0.0,
+        plane_moment_rate=plane_moment_rate,
+        total_moment=float(total_moment),
+        statistics=statistics,
+    )
+
+
+def read_points(
+    srf_ffp: Path,
+    columns: Optional[Collection[str]] = None,
+    block_size: int = POINTS_BLOCK_SIZE,
+) -> srf.SrfFile:
+    """Read the points of an SRF file, skipping the slip time functions.
+
+    The points table is the same as `srf.read_srf` would produce, but
+    only the requested columns are parsed, and the slip time functions
+    are never decoded, so the memory used is proportional to the block
+    size and the requested columns rather than the size of the SRF.
+
+    Parameters
+    ----------
+    srf_ffp : Path
+        Path to the SRF file.
+    columns : Optional[Collection[str]]
+        The point columns (as named in `srf.SrfFile.points`) to read, by
+        default every column.
+    block_size : int
+        The number of bytes of the SRF to parse at a time.
+
+    Returns
+    -------
+    srf.SrfFile
+        The SRF file, with a `slipt1_array` of None.
+
+    Raises
+    ------
+    KeyError
+        If a requested column is not present in the SRF.
+    ValueError
+        If the SRF is malformed.
+    """
+    with open(srf_ffp, "rb") as srf_file_handle:
+        version, header, point_count = _read_header(srf_file_handle)
+        point_columns = POINT_COLUMNS[version] + SLIP_COLUMNS
+        available = POINT_COLUMNS[version] + DERIVED_COLUMNS
+        if columns is None:
+            columns = available
+        missing = set(columns) - set(available)
+        if missing:
+            raise KeyError(f"SRF has no point columns {sorted(missing)}")
+        selected = [column for column in available if column in columns]
+
+        # The derived columns are computed from the columns of the SRF.
+        sources = {"slip": ["slip1"], "rise": ["nt1", "dt"]}
+        parsed = list(
+            dict.fromkeys(
+                source
+                for column in selected
+                for source in sources.get(column, [column])
+            )
+        )
+        blocks = list(
+            _point_values(
+                srf_file_handle,
+                len(point_columns),
+                [point_columns.index(column) for column in parsed],
+                block_size,
+            )
+        )
+
+    # The SRF parser reads every value in single precision.
+    values = (
+        np.concatenate(blocks).astype(np.float32)
+        if blocks
+        else np.empty((0, len(parsed)), dtype=np.float32)
+    )
+    if len(values) != point_count:
+        raise ValueError(
+            f"Expected {point_count} points in SRF, but found {len(values)}."
+        )
+    fields = dict(zip(parsed, values.T))
+    if "slip" in selected:
+        fields["slip"] = fields["slip1"]
+    if "rise" in selected:
+        fields["rise"] = fields["nt1"] * fields["dt"]
+    return srf.SrfFile(
+        version=version,
+        header=header,
+        points=pd.DataFrame({column: fields[column] for column in selected}),
+        slipt1_array=None,
+    )
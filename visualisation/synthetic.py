@@ -0,0 +1,330 @@
+"""Synthetic SRFs and realisations of any size, for benchmarks and tests.
+
+The ruptures are a chain of faults laid end to end along strike, each
+made of planes continuing along strike. Each plane is divided into
+roughly square subfaults so that the whole rupture has about the
+requested number of subfaults. Slip is a smooth tapered field with
+lognormal noise, rupture times follow a constant rupture velocity out
+from a hypocentre on the first fault, and each subfault has a
+triangular slip rate function of up to `nt` samples. The realisation
+describes the same geometry, so every plot (including those needing a
+realisation) can be made from a synthetic rupture.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from source_modelling import srf
+
+PLANE_LENGTH = 20.0
+"""The length of each plane (km)."""
+PLANE_WIDTH = 15.0
+"""The width of each plane (km)."""
+FAULT_GAP = 2.0
+"""The along strike gap between consecutive faults (km)."""
+STRIKE = 45.0
+DIP = 60.0
+RAKE = 90.0
+RUPTURE_VELOCITY = 2.8
+"""The rupture velocity (km/s)."""
+ORIGIN_NZTM = (5_180_000.0, 1_570_000.0)
+"""The (northing, easting) of the start of the first fault trace."""
+
+
+@dataclass(frozen=True)
+class SyntheticRupture:
+    """A synthetic SRF and the realisation it was generated from."""
+
+    srf_data: "srf.SrfFile"
+    """The SRF."""
+    realisation: dict[str, Any]
+    """The realisation, in the realisation JSON format."""
+
+    def write(self, output_dir: Path, name: str = "synthetic") -> tuple[Path, Path]:
+        """Write the SRF and realisation to a directory.
+
+        Parameters
+        ----------
+        output_dir : Path
+            The directory to write into.
+        name : str
+            The name of the SRF and realisation files.
+
+        Returns
+        -------
+        srf_ffp : Path
+            The path to the SRF.
+        realisation_ffp : Path
+            The path to the realisation.
+        """
+        from source_modelling import srf
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        srf_ffp = output_dir / f"{name}.srf"
+        realisation_ffp = output_dir / f"{name}.json"
+        srf.write_srf(srf_ffp, self.srf_data)
+        realisation_ffp.write_text(json.dumps(self.realisation, indent=2))
+        return srf_ffp, realisation_ffp
+
+
+def _plane_shape(subfaults_per_plane: float) -> tuple[int, int]:
+    """Divide a plane into about the given number of square subfaults.
+
+    Parameters
+    ----------
+    subfaults_per_plane : float
+        The number of subfaults wanted on the plane.
+
+    Returns
+    -------
+    tuple[int, int]
+        The number of subfaults along strike and dip.
+    """
+    spacing = np.sqrt(PLANE_LENGTH * PLANE_WIDTH / max(subfaults_per_plane, 1))
+    return (
+        max(round(PLANE_LENGTH / spacing), 1),
+        max(round(PLANE_WIDTH / spacing), 1),
+    )
+
+
+def synthetic_rupture(
+    fault_count: int = 1,
+    plane_count: int = 1,
+    subfault_count: int = 10_000,
+    nt: int = 50,
+    dt: float = 0.05,
+    seed: int = 0,
+    version: str = "2.0",
+) -> SyntheticRupture:
+    """Generate a synthetic SRF and realisation.
+
+    Parameters
+    ----------
+    fault_count : int
+        The number of faults.
+    plane_count : int
+        The total number of planes, shared as evenly as possible
+        between the faults. Must be at least `fault_count`.
+    subfault_count : int
+        The approximate total number of subfaults.
+    nt : int
+        The maximum number of slip rate samples of a subfault.
+    dt : float
+        The slip rate sample length (s).
+    seed : int
+        The seed of the random slip, rake and slip rate durations.
+    version : str
+        The SRF version, "1.0" or "2.0".
+
+    Returns
+    -------
+    SyntheticRupture
+        The SRF and realisation.
+
+    Raises
+    ------
+    ValueError
+        If there are fewer planes than faults.
+    """
+    import pandas as pd
+    import scipy as sp
+
+    from qcore import coordinates
+    from source_modelling import moment, srf
+
+    if plane_count < fault_count:
+        raise ValueError(
+            f"Cannot split {plane_count} planes between {fault_count} faults."
+        )
+    rng = np.random.default_rng(seed)
+    nstk, ndip = _plane_shape(subfault_count / plane_count)
+    strike = np.radians(STRIKE)
+    dip = np.radians(DIP)
+    strike_direction = np.array([np.cos(strike), np.sin(strike)])
+    dip_direction = np.array([-np.sin(strike), np.cos(strike)]) * np.cos(dip)
+
+    fault_names = [f"Fault {fault + 1}" for fault in range(fault_count)]
+    plane_faults = np.repeat(
+        np.arange(fault_count),
+        np.diff(np.linspace(0, plane_count, fault_count + 1).round().astype(int)),
+    )
+    # The along strike distance of the start of each plane.
+    plane_starts = (
+        np.arange(plane_count) * PLANE_LENGTH + plane_faults * FAULT_GAP
+    ).astype(float)
+
+    # Subfault centres in plane coordinates (km), strike varying fastest.
+    strike_offsets, dip_offsets = np.meshgrid(
+        (np.arange(nstk) + 0.5) * PLANE_LENGTH / nstk,
+        (np.arange(ndip) + 0.5) * PLANE_WIDTH / ndip,
+    )
+    along_strike = (plane_starts[:, np.newaxis] + strike_offsets.ravel()).ravel()
+    down_dip = np.tile(dip_offsets.ravel(), plane_count)
+
+    def to_wgs_depth(along_strike: np.ndarray, down_dip: np.ndarray) -> np.ndarray:
+        """Convert plane coordinates to (lat, lon, depth) coordinates.
+
+        Parameters
+        ----------
+        along_strike : np.ndarray
+            The distance along strike from the start of the rupture (km).
+        down_dip : np.ndarray
+            The distance down dip from the top of the plane (km).
+
+        Returns
+        -------
+        np.ndarray
+            The (lat, lon, depth) coordinates, with depth in metres.
+        """
+        nztm = (
+            np.array(ORIGIN_NZTM)
+            + 1000 * along_strike[:, np.newaxis] * strike_direction
+            + 1000 * down_dip[:, np.newaxis] * dip_direction
+        )
+        return coordinates.nztm_to_wgs_depth(
+            np.column_stack([nztm, 1000 * down_dip * np.sin(dip)])
+        )
+
+    point_coordinates = to_wgs_depth(along_strike, down_dip)
+
+    # Slip tapers to the edges of each fault.
+    fault_lengths = np.bincount(plane_faults) * PLANE_LENGTH
+    fault_starts = plane_starts[np.searchsorted(plane_faults, np.arange(fault_count))]
+    point_faults = np.repeat(plane_faults, nstk * ndip)
+    strike_fraction = (along_strike - fault_starts[point_faults]) / fault_lengths[
+        point_faults
+    ]
+    taper = np.sin(np.pi * strike_fraction) * np.sqrt(
+        np.sin(np.pi * down_dip / PLANE_WIDTH)
+    )
+    slip = 200 * (0.1 + taper) * rng.lognormal(0, 0.3, size=len(along_strike))
+    rake = RAKE + rng.normal(0, 10, size=len(along_strike))
+
+    hypocentre = (fault_lengths[0] / 2, PLANE_WIDTH / 2)
+    tinit = (
+        np.hypot(along_strike - hypocentre[0], down_dip - hypocentre[1])
+        / RUPTURE_VELOCITY
+    )
+
+    # Each subfault slips for a random number of samples, starting in
+    # the sample containing its rupture time.
+    durations = rng.integers(max(nt // 2, 1), nt + 1, size=len(slip))
+    start_columns = np.floor(tinit.astype(np.float32) / np.float32(dt)).astype(int)
+    indptr = np.concatenate([[0], np.cumsum(durations)])
+    sample = np.arange(indptr[-1]) - np.repeat(indptr[:-1], durations)
+    indices = np.repeat(start_columns, durations) + sample
+    # A triangle of n samples has weights min(k + 1, n - k), which sum
+    # to floor((n + 1) / 2) * ceil((n + 1) / 2).
+    triangle_area = ((durations + 1) // 2) * ((durations + 2) // 2)
+    data = np.repeat(slip / (triangle_area * dt), durations) * np.minimum(
+        sample + 1, np.repeat(durations, durations) - sample
+    )
+    slipt1_array = sp.sparse.csr_array(
+        (data.astype(np.float32), indices, indptr),
+        shape=(len(slip), int((start_columns + durations).max())),
+    )
+
+    area = PLANE_LENGTH / nstk * PLANE_WIDTH / ndip * 1e10
+    points = {
+        "lon": point_coordinates[:, 1],
+        "lat": point_coordinates[:, 0],
+        "dep": point_coordinates[:, 2] / 1000,
+        "stk": np.full(len(slip), STRIKE),
+        "dip": np.full(len(slip), DIP),
+        "area": np.full(len(slip), area),
+        "tinit": tinit,
+        "dt": np.full(len(slip), dt),
+    }
+    if version == "2.0":
+        points["vs"] = np.full(len(slip), 3.5e5)
+        points["den"] = np.full(len(slip), 2.7)
+    points["rake"] = rake
+    points["slip"] = slip
+    # The SRF writer expects the columns of a parsed SRF, which include
+    # the (unwritten) rise time.
+    points["rise"] = durations * dt
+
+    plane_centres = to_wgs_depth(
+        plane_starts + PLANE_LENGTH / 2, np.full(plane_count, PLANE_WIDTH / 2)
+    )
+    header = pd.DataFrame(
+        {
+            "elon": plane_centres[:, 1],
+            "elat": plane_centres[:, 0],
+            "nstk": nstk,
+            "ndip": ndip,
+            "len": PLANE_LENGTH,
+            "wid": PLANE_WIDTH,
+            "stk": STRIKE,
+            "dip": DIP,
+            "dtop": 0.0,
+            "shyp": hypocentre[0] - (plane_starts + PLANE_LENGTH / 2),
+            "dhyp": hypocentre[1],
+        }
+    )
+    srf_data = srf.SrfFile(
+        version=version,
+        header=header,
+        points=pd.DataFrame(points).astype(np.float32),
+        slipt1_array=slipt1_array,
+    )
+
+    source_geometries = {}
+    for fault, fault_name in enumerate(fault_names):
+        starts = plane_starts[plane_faults == fault]
+        corners = to_wgs_depth(
+            np.column_stack(
+                [starts, starts + PLANE_LENGTH, starts + PLANE_LENGTH, starts]
+            ).ravel(),
+            np.tile([0, 0, PLANE_WIDTH, PLANE_WIDTH], len(starts)).astype(float),
+        )
+        source_geometries[fault_name] = {
+            "type": "fault",
+            "corners": [
+                {"latitude": lat, "longitude": lon, "depth": depth}
+                for lat, lon, depth in corners.tolist()
+            ],
+        }
+
+    fault_moments = np.bincount(
+        point_faults, weights=moment.MU * area * slip / 1e6, minlength=fault_count
+    )
+    realisation = {
+        "metadata": {
+            "name": "Synthetic rupture",
+            "version": "1",
+            "defaults_version": "24.2.2.2",
+            "tag": "synthetic",
+        },
+        "sources": {"source_geometries": source_geometries},
+        "rupture_propagation": {
+            "rupture_causality_tree": {
+                fault_name: fault_names[fault - 1] if fault else None
+                for fault, fault_name in enumerate(fault_names)
+            },
+            "jump_points": {
+                fault_name: {
+                    "from_point": {"s": 1.0, "d": 0.5},
+                    "to_point": {"s": 0.0, "d": 0.5},
+                }
+                for fault_name in fault_names[1:]
+            },
+            "rakes": dict.fromkeys(fault_names, RAKE),
+            "magnitudes": {
+                fault_name: float(moment.moment_to_magnitude(fault_moment))
+                for fault_name, fault_moment in zip(fault_names, fault_moments)
+            },
+            "hypocentre": {"s": 0.5, "d": 0.5},
+        },
+        "srf": {
+            "genslip_dt": dt,
+            "genslip_version": "5.4.2",
+            "resolution": float(PLANE_LENGTH / nstk),
+        },
+    }
+    return SyntheticRupture(srf_data, realisation)
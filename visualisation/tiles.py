@@ -0,0 +1,584 @@
+"""XYZ tile pyramids of SRF slip and rise for web map viewers.
+
+A national-scale rupture plotted as one image needs a very high DPI to
+show the detail of each plane, and the image is mostly empty map. Here
+the slip and rise of each plane are instead drawn onto the standard
+Web Mercator (XYZ, as used by WMTS "GoogleMapsCompatible") tiles of a
+range of zoom levels, and only tiles that intersect a plane are
+rendered. Each tile pixel takes the bilinear interpolation of the plane
+under it (see `gridding.plane_geometry`), and pixels off every plane
+are transparent, so the tiles overlay any base map.
+
+The tiles are written as ``<layer>/<z>/<x>/<y>.<format>`` under the
+output directory, with a ``tiles.json`` manifest recording the render
+settings, the colour limits of each layer and a digest of the points of
+each plane. Writing a pyramid over an existing one only re-renders the
+tiles intersecting planes whose points have changed, and removes tiles
+that no longer intersect any plane. A change to the settings or colour
+limits re-renders every tile.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+import numpy as np
+
+from visualisation import profiling
+
+if TYPE_CHECKING:
+    from source_modelling import srf
+
+TILE_SIZE = 256
+"""The width and height of a tile (pixels)."""
+MAX_ZOOM = 18
+"""The deepest zoom level a pyramid may have."""
+MANIFEST_FILENAME = "tiles.json"
+TILES_FORMAT_VERSION = 1
+EARTH_CIRCUMFERENCE = 40_075_016.686
+"""The equatorial circumference of the Web Mercator sphere (m)."""
+LAYER_COLOURMAP = "hot_r"
+"""The colour map of every layer, matching the slip and rise maps."""
+
+Tile = tuple[int, int, int]
+"""The (zoom, x, y) index of a tile."""
+
+
+class TileLayer(StrEnum):
+    """The SRF fields drawn as tile layers."""
+
+    slip = "slip"
+    rise = "rise"
+
+
+class TileFormat(StrEnum):
+    """The image formats of tiles."""
+
+    png = "png"
+    webp = "webp"
+
+
+@dataclass(frozen=True)
+class TilePlane:
+    """An SRF plane, as drawn onto tiles."""
+
+    corners: np.ndarray
+    """The (lon, lat) of the corner subfaults of the plane (shape (4, 2))."""
+    affine: np.ndarray
+    """The map from (lon, lat, 1) to subfault indices (see
+    `gridding.plane_index_transform`)."""
+    shape: tuple[int, int]
+    """The number of subfaults along strike and dip."""
+    values: dict[str, np.ndarray]
+    """The values of each layer on the subfaults, in SRF order."""
+    digest: str
+    """The digest of the plane's coordinates and values."""
+
+
+class TileUpdate(NamedTuple):
+    """The tiles changed by writing a pyramid."""
+
+    rendered: set[Tile]
+    """The tiles (re)rendered."""
+    removed: set[Tile]
+    """The tiles removed (or not written) because no plane covers them."""
+
+
+def tile_coordinates(
+    lon: np.ndarray, lat: np.ndarray, zoom: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the fractional tile coordinates of points.
+
+    Parameters
+    ----------
+    lon : np.ndarray
+        The longitude of each point.
+    lat : np.ndarray
+        The latitude of each point.
+    zoom : int
+        The zoom level.
+
+    Returns
+    -------
+    x : np.ndarray
+        The tile column of each point, increasing east.
+    y : np.ndarray
+        The tile row of each point, increasing south.
+    """
+    tile_count = 2**zoom
+    lat_radians = np.radians(lat)
+    x = (np.asarray(lon) + 180) / 360 * tile_count
+    y = (1 - np.arcsinh(np.tan(lat_radians)) / np.pi) / 2 * tile_count
+    return x, y
+
+
+def tile_lon(x: np.ndarray, zoom: int) -> np.ndarray:
+    """Find the longitude of fractional tile columns.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The fractional tile columns.
+    zoom : int
+        The zoom level.
+
+    Returns
+    -------
+    np.ndarray
+        The longitude of each column.
+    """
+    return np.asarray(x) / 2**zoom * 360 - 180
+
+
+def tile_lat(y: np.ndarray, zoom: int) -> np.ndarray:
+    """Find the latitude of fractional tile rows.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        The fractional tile rows.
+    zoom : int
+        The zoom level.
+
+    Returns
+    -------
+    np.ndarray
+        The latitude of each row.
+    """
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y) / 2**zoom))))
+
+
+def footprint_tiles(corners: np.ndarray, zoom: int) -> list[tuple[int, int]]:
+    """Find the tiles of a zoom level intersecting a plane.
+
+    Parameters
+    ----------
+    corners : np.ndarray
+        The (lon, lat) of the corners of the plane (shape (4, 2)).
+    zoom : int
+        The zoom level.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        The (x, y) index of each tile intersecting the plane.
+    """
+    import shapely
+
+    x, y = tile_coordinates(corners[:, 0], corners[:, 1], zoom)
+    last_tile = 2**zoom - 1
+    columns = np.arange(
+        np.clip(math.floor(x.min()), 0, last_tile),
+        np.clip(math.floor(x.max()), 0, last_tile) + 1,
+    )
+    rows = np.arange(
+        np.clip(math.floor(y.min()), 0, last_tile),
+        np.clip(math.floor(y.max()), 0, last_tile) + 1,
+    )
+    tile_x, tile_y = (index.ravel() for index in np.meshgrid(columns, rows))
+    footprint = shapely.convex_hull(shapely.multipoints(np.column_stack([x, y])))
+    intersecting = shapely.intersects(
+        shapely.box(tile_x, tile_y, tile_x + 1, tile_y + 1), footprint
+    )
+    return list(zip(tile_x[intersecting].tolist(), tile_y[intersecting].tolist()))
+
+
+def plane_tiles(
+    corners: Sequence[Optional[np.ndarray]], zooms: Iterable[int]
+) -> dict[Tile, list[int]]:
+    """Find the planes intersecting each tile of a range of zoom levels.
+
+    Parameters
+    ----------
+    corners : Sequence[Optional[np.ndarray]]
+        The corners of each plane (see `footprint_tiles`), or None for
+        planes that are not drawn.
+    zooms : Iterable[int]
+        The zoom levels.
+
+    Returns
+    -------
+    dict[Tile, list[int]]
+        The planes intersecting each tile, in SRF order. Tiles without
+        planes are omitted.
+    """
+    tiles: dict[Tile, list[int]] = {}
+    for zoom in zooms:
+        for plane, plane_corners in enumerate(corners):
+            if plane_corners is None:
+                continue
+            for x, y in footprint_tiles(plane_corners, zoom):
+                tiles.setdefault((zoom, x, y), []).append(plane)
+    return tiles
+
+
+def tile_planes(
+    srf_data: "srf.SrfFile", layers: Iterable[TileLayer]
+) -> list[Optional[TilePlane]]:
+    """Prepare the planes of an SRF for drawing onto tiles.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF, with lon, lat and layer point columns.
+    layers : Iterable[TileLayer]
+        The layers to draw.
+
+    Returns
+    -------
+    list[Optional[TilePlane]]
+        Each plane of the SRF, or None for planes that have no area on
+        the map (vertical planes, or planes one subfault wide).
+    """
+    from visualisation import gridding
+
+    plane_sizes = (srf_data.header["nstk"] * srf_data.header["ndip"]).to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(plane_sizes)])
+    coordinates = srf_data.points[["lon", "lat"]].to_numpy(dtype=np.float64)
+    layer_values = {
+        layer: srf_data.points[layer].to_numpy(dtype=np.float64) for layer in layers
+    }
+
+    planes = []
+    for plane, (nstk, ndip) in enumerate(
+        srf_data.header[["nstk", "ndip"]].to_numpy(dtype=np.int64)
+    ):
+        plane_points = slice(offsets[plane], offsets[plane + 1])
+        plane_coordinates = coordinates[plane_points]
+        affine = gridding.plane_index_transform(plane_coordinates, (nstk, ndip))
+        if affine is None:
+            planes.append(None)
+            continue
+        values = {layer: layer_values[layer][plane_points] for layer in layer_values}
+        digest = hashlib.blake2b(
+            np.array([nstk, ndip]).tobytes() + plane_coordinates.tobytes(),
+            digest_size=16,
+        )
+        for layer in sorted(values):
+            digest.update(layer.encode() + values[layer].tobytes())
+        planes.append(
+            TilePlane(
+                corners=plane_coordinates[[0, nstk - 1, -1, (ndip - 1) * nstk]],
+                affine=affine,
+                shape=(int(nstk), int(ndip)),
+                values=values,
+                digest=digest.hexdigest(),
+            )
+        )
+    return planes
+
+
+def layer_limits(srf_data: "srf.SrfFile", layer: TileLayer) -> tuple[float, float]:
+    """Find the colour limits of a layer.
+
+    The limits are those of the slip map (`plot-srf`) and rise map
+    (`plot-srf-rise`).
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF.
+    layer : TileLayer
+        The layer.
+
+    Returns
+    -------
+    tuple[float, float]
+        The values at the bottom and top of the colour map.
+    """
+    match layer:
+        case TileLayer.slip:
+            slip_quantile = srf_data.points["slip"].quantile(0.98)
+            return 0.0, float(max(int(np.round(slip_quantile, -1)), 10))
+        case TileLayer.rise:
+            return 0.0, float(srf_data.points["rise"].max())
+
+
+def default_max_zoom(srf_data: "srf.SrfFile", tile_size: int = TILE_SIZE) -> int:
+    """Find the shallowest zoom level resolving the subfaults of an SRF.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF.
+    tile_size : int
+        The width of a tile (pixels).
+
+    Returns
+    -------
+    int
+        The first zoom level at which the finest subfault spacing spans
+        at least two pixels, at most `MAX_ZOOM`.
+    """
+    spacing = float((srf_data.header["len"] / srf_data.header["nstk"]).min()) * 1000
+    pixel_size = (
+        EARTH_CIRCUMFERENCE
+        * np.cos(np.radians(srf_data.points["lat"].abs().max()))
+        / tile_size
+    )
+    return int(np.clip(math.ceil(math.log2(2 * pixel_size / spacing)), 0, MAX_ZOOM))
+
+
+def render_tile(
+    tile: Tile,
+    planes: Iterable[TilePlane],
+    limits: dict[str, tuple[float, float]],
+    tile_size: int = TILE_SIZE,
+) -> dict[str, np.ndarray]:
+    """Render the layers of a tile.
+
+    Planes later in the SRF are drawn over earlier ones.
+
+    Parameters
+    ----------
+    tile : Tile
+        The tile to render.
+    planes : Iterable[TilePlane]
+        The planes intersecting the tile.
+    limits : dict[str, tuple[float, float]]
+        The colour limits of each layer to render.
+    tile_size : int
+        The width and height of the tile (pixels).
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        The RGBA image of each layer (shape (tile_size, tile_size, 4)),
+        or an empty dictionary if no plane covers a pixel of the tile.
+    """
+    from matplotlib import colormaps
+    from matplotlib.colors import Normalize
+
+    from visualisation import gridding
+
+    zoom, x, y = tile
+    pixel_centres = (np.arange(tile_size) + 0.5) / tile_size
+    lon = tile_lon(x + pixel_centres, zoom)
+    lat = tile_lat(y + pixel_centres, zoom)
+    grids = {layer: np.full((tile_size, tile_size), np.nan) for layer in limits}
+    for plane in planes:
+        geometry = gridding.plane_geometry(plane.affine, plane.shape, lon, lat)
+        for layer, grid in grids.items():
+            plane_grid = geometry.interpolate(plane.values[layer]).values
+            covered = ~np.isnan(plane_grid)
+            grid[covered] = plane_grid[covered]
+
+    images = {}
+    colourmap = colormaps[LAYER_COLOURMAP]
+    for layer, grid in grids.items():
+        if np.isnan(grid).all():
+            return {}
+        images[layer] = colourmap(Normalize(*limits[layer])(grid), bytes=True)
+        images[layer][np.isnan(grid), 3] = 0
+    return images
+
+
+def tile_path(output_dir: Path, layer: str, tile: Tile, tile_format: str) -> Path:
+    """Find the path of a tile image.
+
+    Parameters
+    ----------
+    output_dir : Path
+        The pyramid directory.
+    layer : str
+        The layer of the tile.
+    tile : Tile
+        The tile.
+    tile_format : str
+        The image format of the tile.
+
+    Returns
+    -------
+    Path
+        The path ``<layer>/<z>/<x>/<y>.<format>`` under `output_dir`.
+    """
+    zoom, x, y = tile
+    return output_dir / layer / str(zoom) / str(x) / f"{y}.{tile_format}"
+
+
+def read_manifest(output_dir: Path) -> Optional[dict[str, Any]]:
+    """Read the manifest of a tile pyramid.
+
+    Parameters
+    ----------
+    output_dir : Path
+        The pyramid directory.
+
+    Returns
+    -------
+    Optional[dict[str, Any]]
+        The manifest, or None if there is no usable manifest.
+    """
+    try:
+        manifest = json.loads((output_dir / MANIFEST_FILENAME).read_text())
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format_version") != TILES_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(output_dir: Path, manifest: dict[str, Any]) -> None:
+    """Atomically (re)write the manifest of a tile pyramid.
+
+    Parameters
+    ----------
+    output_dir : Path
+        The pyramid directory.
+    manifest : dict[str, Any]
+        The manifest to write.
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", dir=output_dir, suffix=".json", delete=False
+    ) as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(manifest_file.name, output_dir / MANIFEST_FILENAME)
+
+
+def write_tile_pyramid(
+    srf_data: "srf.SrfFile",
+    output_dir: Path,
+    zooms: range,
+    layers: Iterable[TileLayer] = tuple(TileLayer),
+    tile_format: TileFormat = TileFormat.png,
+    tile_size: int = TILE_SIZE,
+) -> TileUpdate:
+    """Write (or update) the tile pyramid of an SRF.
+
+    Parameters
+    ----------
+    srf_data : srf.SrfFile
+        The SRF, with lon, lat and layer point columns.
+    output_dir : Path
+        The directory to write the pyramid into. A pyramid already in
+        the directory is updated, re-rendering only the tiles of planes
+        that have changed.
+    zooms : range
+        The zoom levels to render.
+    layers : Iterable[TileLayer]
+        The layers to render.
+    tile_format : TileFormat
+        The image format of the tiles.
+    tile_size : int
+        The width and height of a tile (pixels).
+
+    Returns
+    -------
+    TileUpdate
+        The tiles rendered and removed.
+
+    Raises
+    ------
+    ValueError
+        If no zoom levels are given.
+    """
+    from PIL import Image
+
+    if not zooms:
+        raise ValueError("At least one zoom level is required.")
+    layers = sorted(set(layers))
+
+    with profiling.span("compute"):
+        planes = tile_planes(srf_data, layers)
+        settings = {
+            "layers": layers,
+            "zooms": [zooms.start, zooms.stop],
+            "format": tile_format,
+            "tile_size": tile_size,
+            "limits": {layer: layer_limits(srf_data, layer) for layer in layers},
+        }
+        # The manifest is round-tripped through JSON, so that it compares
+        # equal to the manifest read from a previous pyramid.
+        manifest = json.loads(
+            json.dumps(
+                {
+                    "format_version": TILES_FORMAT_VERSION,
+                    "settings": settings,
+                    "bounds": [
+                        srf_data.points["lon"].min(),
+                        srf_data.points["lat"].min(),
+                        srf_data.points["lon"].max(),
+                        srf_data.points["lat"].max(),
+                    ],
+                    "planes": [
+                        plane
+                        and {"digest": plane.digest, "corners": plane.corners.tolist()}
+                        for plane in planes
+                    ],
+                },
+                default=float,
+            )
+        )
+
+        previous = read_manifest(output_dir) or {
+            "settings": manifest["settings"],
+            "planes": [],
+        }
+        unchanged_planes = set()
+        if previous["settings"] == manifest["settings"]:
+            unchanged_planes = {
+                plane
+                for plane, (current, old) in enumerate(
+                    zip(manifest["planes"], previous["planes"])
+                )
+                if current == old
+            }
+        # The stale tiles are those that showed a changed plane in the
+        # previous pyramid, or show one now.
+        stale_tiles = set(
+            plane_tiles(
+                [
+                    np.array(old["corners"])
+                    if old and plane not in unchanged_planes
+                    else None
+                    for plane, old in enumerate(previous["planes"])
+                ],
+                range(*previous["settings"]["zooms"]),
+            )
+        ) | set(
+            plane_tiles(
+                [
+                    current.corners
+                    if current and plane not in unchanged_planes
+                    else None
+                    for plane, current in enumerate(planes)
+                ],
+                zooms,
+            )
+        )
+        tiles = plane_tiles([plane and plane.corners for plane in planes], zooms)
+
+    update = TileUpdate(rendered=set(), removed=set())
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for tile in sorted(stale_tiles):
+        with profiling.span("render:tiles"):
+            images = render_tile(
+                tile,
+                (planes[plane] for plane in tiles.get(tile, [])),
+                settings["limits"],
+                tile_size,
+            )
+        with profiling.span("save"):
+            for layer in previous["settings"]["layers"]:
+                tile_path(
+                    output_dir, layer, tile, previous["settings"]["format"]
+                ).unlink(missing_ok=True)
+            for layer, image in images.items():
+                image_ffp = tile_path(output_dir, layer, tile, tile_format)
+                image_ffp.parent.mkdir(parents=True, exist_ok=True)
+                Image.fromarray(image).save(
+                    image_ffp, lossless=tile_format == TileFormat.webp
+                )
+        (update.rendered if images else update.removed).add(tile)
+
+    # The manifest is written last, so an interrupted update is redone
+    # in full by the next one.
+    _write_manifest(output_dir, manifest)
+    return update
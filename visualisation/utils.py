@@ -5,15 +5,27 @@ from typing import Optional
 import numpy as np
 
 
-def format_description(
-    arr: np.ndarray, dp: float = 0, compact: bool = False, units: Optional[str] = None
+def format_statistics(
+    min: float,
+    mean: float,
+    max: float,
+    std: float,
+    dp: float = 0,
+    compact: bool = False,
+    units: Optional[str] = None,
 ) -> str:
-    """Format a statistical description of an array.
+    """Format a statistical description from precomputed statistics.
 
     Parameters
     ----------
-    arr : np.ndarray
-        Input array.
+    min : float
+        Minimum value.
+    mean : float
+        Mean value.
+    max : float
+        Maximum value.
+    std : float
+        Standard deviation.
     dp : float, optional
         Decimal places to round to, by default 0.
     compact : bool, optional
@@ -26,10 +38,6 @@ def format_description(
     str
         Formatted string containing min, mean, max, and standard deviation.
     """
-    min = arr.min()
-    mean = np.mean(arr)
-    max = arr.max()
-    std = np.std(arr)
     if units:
         units = " " + units
     else:
@@ -41,3 +49,100 @@ def format_description(
     if compact:
         return f"{min_label} / {mean_label} / {std_label} / {max_label}"
     return f"{min_label}\n{mean_label} ({std_label})\n{max_label}"
+
+
+def format_description(
+    arr: np.ndarray, dp: float = 0, compact: bool = False, units: Optional[str] = None
+) -> str:
+    """Format a statistical description of an array, ignoring NaN values.
+
+    Parameters
+    ----------
+    arr : np.ndarray
+        Input array.
+    dp : float, optional
+        Decimal places to round to, by default 0.
+    compact : bool, optional
+        Whether to return a compact string (i.e. on one line), by default False.
+    units : str, optional
+        The units of the values.
+
+    Returns
+    -------
+    str
+        Formatted string containing min, mean, max, and standard deviation.
+    """
+    return format_statistics(
+        np.nanmin(arr),
+        np.nanmean(arr),
+        np.nanmax(arr),
+        np.nanstd(arr),
+        dp,
+        compact,
+        units,
+    )
+
+
+class RunningStatistics:
+    """Statistics of a sequence of arrays, accumulated without storing them.
+
+    Chunks are merged with the parallel variance algorithm of Chan et
+    al., so the accumulated statistics match those of the concatenated
+    array up to floating point error.
+    """
+
+    def __init__(self) -> None:
+        """Initialise empty statistics."""
+        self.count = 0
+        self.mean = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._m2 = 0.0
+
+    def update(self, arr: np.ndarray) -> None:
+        """Add an array of values to the statistics.
+
+        Parameters
+        ----------
+        arr : np.ndarray
+            The values to add.
+        """
+        arr = np.asarray(arr, dtype=np.float64)
+        if arr.size == 0:
+            return
+        count = self.count + arr.size
+        mean = arr.mean()
+        delta = mean - self.mean
+        self._m2 += ((arr - mean) ** 2).sum() + delta**2 * self.count * arr.size / count
+        self.mean += delta * arr.size / count
+        self.count = count
+        self.min = min(self.min, arr.min())
+        self.max = max(self.max, arr.max())
+
+    @property
+    def std(self) -> float:  # numpydoc ignore=RT01
+        """float: The (population) standard deviation of the values."""
+        return np.sqrt(self._m2 / self.count) if self.count else np.nan
+
+    def format_description(
+        self, dp: float = 0, compact: bool = False, units: Optional[str] = None
+    ) -> str:
+        """Format a statistical description of the accumulated values.
+
+        Parameters
+        ----------
+        dp : float, optional
+            Decimal places to round to, by default 0.
+        compact : bool, optional
+            Whether to return a compact string (i.e. on one line), by default False.
+        units : str, optional
+            The units of the values.
+
+        Returns
+        -------
+        str
+            Formatted string containing min, mean, max, and standard deviation.
+        """
+        return format_statistics(
+            self.min, self.mean, self.max, self.std, dp, compact, units
+        )